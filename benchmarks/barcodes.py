@@ -0,0 +1,156 @@
+# benchmarks/barcodes.py
+"""Synthetic EAN-13 barcode images for decode benchmarks.
+
+The corpus is generated, not checked in: every image is rendered from a
+seeded random number generator, so runs on any machine decode the same
+pixels. Variants cover what the camera path sees: clean labels, small and
+large scales, slight and strong rotation, blur, sensor noise, low contrast
+under uneven light, a barcode sitting in a larger cluttered frame, and
+"phone" frames that combine all of those at 1080p. A separate, smaller
+corpus has several labels in one image.
+"""
+import cv2
+import numpy as np
+
+L_CODES = ("0001101", "0011001", "0010011", "0111101", "0100011",
+           "0110001", "0101111", "0111011", "0110111", "0001011")
+R_CODES = tuple("".join("1" if bit == "0" else "0" for bit in code) for code in L_CODES)
+G_CODES = tuple(code[::-1] for code in R_CODES)
+PARITY = ("LLLLLL", "LLGLGG", "LLGGLG", "LLGGGL", "LGLLGG",
+          "LGGLLG", "LGGGLL", "LGLGLG", "LGLGGL", "LGGLGL")
+
+VARIANTS = ("clean", "small", "large", "rotated", "blurred", "noisy", "scene",
+            "tilted", "dim", "phone")
+MULTI_VARIANTS = ("side_by_side", "stacked", "scene")
+
+
+def ean13_check_digit(digits12):
+    total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(digits12))
+    return str((10 - total % 10) % 10)
+
+
+def ean13_modules(code):
+    """Bar pattern for a 13-digit EAN, as a string of 0/1 modules (no quiet zone)."""
+    first, left, right = int(code[0]), code[1:7], code[7:]
+    bits = "101"
+    for digit, parity in zip(left, PARITY[first]):
+        bits += (L_CODES if parity == "L" else G_CODES)[int(digit)]
+    bits += "01010"
+    for digit in right:
+        bits += R_CODES[int(digit)]
+    return bits + "101"
+
+
+def render_ean13(code, module_px=3, height=120, quiet=10):
+    """Grayscale image (uint8, white background) of one EAN-13 barcode."""
+    modules = np.array([int(b) for b in ean13_modules(code)], dtype=bool)
+    row = np.where(np.repeat(modules, module_px), 0, 255).astype(np.uint8)
+    image = np.tile(row, (height, 1))
+    pad = quiet * module_px
+    return cv2.copyMakeBorder(image, pad, pad, pad, pad, cv2.BORDER_CONSTANT, value=255)
+
+
+def _rotate(image, angle, expand=False):
+    h, w = image.shape
+    matrix = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+    size = (w, h)
+    if expand:
+        cos, sin = abs(matrix[0, 0]), abs(matrix[0, 1])
+        size = (int(h * sin + w * cos), int(h * cos + w * sin))
+        matrix[0, 2] += size[0] / 2 - w / 2
+        matrix[1, 2] += size[1] / 2 - h / 2
+    return cv2.warpAffine(image, matrix, size, borderValue=255)
+
+
+def _dim(image, rng):
+    """Squash contrast and light the image unevenly, left to right."""
+    h, w = image.shape
+    low, high = rng.uniform(60, 90), rng.uniform(150, 190)
+    light = np.linspace(rng.uniform(0.6, 0.8), 1.0, w)[None, :]
+    if rng.random() < 0.5:
+        light = light[:, ::-1]
+    return np.clip((low + image / 255.0 * (high - low)) * light, 0, 255).astype(np.uint8)
+
+
+def _in_frame(image, rng, size):
+    """Place ``image`` at a random spot in a blurred clutter frame of ``size`` (w, h)."""
+    width, height = size
+    frame = rng.integers(60, 200, (height, width), dtype=np.uint8)
+    frame = cv2.GaussianBlur(frame, (0, 0), 6)
+    h, w = image.shape
+    y, x = rng.integers(0, height - h), rng.integers(0, width - w)
+    frame[y:y + h, x:x + w] = image
+    return frame
+
+
+def variant(image, kind, rng):
+    if kind == "small":
+        return cv2.resize(image, None, fx=0.7, fy=0.7, interpolation=cv2.INTER_AREA)
+    if kind == "large":
+        return cv2.resize(image, None, fx=2.5, fy=2.5, interpolation=cv2.INTER_NEAREST)
+    if kind == "rotated":
+        return _rotate(image, rng.uniform(-8, 8))
+    if kind == "blurred":
+        return cv2.GaussianBlur(image, (5, 5), 1.2)
+    if kind == "noisy":
+        noise = rng.normal(0, 25, image.shape)
+        return np.clip(image + noise, 0, 255).astype(np.uint8)
+    if kind == "scene":
+        # A 1280x720 frame of mid-gray clutter with the label somewhere in it
+        return _in_frame(image, rng, (1280, 720))
+    if kind == "tilted":
+        return _rotate(image, rng.choice([-1, 1]) * rng.uniform(20, 40), expand=True)
+    if kind == "dim":
+        return _dim(image, rng)
+    if kind == "phone":
+        label = _rotate(image, rng.uniform(-30, 30), expand=True)
+        frame = _dim(_in_frame(label, rng, (1920, 1080)), rng)
+        frame = cv2.GaussianBlur(frame, (0, 0), rng.uniform(1.0, 1.8))
+        return np.clip(frame + rng.normal(0, 8, frame.shape), 0, 255).astype(np.uint8)
+    return image
+
+
+def corpus(size=100, seed=1234):
+    """List of (expected_code, variant, png_bytes), cycling through VARIANTS."""
+    rng = np.random.default_rng(seed)
+    images = []
+    for i in range(size):
+        digits = "".join(str(d) for d in rng.integers(0, 10, 12))
+        code = digits + ean13_check_digit(digits)
+        kind = VARIANTS[i % len(VARIANTS)]
+        image = variant(render_ean13(code), kind, rng)
+        ok, png = cv2.imencode(".png", image)
+        images.append((code, kind, png.tobytes()))
+    return images
+
+
+def _random_code(rng):
+    digits = "".join(str(d) for d in rng.integers(0, 10, 12))
+    return digits + ean13_check_digit(digits)
+
+
+def multi_variant(labels, kind, rng):
+    if kind == "stacked":
+        width = max(label.shape[1] for label in labels)
+        return np.vstack([
+            cv2.copyMakeBorder(label, 0, 0, 0, width - label.shape[1], cv2.BORDER_CONSTANT, value=255)
+            for label in labels
+        ])
+    row = np.hstack(labels)
+    if kind == "scene":
+        return _in_frame(row, rng, (1280, 720))
+    return row
+
+
+def multi_code_corpus(size=12, seed=4321, codes_per_image=(2, 3)):
+    """List of (expected_codes, variant, png_bytes) with several labels per image."""
+    rng = np.random.default_rng(seed)
+    images = []
+    for i in range(size):
+        count = codes_per_image[i % len(codes_per_image)]
+        codes = tuple(_random_code(rng) for _ in range(count))
+        kind = MULTI_VARIANTS[i % len(MULTI_VARIANTS)]
+        image = multi_variant([render_ean13(code) for code in codes], kind, rng)
+        ok, png = cv2.imencode(".png", image)
+        images.append((codes, kind, png.tobytes()))
+    return images
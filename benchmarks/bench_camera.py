@@ -0,0 +1,116 @@
+# benchmarks/bench_camera.py
+"""Concurrent scans against the shared camera (home/camera.py), with a
+generated video file standing in for the device.
+
+    python benchmarks/bench_camera.py [--scans 20] [--fps 30]
+
+The clip shows an empty scene for --blank seconds, then a barcode label,
+and loops. All scans start together during the empty part: we report how
+long each took to see the code, how many frame decodes they asked for and
+how many actually ran (the rest were shared), plus one scan with a short
+timeout to show an empty scene returns instead of hanging. Needs the zbar
+shared library for pyzbar.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "myproject.settings")
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+
+from barcodes import ean13_check_digit, render_ean13  # noqa: E402
+from home.camera import CAMERA_DECODES, CaptureDaemon  # noqa: E402
+
+SIZE = (1280, 720)
+
+
+def write_clip(path, code, fps, blank_seconds, label_seconds, seed=1):
+    """An MJPG clip: clutter for ``blank_seconds``, then ``code`` on a label in the same scene."""
+    rng = np.random.default_rng(seed)
+    scene = cv2.GaussianBlur(rng.integers(60, 200, SIZE[::-1], dtype=np.uint8), (0, 0), 6)
+    labelled = scene.copy()
+    label = render_ean13(code)
+    h, w = label.shape
+    y, x = (SIZE[1] - h) // 2, (SIZE[0] - w) // 2
+    labelled[y:y + h, x:x + w] = label
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, SIZE)
+    if not writer.isOpened():
+        raise RuntimeError("This OpenCV build cannot write MJPG video")
+    for image, seconds in ((scene, blank_seconds), (labelled, label_seconds)):
+        for _ in range(int(seconds * fps)):
+            noisy = np.clip(image + rng.normal(0, 4, image.shape), 0, 255).astype(np.uint8)
+            writer.write(cv2.cvtColor(noisy, cv2.COLOR_GRAY2BGR))
+    writer.release()
+
+
+def decode_counts():
+    return {labels[0]: int(value) for labels, value in CAMERA_DECODES._values.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scans", type=int, default=20, help="Concurrent scan requests")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--blank", type=float, default=1.0, help="Seconds without a barcode")
+    parser.add_argument("--timeout", type=float, default=10)
+    args = parser.parse_args()
+
+    code = "590123412345"
+    code += ean13_check_digit(code)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        clip = os.path.join(tmp, "camera.avi")
+        write_clip(clip, code, args.fps, args.blank, label_seconds=2)
+        camera = CaptureDaemon(clip, buffer_frames=8, reconnect_seconds=1)
+        camera.start()
+        camera.wait_for_frame(0, 5)  # the clip has started playing
+
+        started = time.monotonic()
+        empty = camera.scan(timeout=args.blank / 4)
+        empty_seconds = time.monotonic() - started
+
+        results, timings = [], []
+        before = decode_counts()
+
+        def scan():
+            began = time.monotonic()
+            found = camera.scan(timeout=args.timeout)
+            timings.append(time.monotonic() - began)
+            results.append(found["data"] if found else None)
+
+        threads = [threading.Thread(target=scan) for _ in range(args.scans)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        camera.stop()
+
+    after = decode_counts()
+    hits = after.get("hit", 0) - before.get("hit", 0)
+    misses = after.get("miss", 0) - before.get("miss", 0)
+    print(json.dumps({
+        "scans": args.scans,
+        "found": sum(r == code for r in results),
+        "seconds_to_barcode": {
+            "median": round(statistics.median(timings), 3),
+            "max": round(max(timings), 3),
+        },
+        "frame_decodes_requested": hits + misses,
+        "frame_decodes_run": misses,
+        "empty_scene_scan": {"result": empty, "seconds": round(empty_seconds, 3)},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
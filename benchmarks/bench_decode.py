@@ -0,0 +1,127 @@
+# benchmarks/bench_decode.py
+"""Decode rate and time per frame on the synthetic barcode corpus: one
+full-resolution pyzbar pass (the old path) vs. the multi-scale pipeline in
+home/decoding.py.
+
+    python benchmarks/bench_decode.py [--size 100] [--seed 1234] [--json]
+
+An image counts as decoded when the expected EAN-13 is among the results.
+A second, multi-label corpus checks that uploads (``all_codes``) get every
+code in an image back, not just the first. Needs the zbar shared library
+for pyzbar.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+from functools import partial
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "myproject.settings")
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+from pyzbar.pyzbar import decode  # noqa: E402
+
+from barcodes import VARIANTS, corpus, multi_code_corpus  # noqa: E402
+from home.decoding import decode_frame  # noqa: E402
+
+
+def single_pass(image):
+    return [{"data": b.data.decode("utf-8", "replace"), "stage": "full"} for b in decode(image)]
+
+
+def measure(decoder, frames):
+    """Per-variant decode counts and timings, plus which stage found each code."""
+    decoded, seconds, stages = Counter(), defaultdict(float), Counter()
+    for code, kind, image in frames:
+        started = time.perf_counter()
+        results = decoder(image)
+        seconds[kind] += time.perf_counter() - started
+        hit = next((r for r in results if r["data"] == code), None)
+        if hit is not None:
+            decoded[kind] += 1
+            stages[hit["stage"]] += 1
+    return decoded, seconds, stages
+
+
+def measure_multi(decoder, frames):
+    """Images whose every expected code was returned, and how many codes came back in all."""
+    complete = returned = 0
+    for codes, _, image in frames:
+        found = {r["data"] for r in decoder(image)}
+        complete += found.issuperset(codes)
+        returned += len(found.intersection(codes))
+    return complete, returned
+
+
+def report(name, frames, decoded, seconds, stages):
+    totals = Counter(kind for _, kind, _ in frames)
+    return {
+        "decoder": name,
+        "decode_rate": round(sum(decoded.values()) / len(frames), 3),
+        "ms_per_frame": round(sum(seconds.values()) / len(frames) * 1000, 2),
+        "variants": {
+            kind: {
+                "decoded": f"{decoded[kind]}/{totals[kind]}",
+                "ms_per_frame": round(seconds[kind] / totals[kind] * 1000, 2),
+            }
+            for kind in VARIANTS if totals[kind]
+        },
+        "stages": dict(stages.most_common()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    args = parser.parse_args()
+
+    # Decode the PNGs up front: both decoders get the same pixels, and the
+    # timings cover decoding only
+    frames = [
+        (code, kind, cv2.imdecode(np.frombuffer(png, dtype=np.uint8), cv2.IMREAD_GRAYSCALE))
+        for code, kind, png in corpus(args.size, args.seed)
+    ]
+    multi_frames = [
+        (codes, kind, cv2.imdecode(np.frombuffer(png, dtype=np.uint8), cv2.IMREAD_GRAYSCALE))
+        for codes, kind, png in multi_code_corpus(seed=args.seed)
+    ]
+    multi_codes = sum(len(codes) for codes, _, _ in multi_frames)
+    reports = []
+    for name, decoder, upload_decoder in (
+        ("single_pass", single_pass, single_pass),
+        ("pipeline", decode_frame, partial(decode_frame, all_codes=True)),
+    ):
+        r = report(name, frames, *measure(decoder, frames))
+        complete, returned = measure_multi(upload_decoder, multi_frames)
+        r["multi_code"] = {
+            "complete": f"{complete}/{len(multi_frames)}",
+            "codes": f"{returned}/{multi_codes}",
+        }
+        reports.append(r)
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+    print(f"{'variant':<10}" + "".join(f"{r['decoder']:>24}" for r in reports))
+    for kind in reports[0]["variants"]:
+        cells = "".join(
+            f"{r['variants'][kind]['decoded']:>12}{r['variants'][kind]['ms_per_frame']:>9.1f} ms"
+            for r in reports
+        )
+        print(f"{kind:<10}{cells}")
+    for r in reports:
+        print(f"{r['decoder']}: {r['decode_rate']:.0%} decoded, {r['ms_per_frame']:.1f} ms/frame, "
+              f"stages {r['stages']}; multi-code images complete {r['multi_code']['complete']}, "
+              f"codes {r['multi_code']['codes']}")
+
+
+if __name__ == "__main__":
+    main()
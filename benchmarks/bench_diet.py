@@ -0,0 +1,95 @@
+# benchmarks/bench_diet.py
+"""Per-call latency of generate_indian_diet, before and after the
+precomputed safe-menu tables.
+
+    python benchmarks/bench_diet.py
+"""
+import json
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "myproject.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+
+from home.diet import generate_indian_diet, normalize_diet, normalize_list  # noqa: E402
+
+# The original module-level dicts, rebuilt from the meal catalog data file
+with open(settings.MEAL_CATALOG_PATH) as f:
+    _data = json.load(f)
+INDIAN_DIET_PLANS = _data["plans"]
+ALLERGY_FILTERS = _data["allergy_filters"]
+
+PROFILES = [
+    ("diabetes", "nuts, gluten", "veg"),
+    ("high blood pressure", "", "vegan"),
+    ("thyroid", "egg, lactose, soy", "nonveg"),
+    ("", "gluten", "vegetarian"),
+]
+
+
+def legacy_generate_indian_diet(condition, allergies, diet_type):
+    """The original implementation: nested scan over every option and keyword."""
+    condition = condition.lower()
+
+    if "diabetes" in condition:
+        condition = "diabetes"
+    elif "bp" in condition or "pressure" in condition:
+        condition = "bp"
+    elif "thyroid" in condition:
+        condition = "thyroid"
+    else:
+        condition = "diabetes"
+
+    diet_type = normalize_diet(diet_type)
+    allergies = normalize_list(allergies)
+
+    disease_plan = INDIAN_DIET_PLANS.get(condition)
+    diet_plan = disease_plan.get(diet_type) or disease_plan["veg"]
+
+    final_plan = {}
+
+    for meal, options in diet_plan.items():
+        options = list(options)
+        random.shuffle(options)
+        safe_items = []
+
+        for food in options:
+            blocked = False
+            for allergy in allergies:
+                for bad in ALLERGY_FILTERS.get(allergy, []):
+                    if bad in food:
+                        blocked = True
+            if not blocked:
+                safe_items.append(food)
+
+        if not safe_items:
+            safe_items = options
+
+        final_plan[meal] = random.sample(safe_items, min(2, len(safe_items)))
+
+    return final_plan
+
+
+def per_call_us(func, number=20000):
+    def run():
+        for profile in PROFILES:
+            func(*profile)
+
+    best = min(timeit.repeat(run, number=number // len(PROFILES), repeat=5))
+    return best / number * 1e6
+
+
+if __name__ == "__main__":
+    before = per_call_us(legacy_generate_indian_diet)
+    after = per_call_us(generate_indian_diet)
+    print(f"before (nested scan):     {before:7.2f} us/call")
+    print(f"after  (safe-menu table): {after:7.2f} us/call")
+    print(f"speedup:                  {before / after:7.2f}x")
@@ -0,0 +1,137 @@
+# benchmarks/bench_sessions.py
+"""Authenticated requests with Django's ``db`` session backend vs. the
+cached one (home/sessions.py).
+
+Each mode runs in its own process on a fresh database file. We log in
+--sessions users, then send --requests GET /get-profile/ requests, picking
+the session for each from a skewed distribution (a few users are much more
+active than the rest), and report requests/s, latency, SQL queries per
+request and, for the cached backend, the session and user hit rates. Use a
+--cache-size below --sessions to see the LRU evicting.
+
+    python benchmarks/bench_sessions.py [--sessions 2000] [--requests 20000] [--cache-size 10000]
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "myproject.settings")
+
+CACHED_MIDDLEWARE = "home.sessions.SessionCacheAuthenticationMiddleware"
+DJANGO_MIDDLEWARE = "django.contrib.auth.middleware.AuthenticationMiddleware"
+
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def hit_rate(counter, kind):
+    hits = counter._values.get((kind, "hit"), 0)
+    misses = counter._values.get((kind, "miss"), 0)
+    return round(hits / (hits + misses), 3) if hits + misses else None
+
+
+def run_mode(mode, db_path, sessions, requests, cache_size):
+    from django.conf import settings
+
+    settings.DATABASES["default"]["NAME"] = db_path
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ["testserver"]
+    settings.SESSION_CACHE_SIZE = cache_size
+    if mode == "db":
+        settings.SESSION_ENGINE = "django.contrib.sessions.backends.db"
+        settings.MIDDLEWARE = [
+            DJANGO_MIDDLEWARE if m == CACHED_MIDDLEWARE else m for m in settings.MIDDLEWARE
+        ]
+
+    import django
+    django.setup()
+
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.test import Client
+
+    from home.metrics import DB_QUERIES
+
+    call_command("migrate", verbosity=0)
+    clients = []
+    for i in range(sessions):
+        client = Client()
+        client.force_login(User.objects.create_user(f"bench{i}"))
+        clients.append(client)
+
+    rng = random.Random(0)
+    picks = [(int(rng.paretovariate(0.5)) - 1) % sessions for _ in range(requests)]
+    order = list(range(sessions))  # which users are the active ones
+    rng.shuffle(order)
+    latencies = []
+    started = time.perf_counter()
+    for pick in picks:
+        began = time.perf_counter()
+        response = clients[order[pick]].get("/get-profile/")
+        latencies.append(time.perf_counter() - began)
+        if response.status_code != 200:
+            raise RuntimeError(f"Unexpected response: {response.status_code}")
+    elapsed = time.perf_counter() - started
+
+    result = {
+        "mode": mode,
+        "requests_per_s": requests / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "queries_per_request": DB_QUERIES._values.get(("get_profile",), 0) / requests,
+        "session_hit_rate": None,
+        "user_hit_rate": None,
+    }
+    if mode == "cached":
+        from home.sessions import SESSION_CACHE_LOOKUPS
+        result["session_hit_rate"] = hit_rate(SESSION_CACHE_LOOKUPS, "session")
+        result["user_hit_rate"] = hit_rate(SESSION_CACHE_LOOKUPS, "user")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--cache-size", type=int, default=10000, help="SESSION_CACHE_SIZE")
+    parser.add_argument("--mode", choices=["db", "cached"], help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.db, args.sessions, args.requests, args.cache_size)))
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("db", "cached"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--mode", mode, "--db", os.path.join(tmp, f"{mode}.sqlite3"),
+                 "--sessions", str(args.sessions), "--requests", str(args.requests),
+                 "--cache-size", str(args.cache_size)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results.append(json.loads(out.strip().splitlines()[-1]))
+
+    def rate(value):
+        return "-" if value is None else f"{value:.1%}"
+
+    print(f"{'mode':<8}{'req/s':>8}{'p50 ms':>9}{'p99 ms':>9}{'SQL/req':>9}{'sessions':>10}{'users':>8}")
+    for r in results:
+        print(f"{r['mode']:<8}{r['requests_per_s']:>8.0f}{r['p50_ms']:>9.2f}{r['p99_ms']:>9.2f}"
+              f"{r['queries_per_request']:>9.2f}{rate(r['session_hit_rate']):>10}{rate(r['user_hit_rate']):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# benchmarks/bench_sqlite.py
+"""Mixed read/write load against SQLite: stock configuration vs. production
+mode (WAL + pragmas + serialized writer).
+
+Each mode runs in its own process on a fresh database file. Reader threads
+page through scan history while writer threads insert scans; we report
+write throughput, failed writes ("database is locked") and read latency.
+All threads share one GIL, so with many busy readers the numbers measure
+the interpreter more than SQLite; keep --readers modest.
+
+    python benchmarks/bench_sqlite.py [--seconds 10] [--readers 4] [--writers 4]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "myproject.settings")
+
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def run_mode(mode, db_path, seconds, readers, writers):
+    from django.conf import settings
+
+    database = settings.DATABASES["default"]
+    database["NAME"] = db_path
+    if mode == "stock":
+        database["CONN_MAX_AGE"] = 0
+        database["OPTIONS"] = {}
+        settings.SQLITE_PRAGMAS = {}
+        settings.SQLITE_SERIALIZED_WRITES = False
+
+    import django
+    django.setup()
+
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.db import OperationalError, connection
+
+    from home.db import db_writer
+    from home.history import history_page
+    from home.models import BarcodeHistory
+
+    call_command("migrate", verbosity=0)
+    users = [User.objects.create_user(f"bench{i}") for i in range(readers + writers)]
+    for user in users:
+        BarcodeHistory.objects.bulk_create(
+            BarcodeHistory(user=user, barcode=str(i), product_name=f"product {i}") for i in range(500)
+        )
+    connection.close()
+
+    stop = time.monotonic() + seconds
+    read_latencies, writes, failures = [], [0], [0]
+    lock = threading.Lock()
+
+    def reader(user):
+        latencies = []
+        while time.monotonic() < stop:
+            started = time.perf_counter()
+            try:
+                history_page(user, limit=50)
+            except OperationalError:
+                pass
+            latencies.append(time.perf_counter() - started)
+        with lock:
+            read_latencies.extend(latencies)
+        connection.close()
+
+    def writer(user):
+        done = failed = 0
+        while time.monotonic() < stop:
+            try:
+                db_writer.run(
+                    BarcodeHistory.objects.create, user=user, barcode="1", product_name="scan"
+                )
+                done += 1
+            except OperationalError:
+                failed += 1
+        with lock:
+            writes[0] += done
+            failures[0] += failed
+        connection.close()
+
+    threads = [threading.Thread(target=reader, args=(u,)) for u in users[:readers]]
+    threads += [threading.Thread(target=writer, args=(u,)) for u in users[readers:]]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    return {
+        "mode": mode,
+        "writes_per_s": writes[0] / seconds,
+        "failed_writes": failures[0],
+        "reads_per_s": len(read_latencies) / seconds,
+        "read_p50_ms": percentile(read_latencies, 50) * 1000,
+        "read_p99_ms": percentile(read_latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--mode", choices=["stock", "production"], help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.db, args.seconds, args.readers, args.writers)))
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("stock", "production"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--mode", mode, "--db", os.path.join(tmp, f"{mode}.sqlite3"),
+                 "--seconds", str(args.seconds), "--readers", str(args.readers),
+                 "--writers", str(args.writers)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results.append(json.loads(out.strip().splitlines()[-1]))
+
+    print(f"{'mode':<12}{'writes/s':>10}{'failed':>8}{'reads/s':>10}{'p50 ms':>9}{'p99 ms':>9}")
+    for r in results:
+        print(f"{r['mode']:<12}{r['writes_per_s']:>10.0f}{r['failed_writes']:>8}"
+              f"{r['reads_per_s']:>10.0f}{r['read_p50_ms']:>9.2f}{r['read_p99_ms']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# benchmarks/load_scan_ws.py
+"""Load test for WebSocket scan sessions (home/scan_session.py).
+
+Drives the ASGI application in myproject/asgi.py directly, in process:
+every simulated browser is an ASGI websocket connection fed from an
+in-memory queue, pushing frames from the synthetic barcode corpus at a
+fixed rate without waiting for "ready", the way a naive client would. Each
+session scans --codes barcodes one after another (sending {"type": "reset"}
+in between) and we report time to first barcode, frames dropped by the
+newest-frame-wins policy, and decoder pool saturation.
+
+    python benchmarks/load_scan_ws.py [--sessions 100] [--fps 15] [--codes 3]
+
+Product lookups go to a local stub of OpenFoodFacts. Needs the zbar shared
+library for pyzbar.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from suite import setup_django, start_stub_server  # noqa: E402
+
+CAMERA_VARIANTS = ("phone", "phone", "scene", "tilted", "dim")
+
+
+def camera_frames(count, seed):
+    """{code: [jpeg frames]}: each label seen the way a moving phone camera would."""
+    import cv2
+    import numpy as np
+    from barcodes import corpus, render_ean13, variant
+
+    rng = np.random.default_rng(seed)
+    frames = {}
+    for code, _, _ in corpus(count, seed):
+        label = render_ean13(code)
+        frames[code] = [
+            cv2.imencode(".jpg", variant(label, kind, rng), [cv2.IMWRITE_JPEG_QUALITY, 80])[1].tobytes()
+            for kind in CAMERA_VARIANTS
+        ]
+    return frames
+
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+class Browser:
+    """One WebSocket client talking to the ASGI app through in-memory queues."""
+
+    def __init__(self, application, path):
+        self.inbox = asyncio.Queue()  # messages for the app
+        self.outbox = asyncio.Queue()  # messages from the app
+        scope = {
+            "type": "websocket",
+            "path": path,
+            "headers": [(b"host", b"testserver"), (b"origin", b"http://testserver")],
+            "query_string": b"",
+            "subprotocols": [],
+        }
+        self.task = asyncio.create_task(application(scope, self.inbox.get, self.outbox.put))
+
+    async def connect(self):
+        await self.inbox.put({"type": "websocket.connect"})
+        message = await self.outbox.get()
+        if message["type"] != "websocket.accept":
+            raise RuntimeError(f"Session refused: {message}")
+
+    async def next_text(self, timeout):
+        message = await asyncio.wait_for(self.outbox.get(), timeout)
+        if message["type"] == "websocket.close":
+            raise RuntimeError(f"Session closed: {message}")
+        return json.loads(message["text"])
+
+    async def close(self):
+        await self.inbox.put({"type": "websocket.disconnect", "code": 1000})
+        await self.task
+
+
+async def run_session(application, path, frames_by_code, args, stats):
+    browser = Browser(application, path)
+    await browser.connect()
+    try:
+        scanned = set()
+        for code in random.sample(list(frames_by_code), args.codes):
+            frames = frames_by_code[code]
+
+            async def stream():
+                for i in range(int(args.timeout * args.fps)):
+                    await browser.inbox.put({"type": "websocket.receive", "bytes": frames[i % len(frames)]})
+                    stats["sent"] += 1
+                    await asyncio.sleep(1 / args.fps)
+
+            started = time.perf_counter()
+            sender = asyncio.create_task(stream())
+            try:
+                while True:
+                    message = await browser.next_text(args.timeout)
+                    if message["type"] == "barcode" and message["barcode"] not in scanned:
+                        if message["barcode"] != code:
+                            stats["wrong"] += 1
+                        stats["latency"].append(time.perf_counter() - started)
+                        break
+            except asyncio.TimeoutError:
+                stats["missed"] += 1
+            finally:
+                sender.cancel()
+            scanned.add(code)  # late frames of this label may still decode after the reset
+            await browser.inbox.put({"type": "websocket.receive", "text": json.dumps({"type": "reset"})})
+    finally:
+        await browser.close()
+
+
+def frame_counts():
+    from home.scan_session import SCAN_FRAMES
+
+    return {labels[0]: int(value) for labels, value in SCAN_FRAMES._values.items()}
+
+
+async def main_async(args):
+    from django.conf import settings
+    from myproject.asgi import application
+
+    frames_by_code = camera_frames(args.labels, seed=7)
+
+    stats = {"sent": 0, "wrong": 0, "missed": 0, "latency": []}
+    before = frame_counts()
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        run_session(application, settings.SCAN_WS_PATH, frames_by_code, args, stats)
+        for _ in range(args.sessions)
+    ))
+    elapsed = time.perf_counter() - started
+    after = frame_counts()
+
+    frames = {k: after.get(k, 0) - before.get(k, 0) for k in after}
+    latency = stats["latency"]
+    return {
+        "sessions": args.sessions,
+        "fps_per_session": args.fps,
+        "decoder_workers": settings.BARCODE_DECODE_WORKERS,
+        "seconds": round(elapsed, 2),
+        "frames_sent": stats["sent"],
+        "frames": frames,
+        "drop_rate": round(frames.get("dropped", 0) / max(1, frames.get("received", 0)), 3),
+        "barcodes": len(latency),
+        "missed": stats["missed"],
+        "wrong": stats["wrong"],
+        "time_to_barcode_ms": {
+            "p50": round(statistics.median(latency) * 1000, 1) if latency else None,
+            "p95": round(percentile(latency, 95) * 1000, 1),
+            "max": round(max(latency, default=0) * 1000, 1),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--fps", type=float, default=15, help="Frames per second each session sends")
+    parser.add_argument("--codes", type=int, default=3, help="Barcodes each session scans")
+    parser.add_argument("--labels", type=int, default=30, help="Distinct barcodes to draw from")
+    parser.add_argument("--timeout", type=float, default=20, help="Give up on a code after this long")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(os.path.join(tmp, "bench.sqlite3"))
+        from django.conf import settings
+
+        server = start_stub_server()
+        settings.OPENFOODFACTS_URL = f"http://127.0.0.1:{server.server_port}"
+        try:
+            report = asyncio.run(main_async(args))
+        finally:
+            server.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
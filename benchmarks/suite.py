@@ -0,0 +1,372 @@
+# benchmarks/suite.py
+"""Benchmark suite for the hot paths, checked against recorded baselines.
+
+    python benchmarks/suite.py                     # run everything, print JSON
+    python benchmarks/suite.py -o results.json     # ... and write it to a file
+    python benchmarks/suite.py -k history          # only names containing "history"
+    python benchmarks/suite.py --update-baseline   # record current numbers
+
+Every benchmark reports one number where lower is better. A result more
+than its threshold (default 1.5x) above the baseline in baselines.json is a
+regression, and the command exits with status 1. Benchmarks whose
+dependencies are missing (e.g. the zbar library for pyzbar) are reported
+as skipped rather than failing the run. A benchmark that raises is
+reported as failed, the others still run, and the exit status is 1.
+
+The suite runs on a throwaway SQLite database with the production settings,
+and against a local stub of OpenFoodFacts, so it needs no network.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "myproject.settings")
+
+BASELINES = os.path.join(BENCH_DIR, "baselines.json")
+DEFAULT_THRESHOLD = 1.5
+
+BENCHMARKS = []
+
+
+def benchmark(name, unit):
+    def register(func):
+        BENCHMARKS.append((name, unit, func))
+        return func
+    return register
+
+
+class Skip(Exception):
+    pass
+
+
+def median_ms(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def best_us_per_call(func, calls, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(calls):
+            func()
+        best = min(best, time.perf_counter() - started)
+    return best / calls * 1e6
+
+
+# ==================== FIXTURES ====================
+
+class StubOpenFoodFacts(BaseHTTPRequestHandler):
+    """Answers product and search requests with canned JSON, instantly."""
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; without TCP_NODELAY the
+    # body waits on the client's delayed ACK (~40 ms per request)
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.startswith("/cgi/search.pl"):
+            body = {"products": [
+                {"code": str(7000000000000 + i), "product_name": f"Oat bar {i}",
+                 "brands": "Stub", "nutriscore_grade": "a"}
+                for i in range(5)
+            ]}
+        else:
+            body = {"status": 1, "product": {"product_name": "Stub",
+                                             "nutriments": {"sugars_100g": 30}}}
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOpenFoodFacts)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_user(username, condition=""):
+    from django.contrib.auth.models import User
+    from home.models import HealthProfile
+
+    user = User.objects.create_user(username)
+    HealthProfile.objects.create(user=user, health_conditions=condition, dietary_restrictions="veg")
+    return user
+
+
+# ==================== BENCHMARKS ====================
+
+PROFILES = [
+    ("diabetes", "nuts, gluten", "veg"),
+    ("high blood pressure", "", "vegan"),
+    ("thyroid", "egg, lactose, soy", "nonveg"),
+    ("", "gluten", "vegetarian"),
+]
+
+
+@benchmark("diet.generate_indian_diet", "us/call")
+def bench_generate_diet():
+    from home.diet import generate_indian_diet
+
+    profiles = iter(PROFILES * 10000)
+    return best_us_per_call(lambda: generate_indian_diet(*next(profiles)), 5000)
+
+
+@benchmark("diet.estimate_calories", "us/call")
+def bench_estimate_calories():
+    from home.diet import CATALOG, estimate_calories
+
+    meals = list(CATALOG.names[1:7]) + ["not a catalog meal"]
+    return best_us_per_call(lambda: estimate_calories(meals), 20000)
+
+
+def _history_client(rows):
+    from django.test import Client
+    from home.models import BarcodeHistory
+
+    user = make_user(f"history{rows}")
+    BarcodeHistory.objects.bulk_create(
+        (BarcodeHistory(user=user, barcode=str(i), product_name=f"product {i}") for i in range(rows)),
+        batch_size=5000,
+    )
+    client = Client()
+    client.force_login(user)
+    return client
+
+
+_history = {}
+
+
+def history_client():
+    if "client" not in _history:
+        _history["client"] = _history_client(100_000)
+    return _history["client"]
+
+
+@benchmark("history.first_page_100k", "ms/request")
+def bench_history_first_page():
+    client = history_client()
+    return median_ms(lambda: client.get("/get-history/"), 200)
+
+
+@benchmark("history.deep_page_100k", "ms/request")
+def bench_history_deep_page():
+    client = history_client()
+    cursor = None
+    for _ in range(1000):  # page 1000 of 2000
+        cursor = client.get("/get-history/", {"cursor": cursor or "", "limit": 50}).json()["next_cursor"]
+    return median_ms(lambda: client.get("/get-history/", {"cursor": cursor}), 200)
+
+
+CATALOG_WORDS = ("oat", "chocolate", "spread", "biscuit", "yogurt", "honey", "almond", "rice",
+                 "crackers", "granola", "peanut", "coconut", "organic", "dark", "milk", "bar")
+
+
+@benchmark("catalog.name_search_200k", "ms/query")
+def bench_catalog_search():
+    from django.utils import timezone
+    from home.models import Product
+    from home.products import search_catalog
+
+    rng = random.Random(1)
+    now = timezone.now()
+    Product.objects.bulk_create(
+        (Product(barcode=str(8000000000000 + i), fetched_at=now, source="dump",
+                 product_name=" ".join(rng.sample(CATALOG_WORDS, 3)).title())
+         for i in range(200_000)),
+        batch_size=5000,
+    )
+    queries = iter(["dark chocolate", "peanut butter bar", "organic oat", "coconut yogurt"] * 1000)
+    return median_ms(lambda: search_catalog(next(queries), limit=3), 200)
+
+
+@benchmark("alternatives.stub_openfoodfacts", "ms/request")
+def bench_alternatives():
+    from django.conf import settings
+    from django.test import Client
+
+    server = start_stub_server()
+    settings.OPENFOODFACTS_URL = f"http://127.0.0.1:{server.server_port}"
+    client = Client()
+    client.force_login(make_user("alternatives", condition="diabetes"))
+    body = json.dumps({
+        "name": "Chocolate spread",
+        "barcode": "3017620422003",
+        "nutrition": {"sugar": {"value": 56}, "fat": {"value": 31}},
+    })
+
+    def request():
+        data = client.post("/accounts/ajax-alternatives/", body, content_type="application/json").json()
+        if not data.get("alternatives"):
+            raise RuntimeError(f"Unexpected alternatives response: {data}")
+
+    try:
+        return median_ms(request, 100)
+    finally:
+        server.shutdown()
+
+
+@benchmark("pages.home_shell", "us/call")
+def bench_home_page():
+    from django.conf import settings
+    from django.test import RequestFactory
+    from home.views import home_page
+
+    settings.PAGE_SHELL_CACHE = True
+    user = make_user("shell")
+    factory = RequestFactory()
+
+    def call():
+        request = factory.get("/")
+        request.user = user
+        home_page(request)
+
+    return best_us_per_call(call, 2000)
+
+
+@benchmark("decode.pyzbar_corpus", "ms/image")
+def bench_decode():
+    try:
+        from pyzbar.pyzbar import decode  # noqa: F401
+    except ImportError as e:
+        raise Skip(str(e))
+    from barcodes import corpus
+    from home.decoding import decode_image_bytes
+
+    images = corpus()
+    decoded = 0
+    started = time.perf_counter()
+    for code, _, data in images:
+        decoded += any(r["data"] == code for r in decode_image_bytes(data))
+    elapsed = time.perf_counter() - started
+    if decoded < len(images) // 2:
+        raise RuntimeError(f"Only {decoded}/{len(images)} corpus images decoded")
+    return elapsed / len(images) * 1000
+
+
+# ==================== RUNNER ====================
+
+def setup_django(db_path):
+    from django.conf import settings
+
+    settings.DATABASES["default"]["NAME"] = db_path
+    settings.DEBUG = False  # no query logging
+    settings.ALLOWED_HOSTS = ["testserver"]
+    settings.SQLITE_SERIALIZED_WRITES = False
+
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    call_command("migrate", verbosity=0)
+
+
+def load_baselines():
+    if not os.path.exists(BASELINES):
+        return {}
+    with open(BASELINES) as f:
+        return json.load(f)
+
+
+def run(names, baselines):
+    results = []
+    for name, unit, func in BENCHMARKS:
+        if names and not any(n in name for n in names):
+            continue
+        random.seed(0)
+        result = {"name": name, "unit": unit}
+        try:
+            value = func()
+        except Skip as e:
+            result.update(status="skipped", reason=str(e))
+            results.append(result)
+            continue
+        except Exception as e:
+            # One broken benchmark must not hide the others' results
+            result.update(status="failed", reason=f"{type(e).__name__}: {e}")
+            results.append(result)
+            print(f"{name:<36}{'':>10} {unit:<11}failed: {result['reason']}", file=sys.stderr)
+            continue
+
+        result["value"] = round(value, 4)
+        baseline = baselines.get(name)
+        if baseline is None:
+            result["status"] = "new"
+        else:
+            threshold = baseline.get("threshold", DEFAULT_THRESHOLD)
+            ratio = value / baseline["value"]
+            result.update(
+                baseline=baseline["value"],
+                threshold=threshold,
+                ratio=round(ratio, 3),
+                status="regressed" if ratio > threshold else "ok",
+            )
+        results.append(result)
+        print(f"{name:<36}{value:>10.3f} {unit:<11}{result['status']}", file=sys.stderr)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", dest="names", action="append", help="Run benchmarks whose name contains this")
+    parser.add_argument("-o", "--output", help="Also write the JSON results to this file")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Record the results as the new baselines (keeps thresholds)")
+    args = parser.parse_args()
+
+    sys.path.insert(0, BENCH_DIR)
+    baselines = load_baselines()
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(os.path.join(tmp, "bench.sqlite3"))
+        results = run(args.names, baselines)
+
+    report = {
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}",
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+    if args.update_baseline:
+        for result in results:
+            if "value" in result:
+                previous = baselines.get(result["name"], {})
+                baselines[result["name"]] = {
+                    "value": result["value"],
+                    "unit": result["unit"],
+                    "threshold": previous.get("threshold", DEFAULT_THRESHOLD),
+                }
+        with open(BASELINES, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        return 0
+
+    return 1 if any(r["status"] in ("regressed", "failed") for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
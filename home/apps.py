@@ -1,5 +1,10 @@
-from django.apps import AppConfig
-
-
-class HomeConfig(AppConfig):
-    name = 'home'
+from django.apps import AppConfig
+
+
+class HomeConfig(AppConfig):
+    name = 'home'
+
+    def ready(self):
+        from . import db  # noqa: F401  (registers the SQLite connection hook)
+        from . import metrics  # noqa: F401  (registers the SQL query timer)
+        from . import sessions  # noqa: F401  (user cache signals, after auth's update_last_login)
@@ -0,0 +1,292 @@
+# home/assets.py
+"""Build step for static assets: minify, content-hash and precompress.
+
+``python manage.py build_assets`` walks ASSET_SOURCE_DIRS and writes every
+file to ASSET_BUILD_DIR under a name that contains a hash of its content
+(``home/index.css`` -> ``home/index.3f9a6c01b2.css``), minifying CSS and JS
+on the way, with ``.gz`` and ``.br`` variants next to it when they are
+smaller. ``manifest.json`` maps the logical names to the built files.
+
+Templates refer to assets by logical name (``{% asset "home/index.js" %}``,
+home/templatetags/assets.py). The asset middleware (home/middleware.py)
+serves the built files with the best encoding the client accepts and
+``immutable`` cache headers: a changed file gets a new name, so a cached
+one never needs revalidating. Until the first build, the tag falls back to
+the unbuilt source through the staticfiles app.
+
+The minifiers are deliberately conservative: they drop comments and
+collapse whitespace, but never rename or reorder anything, and the JS
+minifier keeps line breaks so automatic semicolon insertion is unaffected.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip variants are written without it
+    brotli = None
+
+MANIFEST_NAME = "manifest.json"
+COMPRESSIBLE = {".css", ".js", ".json", ".svg", ".html", ".txt", ".map", ".xml"}
+
+# ==================== MINIFIERS ====================
+
+_CSS_TOKENS = re.compile(
+    r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')"""  # strings: kept as they are
+    r"|/\*.*?\*/"  # comments
+    r"|\s+",
+    re.S,
+)
+_CSS_PUNCTUATION = re.compile(r" ?([{};,>]) ?")
+_PLACEHOLDER = re.compile("\0(\\d+)\0")
+
+
+def minify_css(text):
+    strings = []
+
+    def protect(match):
+        if match.group(1):
+            strings.append(match.group(1))
+            return f"\0{len(strings) - 1}\0"
+        return " "  # comments and whitespace runs
+
+    text = _CSS_TOKENS.sub(protect, text)
+    text = _CSS_PUNCTUATION.sub(r"\1", re.sub(" +", " ", text))
+    text = text.replace(": ", ":").replace(";}", "}")
+    return _PLACEHOLDER.sub(lambda m: strings[int(m.group(1))], text).strip()
+
+
+_JS_REGEX_AFTER = set("(,=:[!&|?{};+-*%<>~^")
+_JS_REGEX_KEYWORDS = {"return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void", "throw"}
+_JS_TIGHT = set("{}()[];,:")
+_IDENT = re.compile(r"[A-Za-z0-9_$]+$")
+
+
+def minify_js(text):
+    """Strip comments and indentation; keep every token and line break that matters."""
+    out = []
+    templates = []  # brace depth inside each open ${...}
+    i, n = 0, len(text)
+
+    def last_significant():
+        for chunk in reversed(out):
+            stripped = chunk.rstrip()
+            if stripped:
+                return stripped
+        return ""
+
+    def regex_allowed():
+        last = last_significant()
+        if not last:
+            return True
+        if last[-1] in _JS_REGEX_AFTER:
+            return True
+        word = _IDENT.search(last)
+        return word is not None and word.group() in _JS_REGEX_KEYWORDS
+
+    def scan_template(i):
+        """From just after a backtick (or a closing ``}`` of ${...}); returns the end index."""
+        while i < n:
+            ch = text[i]
+            if ch == "\\":
+                i += 2
+            elif ch == "`":
+                return i + 1, False
+            elif text.startswith("${", i):
+                return i + 2, True
+            else:
+                i += 1
+        return n, False
+
+    while i < n:
+        ch = text[i]
+        if ch in "\"'":
+            j = i + 1
+            while j < n and text[j] != ch and text[j] != "\n":
+                j += 2 if text[j] == "\\" else 1
+            out.append(text[i:j + 1])
+            i = j + 1
+        elif ch == "`" or (ch == "}" and templates and templates[-1] == 0):
+            if ch == "}":
+                templates.pop()
+            j, opened = scan_template(i + 1)
+            out.append(text[i:j])
+            if opened:
+                templates.append(0)
+            i = j
+        elif text.startswith("//", i):
+            j = text.find("\n", i)
+            i = n if j < 0 else j
+        elif text.startswith("/*", i):
+            j = text.find("*/", i + 2)
+            j = n if j < 0 else j + 2
+            out.append("\n" if "\n" in text[i:j] else " ")
+            i = j
+        elif ch == "/" and regex_allowed():
+            j, in_class = i + 1, False
+            while j < n and text[j] != "\n":
+                c = text[j]
+                if c == "\\":
+                    j += 2
+                    continue
+                if c == "[":
+                    in_class = True
+                elif c == "]":
+                    in_class = False
+                elif c == "/" and not in_class:
+                    break
+                j += 1
+            j += 1
+            while j < n and (text[j].isalnum() or text[j] == "_"):
+                j += 1  # flags
+            out.append(text[i:j])
+            i = j
+        elif ch.isspace():
+            j = i
+            while j < n and text[j].isspace():
+                j += 1
+            out.append("\n" if "\n" in text[i:j] else " ")
+            i = j
+        else:
+            if templates:
+                if ch == "{":
+                    templates[-1] += 1
+                elif ch == "}":
+                    templates[-1] -= 1
+            out.append(ch)
+            i += 1
+
+    # Drop whitespace that no token needs: runs of blank lines, and spaces
+    # next to punctuation that cannot merge with a neighbour
+    result = []
+    for chunk in out:
+        if chunk in (" ", "\n"):
+            if not result or result[-1] in (" ", "\n"):
+                if chunk == "\n" and result and result[-1] == " ":
+                    result[-1] = "\n"
+                continue
+            if chunk == " " and result[-1][-1] in _JS_TIGHT:
+                continue
+        elif result and result[-1] == " " and chunk[0] in _JS_TIGHT:
+            result.pop()
+        result.append(chunk)
+    return "".join(result).strip() + "\n"
+
+
+MINIFIERS = {".css": minify_css, ".js": minify_js}
+
+# ==================== BUILD ====================
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def hashed_name(name, digest):
+    root, ext = os.path.splitext(name)
+    return f"{root}.{digest}{ext}"
+
+
+def compress(data):
+    """{encoding: bytes} for every encoding that actually makes ``data`` smaller."""
+    variants = {"gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(data, quality=11)
+    return {encoding: body for encoding, body in variants.items() if len(body) < len(data)}
+
+
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def iter_sources(source_dirs, build_dir):
+    build_dir = os.path.abspath(build_dir)
+    for source_dir in source_dirs:
+        for root, dirs, files in os.walk(source_dir):
+            dirs[:] = sorted(d for d in dirs if os.path.abspath(os.path.join(root, d)) != build_dir)
+            for filename in sorted(files):
+                path = os.path.join(root, filename)
+                yield os.path.relpath(path, source_dir).replace(os.sep, "/"), path
+
+
+def build(source_dirs, build_dir):
+    """Write minified, hashed and precompressed copies of every source file; returns the manifest."""
+    manifest = {}
+    for name, path in iter_sources(source_dirs, build_dir):
+        with open(path, "rb") as f:
+            data = f.read()
+        ext = os.path.splitext(name)[1].lower()
+        minifier = MINIFIERS.get(ext)
+        if minifier is not None:
+            data = minifier(data.decode("utf-8")).encode("utf-8")
+
+        built = hashed_name(name, content_hash(data))
+        variants = compress(data) if ext in COMPRESSIBLE else {}
+        target = os.path.join(build_dir, built)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as f:
+            f.write(data)
+        for encoding, body in variants.items():
+            with open(target + ENCODING_SUFFIXES[encoding], "wb") as f:
+                f.write(body)
+        manifest[name] = {
+            "file": built,
+            "size": len(data),
+            "encodings": {encoding: len(body) for encoding, body in variants.items()},
+        }
+
+    # Written last, and atomically: servers never see a manifest naming files not yet built
+    path = os.path.join(build_dir, MANIFEST_NAME)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+    return manifest
+
+
+# ==================== MANIFEST ====================
+
+_manifest = {"mtime": None, "entries": {}, "files": {}}
+_manifest_lock = threading.Lock()
+
+
+def _load_manifest():
+    """(logical name -> entry, built file -> entry), reloaded when the manifest file changes."""
+    path = os.path.join(settings.ASSET_BUILD_DIR, MANIFEST_NAME)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    with _manifest_lock:
+        if mtime != _manifest["mtime"]:
+            entries = {}
+            if mtime is not None:
+                with open(path) as f:
+                    entries = json.load(f)
+            _manifest.update(
+                mtime=mtime,
+                entries=entries,
+                files={entry["file"]: entry for entry in entries.values()},
+            )
+        return _manifest["entries"], _manifest["files"]
+
+
+def manifest_version():
+    """Changes whenever the assets are rebuilt (None before the first build)."""
+    _load_manifest()
+    return _manifest["mtime"]
+
+
+def built_name(name):
+    """Hashed file name for a logical asset name, or None if it has not been built."""
+    entry = _load_manifest()[0].get(name)
+    return entry["file"] if entry else None
+
+
+def built_entry(filename):
+    """Manifest entry for a built (hashed) file name, or None."""
+    return _load_manifest()[1].get(filename)
@@ -0,0 +1,167 @@
+# home/basket.py
+"""Health analysis of a whole basket of barcodes.
+
+Barcodes that are fresh in the in-process product cache are answered
+straight away; the rest are looked up on a shared, bounded thread pool
+(database first, then OpenFoodFacts). Results are scored with the risk rule
+table in batches, as lookups complete, so the caller can stream items while
+slower ones are still resolving. The last result is a summary of the basket.
+
+analyze_basket is an async generator, and the view (api_basket) is async
+too: under ASGI, StreamingHttpResponse sends each line as it is yielded.
+A sync iterator would be consumed whole in a thread first, and WSGI servers
+buffer async streams whole, so the basket only streams under ASGI.
+"""
+import asyncio
+import logging
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+from django.conf import settings
+from django.db import close_old_connections
+
+from .products import product_cache
+from .resilience import CircuitOpenError
+from .risk import COLUMNS, RULES, product_matrix
+
+logger = logging.getLogger(__name__)
+
+_pool = ThreadPoolExecutor(max_workers=settings.BASKET_LOOKUP_WORKERS, thread_name_prefix="basket")
+
+TOTAL_NUTRIENTS = ("calories", "sugar", "fat", "salt")
+TOTAL_COLUMNS = [COLUMNS.index(name) for name in TOTAL_NUTRIENTS]
+
+
+def _lookup(barcode):
+    close_old_connections()
+    return product_cache.get(barcode)
+
+
+class BasketTotals:
+    def __init__(self):
+        self.items = self.found = self.not_found = self.failed = self.harmful = 0
+        self.nutrition = dict.fromkeys(TOTAL_NUTRIENTS, 0.0)
+        self.reasons = Counter()
+
+    def as_dict(self):
+        return {
+            "type": "summary",
+            "items": self.items,
+            "found": self.found,
+            "not_found": self.not_found,
+            "failed": self.failed,
+            "harmful": self.harmful,
+            # Per-100g values summed over the basket, counting repeats
+            "nutrition": {name: round(value, 2) for name, value in self.nutrition.items()},
+            "reasons": dict(self.reasons.most_common()),
+        }
+
+
+def _score(batch, quantities, condition, totals):
+    """Score (barcode, product, cache_status) tuples in one pass; yield item results."""
+    for barcode, product, status in batch:
+        if not product["found"]:
+            totals.not_found += quantities[barcode]
+            yield {"type": "item", "barcode": barcode, "quantity": quantities[barcode],
+                   "found": False, "cache": status}
+
+    found = [(barcode, product, status) for barcode, product, status in batch if product["found"]]
+    if not found:
+        return
+
+    matrix = product_matrix([product for _, product, _ in found])
+    verdicts = RULES.evaluate(matrix, condition)
+    counts = np.array([quantities[barcode] for barcode, _, _ in found], dtype=np.float32)
+
+    totals.found += int(counts.sum())
+    totals.harmful += int(counts[verdicts.harmful].sum())
+    sums = np.nansum(matrix[:, TOTAL_COLUMNS] * counts[:, None], axis=0)
+    for name, value in zip(TOTAL_NUTRIENTS, sums.tolist()):
+        totals.nutrition[name] += value
+
+    for row, (barcode, product, status) in enumerate(found):
+        totals.reasons.update({reason: quantities[barcode] for reason in verdicts.reasons[row]})
+        yield {
+            "type": "item",
+            "barcode": barcode,
+            "quantity": quantities[barcode],
+            "found": True,
+            "cache": status,
+            "name": product["name"],
+            "brand": product.get("brand") or "",
+            "nutriscore": product.get("nutriscore") or "",
+            "harmful": bool(verdicts.harmful[row]),
+            "reasons": list(verdicts.reasons[row]),
+        }
+
+
+def _lookup_error(barcode, quantity, exc):
+    if isinstance(exc, CircuitOpenError):
+        error = "Product service unavailable"
+    else:
+        if not isinstance(exc, requests.RequestException):
+            logger.error("Basket lookup of %s failed", barcode, exc_info=exc)
+        error = "Product lookup failed"
+    return {"type": "item", "barcode": barcode, "quantity": quantity, "error": error}
+
+
+async def analyze_basket(barcodes, condition, deadline=None):
+    """Yield one result per distinct barcode as it resolves, then a summary."""
+    deadline = time.monotonic() + (settings.BASKET_DEADLINE if deadline is None else deadline)
+    quantities = Counter(barcodes)
+    totals = BasketTotals()
+    totals.items = len(barcodes)
+
+    ready, pending = [], {}
+    for barcode in quantities:
+        if not barcode.isdigit():
+            totals.failed += quantities[barcode]
+            yield {"type": "item", "barcode": barcode, "quantity": quantities[barcode],
+                   "error": "Invalid barcode"}
+            continue
+        product = product_cache.peek(barcode)
+        if product is not None:
+            ready.append((barcode, product, "fresh"))
+        else:
+            pending[asyncio.wrap_future(_pool.submit(_lookup, barcode))] = barcode
+
+    try:
+        for result in _score(ready, quantities, condition, totals):
+            yield result
+
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, _ = await asyncio.wait(pending, timeout=remaining,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                break
+
+            batch = []
+            for future in done:
+                barcode = pending.pop(future)
+                try:
+                    product, status = future.result()
+                except Exception as e:
+                    # One bad lookup is that item's error, not the end of the stream
+                    totals.failed += quantities[barcode]
+                    yield _lookup_error(barcode, quantities[barcode], e)
+                    continue
+                batch.append((barcode, product, status))
+            for result in _score(batch, quantities, condition, totals):
+                yield result
+
+        for barcode in pending.values():
+            totals.failed += quantities[barcode]
+            yield {"type": "item", "barcode": barcode, "quantity": quantities[barcode],
+                   "error": "Product lookup timed out"}
+
+        yield totals.as_dict()
+    finally:
+        # Timed out, or the client went away: drop lookups that have not started
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,218 @@
+# home/camera.py
+"""Shared camera for kiosk deployments with a fixed scanner camera.
+
+One background thread owns the ``cv2.VideoCapture`` for CAMERA_SOURCE and
+keeps the last CAMERA_BUFFER_FRAMES frames in a ring buffer. Scan requests
+never touch the device: they wait (with a timeout) for frames newer than
+the last one they looked at and decode those. Each frame is decoded at most
+once; concurrent requests looking at the same frame share the result.
+
+CAMERA_SOURCE is a device index, or a video file / stream URL standing in
+for the device. Files are played at their own frame rate and loop, so a
+recorded clip behaves like a camera pointed at the same scene. If the
+device cannot be opened or stops delivering frames, the thread retries
+every CAMERA_RECONNECT_SECONDS.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+import cv2
+from django.conf import settings
+
+from .decoding import decode_frame, is_valid_product_code
+from .metrics import Counter, Gauge, decode_timer
+
+logger = logging.getLogger(__name__)
+
+CAMERA_FRAMES = Counter("camera_frames_total", "Frames read from the shared camera.")
+CAMERA_DECODES = Counter(
+    "camera_frame_decodes_total", "Frame decode requests by scans, by cache result.", ("cache",))
+CAMERA_CONNECTED = Gauge(
+    "camera_connected", "1 while the shared camera is delivering frames.",
+    collect=lambda: {(): int(_camera.connected)} if _camera is not None else {},
+)
+
+
+class CameraUnavailable(Exception):
+    pass
+
+
+class _Decode:
+    __slots__ = ("done", "result")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = []
+
+
+class CaptureDaemon:
+    def __init__(self, source, buffer_frames, reconnect_seconds, decoder=decode_frame):
+        self.source = source
+        self.reconnect_seconds = reconnect_seconds
+        self.decoder = decoder
+        self._frames = deque(maxlen=buffer_frames)  # (seq, frame)
+        self._decodes = {}  # seq -> _Decode, only for frames still in the buffer
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+        self.connected = False
+        self.last_error = None
+
+    @property
+    def is_file(self):
+        return isinstance(self.source, str) and os.path.exists(self.source)
+
+    def start(self):
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="camera-capture", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _open(self):
+        capture = cv2.VideoCapture(self.source)
+        if not capture.isOpened():
+            capture.release()
+            raise CameraUnavailable(f"Cannot open camera source {self.source!r}")
+        return capture
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                capture = self._open()
+            except CameraUnavailable as e:
+                self._disconnected(str(e))
+                self._stop.wait(self.reconnect_seconds)
+                continue
+            try:
+                self._capture(capture)
+            finally:
+                capture.release()
+
+    def _capture(self, capture):
+        # A device blocks in read() until the next frame; a file must be paced
+        interval = 0.0
+        if self.is_file:
+            interval = 1 / (capture.get(cv2.CAP_PROP_FPS) or 30)
+        next_at = time.monotonic()
+        while not self._stop.is_set():
+            ok, frame = capture.read()
+            if not ok:
+                if self.is_file and capture.set(cv2.CAP_PROP_POS_FRAMES, 0):
+                    continue  # loop the clip
+                self._disconnected(f"Camera source {self.source!r} stopped delivering frames")
+                self._stop.wait(self.reconnect_seconds)
+                return
+            self._push(frame)
+            if interval:
+                next_at = max(next_at + interval, time.monotonic() - interval)
+                self._stop.wait(max(0.0, next_at - time.monotonic()))
+
+    def _disconnected(self, error):
+        if error != self.last_error:
+            logger.warning(error)
+        with self._cond:
+            self.connected = False
+            self.last_error = error
+            self._cond.notify_all()
+
+    def _push(self, frame):
+        CAMERA_FRAMES.inc()
+        with self._cond:
+            self._seq += 1
+            self._frames.append((self._seq, frame))
+            oldest = self._frames[0][0]
+            for seq in [s for s in self._decodes if s < oldest]:
+                del self._decodes[seq]
+            self.connected = True
+            self.last_error = None
+            self._cond.notify_all()
+
+    def wait_for_frame(self, after_seq, timeout):
+        """Newest (seq, frame) with seq > ``after_seq``, or None after ``timeout`` seconds.
+
+        Raises CameraUnavailable if the device is down and no newer frame is buffered.
+        """
+        self.start()
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._frames and self._frames[-1][0] > after_seq:
+                    return self._frames[-1]
+                if self.last_error is not None and not self.connected:
+                    raise CameraUnavailable(self.last_error)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stop.is_set():
+                    return None
+                self._cond.wait(remaining)
+
+    def decode(self, seq, frame):
+        """Barcodes in a buffered frame; decoded by the first caller, shared with the rest."""
+        with self._cond:
+            entry = self._decodes.get(seq)
+            owner = entry is None
+            if owner:
+                entry = self._decodes[seq] = _Decode()
+        CAMERA_DECODES.inc(("miss" if owner else "hit",))
+        if not owner:
+            entry.done.wait()
+            return entry.result
+        try:
+            with decode_timer("camera"):
+                entry.result = self.decoder(frame)
+        finally:
+            entry.done.set()
+        return entry.result
+
+    def scan(self, timeout):
+        """First valid EAN/UPC code seen within ``timeout`` seconds, as a decode result, or None."""
+        deadline = time.monotonic() + timeout
+        seen = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            latest = self.wait_for_frame(seen, remaining)
+            if latest is None:
+                return None
+            seen, frame = latest
+            for symbol in self.decode(seen, frame):
+                if is_valid_product_code(symbol["data"], symbol["type"]):
+                    return symbol
+
+
+def _source(value):
+    """Device indexes may come in as strings (e.g. from the environment)."""
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return value
+
+
+_camera = None
+_camera_lock = threading.Lock()
+
+
+def get_camera():
+    """The process-wide CaptureDaemon, created (and started) on first use."""
+    global _camera
+    with _camera_lock:
+        if _camera is None:
+            _camera = CaptureDaemon(
+                _source(settings.CAMERA_SOURCE),
+                buffer_frames=settings.CAMERA_BUFFER_FRAMES,
+                reconnect_seconds=settings.CAMERA_RECONNECT_SECONDS,
+            )
+            atexit.register(_camera.stop)
+        _camera.start()
+        return _camera
@@ -0,0 +1,77 @@
+# home/db.py
+"""SQLite tuning for production use.
+
+Every new SQLite connection gets the pragmas in settings.SQLITE_PRAGMAS
+(WAL journal, synchronous=NORMAL, mmap, busy timeout). With WAL, readers
+never block on the writer, but SQLite still allows only one writer at a
+time, so writes from request threads can be funneled through ``db_writer``,
+one dedicated thread per process that executes them one after another on
+its own persistent connection. Writers in other processes still queue on
+SQLite's lock, bounded by busy_timeout.
+"""
+import queue
+import threading
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {pragma} = {value}")
+
+
+class SerializedWriter:
+    """Runs database writes one at a time on a single background thread."""
+
+    def __init__(self, maxsize=10000):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, func, *args, **kwargs):
+        """Queue ``func(*args, **kwargs)`` and return a Future for its result."""
+        future = Future()
+        # Inline when disabled, or when already on the writer thread (no deadlock)
+        if not settings.SQLITE_SERIALIZED_WRITES or threading.current_thread() is self._thread:
+            try:
+                future.set_result(func(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        self._start()
+        self._queue.put((future, func, args, kwargs))
+        return future
+
+    def run(self, func, *args, **kwargs):
+        """Run ``func`` on the writer thread and wait for its result."""
+        return self.submit(func, *args, **kwargs).result()
+
+    def _run(self):
+        while True:
+            future, func, args, kwargs = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            # Drop the connection if it broke or outlived CONN_MAX_AGE
+            close_old_connections()
+            try:
+                future.set_result(func(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+
+
+db_writer = SerializedWriter()
@@ -0,0 +1,359 @@
+# home/decoding.py
+"""Barcode decoding for uploaded images and camera frames.
+
+Decoding is CPU bound, so uploads run in a bounded process pool instead of
+the request thread. Callers pass encoded image bytes (JPEG/PNG); the worker
+wraps them with ``np.frombuffer`` (no copy) and hands them to
+``cv2.imdecode``.
+
+Every image goes through ``decode_frame``, which tries cheap passes first
+and only spends more CPU on frames the cheap passes miss:
+
+1. ``downscaled`` - the whole frame, shrunk so its long side is at most
+   DOWNSCALE_LONG_SIDE pixels. Clean, well-lit labels end here.
+2. ``roi`` - candidate barcode regions found from the image gradient
+   (strong change across the bars, little along them, closed into blobs),
+   cut out at full resolution and turned so the bars stand upright.
+3. ``threshold`` - the same regions (or the whole frame if none were found)
+   sharpened, then binarized with adaptive and Otsu thresholds, for blurred,
+   dim or unevenly lit labels.
+4. ``rotated`` - the regions rotated by ROTATIONS, in case straightening
+   them went wrong.
+5. ``full`` - the whole frame at full resolution.
+
+The first pass that yields a checksum-valid EAN/UPC code wins. That pass
+still runs over all of its candidates (every region, for the per-region
+passes), and uploads (``all_codes``) also get a full-resolution pass when
+the winning one ran on a shrunk frame, so an image with several codes
+returns all of them. Live scans only need one code and skip that. Symbols
+of other types (QR codes, Code 128) found on the way are returned as well;
+EAN/UPC reads that fail their checksum are dropped as misreads.
+"""
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+import cv2
+import numpy as np
+from django.conf import settings
+from pyzbar.pyzbar import decode
+
+from .metrics import decode_timer
+
+DOWNSCALE_LONG_SIDE = 640
+ROI_ANALYSIS_LONG_SIDE = 800  # the region finder works on a copy this size
+MAX_REGIONS = 3
+ANGLE_LONG_SIDE = 320  # crops are shrunk to this to measure their bar angle
+ROI_MARGIN = 0.15  # grow each region by this share of its size before cutting it out
+ROTATIONS = (15, -15, 30, -30, 90)
+
+PRODUCT_CODE_TYPES = {"EAN13", "EAN8", "UPCA", "UPCE"}
+
+
+def _gtin_valid(digits):
+    """Mod-10 check digit used by every GTIN (EAN-8/13, UPC-A)."""
+    if not digits.isdigit() or len(digits) not in (8, 12, 13, 14):
+        return False
+    body, check = digits[:-1], int(digits[-1])
+    total = sum(int(d) * (3 if i % 2 == 0 else 1) for i, d in enumerate(reversed(body)))
+    return (10 - total % 10) % 10 == check
+
+
+def _expand_upce(code):
+    """UPC-A equivalent of an 8-digit UPC-E code (number system, 6 digits, check)."""
+    ns, d, check = code[0], code[1:7], code[7]
+    last = d[5]
+    if last in "012":
+        body = d[0:2] + last + "0000" + d[2:5]
+    elif last == "3":
+        body = d[0:3] + "00000" + d[3:5]
+    elif last == "4":
+        body = d[0:4] + "00000" + d[4]
+    else:
+        body = d[0:5] + "0000" + last
+    return ns + body + check
+
+
+def is_valid_product_code(data, symbol_type):
+    """True for an EAN/UPC symbol whose check digit is right."""
+    if symbol_type not in PRODUCT_CODE_TYPES or not data.isdigit():
+        return False
+    if symbol_type == "UPCE":
+        return len(data) == 8 and _gtin_valid(_expand_upce(data))
+    return _gtin_valid(data)
+
+
+def _to_gray(image):
+    if image.ndim == 3:
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return image
+
+
+def _shrink(image, long_side):
+    """``image`` scaled down so its long side fits ``long_side``, and the factor used."""
+    scale = long_side / max(image.shape[:2])
+    if scale >= 1:
+        return image, 1.0
+    return cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA), scale
+
+
+def find_regions(gray, limit=MAX_REGIONS):
+    """Rotated rects ((cx, cy), (w, h), angle) in ``gray``'s coordinates that look like 1D barcodes.
+
+    Bars give a strong gradient across them and almost none along them;
+    closing that response with a wide kernel merges the bars into one blob.
+    The search runs at two orientations so vertical barcodes are found too.
+    """
+    small, scale = _shrink(gray, ROI_ANALYSIS_LONG_SIDE)
+    blurred = cv2.GaussianBlur(small, (3, 3), 0)
+    gx = cv2.Scharr(blurred, cv2.CV_32F, 1, 0)
+    gy = cv2.Scharr(blurred, cv2.CV_32F, 0, 1)
+    regions = []
+    for response, kernel in (
+        (cv2.subtract(np.abs(gx), np.abs(gy)), (21, 7)),
+        (cv2.subtract(np.abs(gy), np.abs(gx)), (7, 21)),
+    ):
+        response = cv2.convertScaleAbs(cv2.blur(response, (9, 9)))
+        _, mask = cv2.threshold(response, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, kernel))
+        mask = cv2.dilate(cv2.erode(mask, None, iterations=4), None, iterations=4)
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        for contour in contours:
+            area = cv2.contourArea(contour)
+            if area < 0.002 * small.size:
+                continue
+            (cx, cy), (w, h), angle = cv2.minAreaRect(contour)
+            regions.append((area, ((cx / scale, cy / scale), (w / scale, h / scale), angle)))
+    regions.sort(key=lambda r: r[0], reverse=True)
+    chosen = []
+    for _, rect in regions:
+        # Both orientations often find the same blob; keep the larger one
+        if any(cv2.pointPolygonTest(cv2.boxPoints(other), rect[0], False) >= 0 for other in chosen):
+            continue
+        chosen.append(rect)
+        if len(chosen) == limit:
+            break
+    return chosen
+
+
+def _rotate(image, angle):
+    """``image`` rotated by ``angle`` degrees (counter-clockwise), grown to fit."""
+    h, w = image.shape
+    matrix = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+    cos, sin = abs(matrix[0, 0]), abs(matrix[0, 1])
+    size = (int(h * sin + w * cos), int(h * cos + w * sin))
+    matrix[0, 2] += size[0] / 2 - w / 2
+    matrix[1, 2] += size[1] / 2 - h / 2
+    return cv2.warpAffine(image, matrix, size, borderMode=cv2.BORDER_REPLICATE)
+
+
+def bar_angle(image):
+    """Rotation (degrees) that makes the dominant edges in ``image`` vertical.
+
+    Peak of the gradient-direction histogram weighted by gradient
+    magnitude: a barcode's many parallel bar edges outvote the four edges
+    of the label around it.
+    """
+    blurred = cv2.GaussianBlur(image, (3, 3), 0)
+    gx = cv2.Sobel(blurred, cv2.CV_32F, 1, 0)
+    gy = cv2.Sobel(blurred, cv2.CV_32F, 0, 1)
+    magnitude, direction = cv2.cartToPolar(gx, gy, angleInDegrees=True)
+    bins = (direction.ravel() % 180 / 2).astype(np.intp)
+    hist = np.bincount(bins, weights=magnitude.ravel(), minlength=90)
+    hist = hist + np.roll(hist, 1) + np.roll(hist, -1)
+    peak = int(np.argmax(hist)) * 2 + 1
+    return peak if peak <= 90 else peak - 180
+
+
+def crop_region(gray, rect, margin=ROI_MARGIN):
+    """Cut ``rect`` out of ``gray`` with a margin, rotated so the bars in it are vertical."""
+    (cx, cy), (w, h), _ = rect
+    half = max(w, h) * (1 + 2 * margin) / 2
+    rows, cols = gray.shape
+    top, bottom = max(0, int(cy - half)), min(rows, int(cy + half) + 1)
+    left, right = max(0, int(cx - half)), min(cols, int(cx + half) + 1)
+    crop = gray[top:bottom, left:right]
+    if crop.size == 0:
+        return crop
+    angle = bar_angle(_shrink(crop, ANGLE_LONG_SIDE)[0])
+    if abs(angle) > 2:
+        crop = _rotate(crop, angle)
+    return _trim_to_bars(crop)
+
+
+def _trim_to_bars(image):
+    """Narrow an upright crop to the rows and columns with strong bar edges, plus a quiet zone."""
+    edges = np.abs(cv2.Sobel(cv2.GaussianBlur(image, (3, 3), 0), cv2.CV_32F, 1, 0))
+    edges = edges > edges.max() * 0.25
+    rows = np.flatnonzero(cv2.blur(edges.mean(axis=1, dtype=np.float32)[:, None], (1, 9)).ravel() > 0.05)
+    cols = np.flatnonzero(cv2.blur(edges.mean(axis=0, dtype=np.float32)[None, :], (25, 1)).ravel() > 0.05)
+    if rows.size == 0 or cols.size == 0:
+        return image
+    pad = max(8, (cols[-1] - cols[0]) // 8)
+    top, bottom = max(0, rows[0] - 4), rows[-1] + 5
+    left, right = max(0, cols[0] - pad), cols[-1] + pad + 1
+    return image[top:bottom, left:right]
+
+
+def _thresholded(image):
+    sharp = cv2.addWeighted(image, 2.0, cv2.GaussianBlur(image, (0, 0), 2), -1.0, 0)
+    yield sharp
+    block = max(15, (min(image.shape[:2]) // 8) | 1)
+    yield cv2.adaptiveThreshold(sharp, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, block, 5)
+    yield cv2.threshold(sharp, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)[1]
+
+
+def _symbols(image, stage):
+    return [
+        {
+            "data": barcode.data.decode("utf-8", "replace"),
+            "type": barcode.type,
+            "rect": list(barcode.rect),
+            "stage": stage,
+        }
+        for barcode in decode(image)
+    ]
+
+
+def decode_frame(image, all_codes=False):
+    """Return the barcodes in one decoded frame (grayscale or BGR), cheapest pass first.
+
+    Each result has the symbol's ``data``, ``type``, ``rect`` (in the
+    coordinates of the image the pass decoded) and the ``stage`` that found
+    it. Stops after the first pass that finds a checksum-valid EAN/UPC code;
+    with ``all_codes``, a full-resolution pass follows unless that pass was one.
+    """
+    gray = _to_gray(image)
+    small, _ = _shrink(gray, DOWNSCALE_LONG_SIDE)
+    found = {}  # (type, data) -> symbol
+    crops = None
+
+    def roi_crops():
+        nonlocal crops
+        if crops is None:
+            crops = [crop_region(gray, rect) for rect in find_regions(gray)]
+        return crops
+
+    # stage -> one iterable of candidates per region (a crop, or the whole frame);
+    # built lazily so a stage that is never reached costs nothing
+    stages = (
+        ("downscaled", lambda: [[small]]),
+        ("roi", lambda: [[crop] for crop in roi_crops()]),
+        ("threshold", lambda: [_thresholded(c) for c in roi_crops() or [gray]]),
+        ("rotated", lambda: [(_rotate(c, a) for a in ROTATIONS) for c in roi_crops() or [small]]),
+        ("full", lambda: [[gray]] if small is not gray else []),
+    )
+
+    def collect(candidate, stage):
+        """Add the symbols in ``candidate``; True if one of them is a valid EAN/UPC code."""
+        valid = False
+        for symbol in _symbols(candidate, stage):
+            if symbol["type"] in PRODUCT_CODE_TYPES:
+                if not is_valid_product_code(symbol["data"], symbol["type"]):
+                    continue  # misread
+                valid = True
+            found.setdefault((symbol["type"], symbol["data"]), symbol)
+        return valid
+
+    winning_stage = None
+    for stage, regions in stages:
+        for candidates in regions():
+            for candidate in candidates:
+                if candidate.size == 0 or min(candidate.shape[:2]) < 8:
+                    continue
+                if collect(candidate, stage):
+                    winning_stage = stage
+                    break  # this region is done; the others of this pass still run
+        if winning_stage is not None:
+            break
+    if all_codes and winning_stage not in (None, "full") and small is not gray:
+        collect(gray, "full")  # codes too small to read at the winning pass's scale
+    return list(found.values())
+
+
+def decode_image_bytes(data, all_codes=True):
+    """Return the barcodes found in one encoded image (see decode_frame). Runs in a worker."""
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        raise ValueError("Not a decodable image")
+    return decode_frame(image, all_codes)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_slots = None
+
+
+def get_executor():
+    global _executor, _slots
+    with _executor_lock:
+        if _executor is None:
+            workers = settings.BARCODE_DECODE_WORKERS
+            # spawn: forking a threaded server process is not safe
+            _executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            # Cap queued work so a burst of uploads cannot grow the queue without bound
+            _slots = threading.BoundedSemaphore(workers * settings.BARCODE_DECODE_QUEUE_FACTOR)
+        return _executor
+
+
+def _release(_future):
+    _slots.release()
+
+
+async def adecode_image_bytes(data):
+    """Decode one encoded image in the pool without blocking the event loop.
+
+    Returns None straight away when the pool's queue is full; the caller
+    decides whether to retry (perhaps with a newer frame) or give up.
+    """
+    executor = get_executor()
+    if not _slots.acquire(blocking=False):
+        return None
+    # A live scan needs one code, not every code in the frame
+    future = executor.submit(decode_image_bytes, data, False)
+    future.add_done_callback(_release)
+    return await asyncio.wrap_future(future)
+
+
+def decode_images(images, deadline):
+    """Decode a list of encoded images, giving up at ``deadline`` (monotonic).
+
+    Returns one result dict per image, in order, with status ``ok``,
+    ``error``, ``timeout`` or ``busy``.
+    """
+    with decode_timer("upload"):
+        return _decode_images(images, deadline)
+
+
+def _decode_images(images, deadline):
+    executor = get_executor()
+
+    futures = []
+    for data in images:
+        if not _slots.acquire(timeout=max(0, deadline - time.monotonic())):
+            futures.append(None)
+            continue
+        future = executor.submit(decode_image_bytes, data)
+        future.add_done_callback(_release)
+        futures.append(future)
+
+    pending = [f for f in futures if f is not None]
+    wait(pending, timeout=max(0, deadline - time.monotonic()))
+
+    results = []
+    for future in futures:
+        if future is None:
+            results.append({"status": "busy", "barcodes": []})
+        elif not future.done():
+            future.cancel()
+            results.append({"status": "timeout", "barcodes": []})
+        elif future.exception() is not None:
+            results.append({"status": "error", "error": str(future.exception()), "barcodes": []})
+        else:
+            results.append({"status": "ok", "barcodes": future.result()})
+    return results
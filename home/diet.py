@@ -0,0 +1,217 @@
+# home/diet.py
+"""Indian diet plan generation and per-user daily plan persistence."""
+import hashlib
+import json
+import random
+from itertools import permutations
+from types import MappingProxyType
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .db import db_writer
+from .meals import load_catalog
+from .models import DietPlan
+
+
+def normalize_list(text):
+    if not text:
+        return []
+    return [x.strip().lower() for x in text.split(",")]
+
+
+def normalize_diet(diet):
+    diet = diet.lower()
+    if diet in ["veg", "vegetarian"]:
+        return "veg"
+    if diet in ["vegan"]:
+        return "vegan"
+    if diet in ["nonveg", "non-vegetarian"]:
+        return "nonveg"
+    return "veg"
+
+
+# Meal data (home/data/meals.json), shared read-only by every request
+CATALOG = load_catalog(settings.MEAL_CATALOG_PATH)
+
+
+def estimate_calories(meal_list):
+    total = 0
+    for meal in meal_list:
+        total += CATALOG.calories_of(meal)  # default for unknown meals
+    return total
+
+
+def normalize_condition(condition):
+    condition = condition.lower()
+
+    if "diabetes" in condition:
+        return "diabetes"
+    if "bp" in condition or "pressure" in condition:
+        return "bp"
+    if "thyroid" in condition:
+        return "thyroid"
+    return "diabetes"
+
+
+# One bit per known allergy, in catalog order
+ALLERGY_BITS = {name: 1 << i for i, name in enumerate(CATALOG.allergy_filters)}
+
+
+def allergy_mask(allergies):
+    mask = 0
+    for allergy in normalize_list(allergies):
+        mask |= ALLERGY_BITS.get(allergy, 0)
+    return mask
+
+
+def build_safe_menus(catalog):
+    """Precompute safe options for every (condition, diet, allergy mask).
+
+    The space is small (3 conditions x 3 diets x 2^5 allergy sets), so
+    generate_indian_diet only has to look up a row and pick one of the
+    precomputed meal-id pairs per meal.
+    """
+    table = {}
+    for condition, diets in catalog.plans.items():
+        for diet, meals in diets.items():
+            for mask in range(1 << len(ALLERGY_BITS)):
+                blocked = [
+                    bad
+                    for allergy, bit in ALLERGY_BITS.items() if mask & bit
+                    for bad in catalog.allergy_filters[allergy]
+                ]
+                menu = []
+                for meal, options in meals.items():
+                    safe_items = tuple(
+                        meal_id for meal_id in options
+                        if not any(bad in catalog.names[meal_id] for bad in blocked)
+                    )
+                    # Nothing safe left: fall back to the full list, as before
+                    safe_items = safe_items or options
+                    # Every ordered pick random.sample(safe_items, 2) could return
+                    menu.append((meal, tuple(permutations(safe_items, min(2, len(safe_items))))))
+                table[(condition, diet, mask)] = tuple(menu)
+    return MappingProxyType(table)
+
+
+SAFE_MENUS = build_safe_menus(CATALOG)
+
+
+def plan_key(condition, allergies, diet_type):
+    """Normalize plan inputs to their SAFE_MENUS key."""
+    condition = normalize_condition(condition)
+    diet_type = normalize_diet(diet_type)
+    if diet_type not in CATALOG.plans[condition]:
+        diet_type = "veg"
+    return condition, diet_type, allergy_mask(allergies)
+
+
+def pick_meals(menu, rng=random):
+    names = CATALOG.names
+    return {meal: [names[i] for i in rng.choice(picks)] for meal, picks in menu}
+
+
+def generate_indian_diet(condition, allergies, diet_type, rng=random):
+    return pick_meals(SAFE_MENUS[plan_key(condition, allergies, diet_type)], rng)
+
+
+def diet_plan_meals(diet_plan):
+    return [
+        {
+            "title": " / ".join(diet_plan[meal]),
+            "calories": estimate_calories(diet_plan[meal])
+        }
+        for meal in ("breakfast", "lunch", "dinner")
+    ]
+
+
+# ==================== DAILY PLANS ====================
+
+def plan_signature(profile):
+    """Everything a plan depends on, e.g. "diabetes:veg:3"."""
+    condition, diet_type, mask = plan_key(
+        profile.health_conditions or "",
+        profile.allergies or "",
+        profile.dietary_restrictions or "",
+    )
+    return f"{condition}:{diet_type}:{mask}"
+
+
+def daily_rng(seed_owner, day, signature):
+    """Seeded RNG, so the same inputs give the same plan on every call."""
+    return random.Random(f"{seed_owner}:{day.isoformat()}:{signature}")
+
+
+def plan_for_signature(signature, rng):
+    condition, diet_type, mask = signature.split(":")
+    return pick_meals(SAFE_MENUS[(condition, diet_type, int(mask))], rng)
+
+
+def plan_etag(day, signature, plan):
+    content = f"{day.isoformat()}:{signature}:{json.dumps(plan, sort_keys=True)}"
+    return '"%s"' % hashlib.sha1(content.encode()).hexdigest()[:20]
+
+
+def plan_cache_key(user_id, day):
+    return f"dietplan:{user_id}:{day.isoformat()}"
+
+
+def save_daily_plan(user, day, signature, plan):
+    """Store ``plan`` as the user's only active plan for ``day``; returns the new row."""
+    with transaction.atomic():
+        DietPlan.objects.filter(user=user, plan_date=day, is_active=True).update(is_active=False)
+        return DietPlan.objects.create(
+            user=user,
+            plan_content=json.dumps(plan),
+            plan_date=day,
+            signature=signature,
+            is_active=True,
+        )
+
+
+def get_daily_plan(user, profile, day=None):
+    """Return {"signature", "plan", "etag"} for the user's plan of ``day``.
+
+    Served from the cache, then from the active DietPlan row, and only
+    generated (and persisted) when neither has a plan for the current
+    profile inputs. The cache is per process and generate_diet_plans
+    replaces rows from another one, so a cached plan is only served while
+    its row is still the active one (an indexed primary-key lookup).
+    """
+    day = day or timezone.localdate()
+    signature = plan_signature(profile)
+    key = plan_cache_key(user.id, day)
+
+    row_id = (
+        DietPlan.objects.filter(user=user, plan_date=day, signature=signature, is_active=True)
+        .order_by("-created_at")
+        .values_list("pk", flat=True)
+        .first()
+    )
+    cached = cache.get(key)
+    if row_id is not None and cached and cached.get("row") == row_id:
+        return cached
+
+    if row_id is not None:
+        plan = json.loads(DietPlan.objects.values_list("plan_content", flat=True).get(pk=row_id))
+    else:
+        plan = plan_for_signature(signature, daily_rng(user.id, day, signature))
+        row_id = db_writer.run(save_daily_plan, user, day, signature, plan).pk
+
+    cached = {"signature": signature, "row": row_id, "plan": plan,
+              "etag": plan_etag(day, signature, plan)}
+    cache.set(key, cached, 60 * 60 * 24)
+    return cached
+
+
+def invalidate_daily_plans(user):
+    """Drop today's cached plan and retire current/future plans after a profile change."""
+    today = timezone.localdate()
+    cache.delete(plan_cache_key(user.id, today))
+    db_writer.run(
+        DietPlan.objects.filter(user=user, is_active=True, plan_date__gte=today).update,
+        is_active=False,
+    )
@@ -0,0 +1,70 @@
+# home/history.py
+"""Keyset pagination over a user's BarcodeHistory.
+
+Pages are ordered by (scanned_at DESC, id DESC), which the composite index
+on BarcodeHistory covers, and the cursor is the last row's (scanned_at, id).
+Fetching page N costs the same as page 1, and rows inserted meanwhile never
+shift or duplicate entries across pages.
+"""
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+from .models import BarcodeHistory
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(scanned_at, pk):
+    raw = f"{scanned_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        scanned_at, pk = raw.split("|")
+        return datetime.fromisoformat(scanned_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor(cursor) from None
+
+
+def history_page(user, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """Return (items, next_cursor) for one page of the user's scan history."""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    qs = BarcodeHistory.objects.filter(user=user)
+    if cursor:
+        scanned_at, pk = decode_cursor(cursor)
+        # (scanned_at, id) < cursor, with the range on scanned_at spelled out
+        # separately so SQLite can seek the index instead of scanning it
+        qs = qs.filter(scanned_at__lte=scanned_at).filter(
+            Q(scanned_at__lt=scanned_at) | Q(id__lt=pk)
+        )
+
+    # values_list: plain tuples, no model instances
+    rows = list(
+        qs.order_by("-scanned_at", "-id")
+        .values_list("id", "product_name", "barcode", "scanned_at")[:limit + 1]
+    )
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][3], rows[-1][0])
+
+    items = [
+        {
+            "product": product_name,
+            "barcode": barcode,
+            "time": scanned_at.strftime("%d %b %Y %H:%M"),
+        }
+        for _, product_name, barcode, scanned_at in rows
+    ]
+    return items, next_cursor
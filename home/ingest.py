@@ -0,0 +1,152 @@
+# home/ingest.py
+"""Write-behind ingestion of scanned products.
+
+Requests only append to an in-memory buffer. A background thread writes the
+buffer to BarcodeHistory and ScannedProduct with bulk_create, and folds it
+into the DailyNutrition rollup, when it reaches SCAN_BUFFER_MAX_ROWS or every
+SCAN_BUFFER_FLUSH_INTERVAL seconds, whichever comes first. The same barcode from the same user within
+SCAN_DEBOUNCE_SECONDS is recorded once. Whatever is still buffered when the
+process exits normally is written from an atexit hook, on the exiting
+thread. Each scan keeps the time it
+was recorded, so rows and rollup days do not depend on when they are flushed.
+"""
+import atexit
+import json
+import logging
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .db import db_writer
+from .models import BarcodeHistory, ScannedProduct
+from .rollups import record_scans
+
+logger = logging.getLogger(__name__)
+
+Scan = namedtuple("Scan", "user_id barcode product_name nutrition scanned_at")
+
+
+def write_scans(scans):
+    with transaction.atomic():
+        BarcodeHistory.objects.bulk_create([
+            BarcodeHistory(user_id=s.user_id, barcode=s.barcode, product_name=s.product_name,
+                           scanned_at=s.scanned_at)
+            for s in scans
+        ])
+        ScannedProduct.objects.bulk_create([
+            ScannedProduct(
+                user_id=s.user_id,
+                barcode=s.barcode,
+                product_name=s.product_name,
+                nutritional_info=json.dumps(s.nutrition),
+                scanned_at=s.scanned_at,
+            )
+            for s in scans
+        ])
+        # Same transaction: the rollup never counts a scan that was rolled back
+        record_scans(scans)
+
+
+class ScanBuffer:
+    """Thread-safe buffer of scans, flushed in batches by a background thread."""
+
+    def __init__(self, max_rows, flush_interval, debounce_seconds, writer=write_scans):
+        self.max_rows = max_rows
+        self.flush_interval = flush_interval
+        self.debounce_seconds = debounce_seconds
+        self.writer = writer
+        self._scans = []
+        self._recent = {}  # (user_id, barcode) -> monotonic time of last accepted scan
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def add(self, user_id, barcode, product_name, nutrition):
+        """Queue one scan. Returns False if it was debounced as a duplicate."""
+        now = time.monotonic()
+        key = (user_id, barcode)
+        with self._lock:
+            last = self._recent.get(key)
+            if last is not None and now - last < self.debounce_seconds:
+                return False
+            self._recent[key] = now
+            self._scans.append(Scan(user_id, barcode, product_name, nutrition, timezone.now()))
+            if len(self._scans) >= self.max_rows:
+                self._wakeup.set()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="scan-buffer", daemon=True)
+                self._thread.start()
+        return True
+
+    def __len__(self):
+        return len(self._scans)
+
+    def clear(self):
+        """Drop everything buffered, unwritten."""
+        with self._lock:
+            self._scans = []
+            self._recent = {}
+
+    def flush(self, writer=None):
+        """Write everything buffered so far, with ``writer`` if given. Safe to call from any thread."""
+        writer = writer or self.writer
+        with self._flush_lock:
+            with self._lock:
+                scans, self._scans = self._scans, []
+                cutoff = time.monotonic() - self.debounce_seconds
+                self._recent = {k: t for k, t in self._recent.items() if t > cutoff}
+            if not scans:
+                return 0
+            try:
+                writer(scans)
+            except Exception:
+                logger.exception("Failed to write %d buffered scans; requeueing", len(scans))
+                with self._lock:
+                    # Keep the newest rows if the database stays unavailable
+                    self._scans = (scans + self._scans)[-self.max_rows * 10:]
+                return 0
+            return len(scans)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+def write_scans_serialized(scans):
+    db_writer.run(write_scans, scans)
+
+
+scan_buffer = ScanBuffer(
+    max_rows=settings.SCAN_BUFFER_MAX_ROWS,
+    flush_interval=settings.SCAN_BUFFER_FLUSH_INTERVAL,
+    debounce_seconds=settings.SCAN_DEBOUNCE_SECONDS,
+    writer=write_scans_serialized,
+)
+
+def flush_at_exit():
+    """Write what is still buffered, inline.
+
+    Not through db_writer: its thread may never have been started, and a
+    new thread cannot be started during interpreter shutdown (RuntimeError
+    on Python 3.12+), which would lose the batch.
+    """
+    left = len(scan_buffer)
+    if left and not scan_buffer.flush(writer=write_scans):
+        logger.error("Exiting with %d buffered scans unwritten", left)
+
+
+# atexit hooks run on a normal interpreter exit. That includes gunicorn and
+# uvicorn workers stopping on SIGTERM, as both handle it and exit cleanly; a
+# process killed by an unhandled SIGTERM or by SIGKILL loses its buffer.
+atexit.register(flush_at_exit)
+
+
+def record_scan(user_id, barcode, product_name, nutrition):
+    return scan_buffer.add(user_id, barcode, product_name, nutrition)
@@ -0,0 +1,39 @@
+# home/management/commands/build_assets.py
+"""Minify, content-hash and precompress static assets (home/assets.py).
+
+Run on every deploy, before the new code starts serving:
+
+    python manage.py build_assets [--clean]
+"""
+import os
+import shutil
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from home.assets import build
+
+
+class Command(BaseCommand):
+    help = "Build minified, hashed, gzip/brotli precompressed static assets and their manifest"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clean", action="store_true",
+                            help="Delete earlier builds first (pages cached with old names will 404)")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        build_dir = str(settings.ASSET_BUILD_DIR)
+        if options["clean"] and os.path.isdir(build_dir):
+            shutil.rmtree(build_dir)
+        os.makedirs(build_dir, exist_ok=True)
+
+        manifest = build([str(d) for d in settings.ASSET_SOURCE_DIRS], build_dir)
+        for name, entry in sorted(manifest.items()):
+            sizes = ", ".join(f"{encoding} {size}" for encoding, size in sorted(entry["encodings"].items()))
+            self.stdout.write(f"{name} -> {entry['file']} ({entry['size']} bytes{'; ' + sizes if sizes else ''})")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Built {len(manifest)} assets into {build_dir} in {time.monotonic() - started:.1f}s"
+        ))
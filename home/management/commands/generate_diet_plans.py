@@ -0,0 +1,131 @@
+# home/management/commands/generate_diet_plans.py
+"""Generate diet plans for every user with a health profile.
+
+Profiles are streamed in chunks and grouped by plan signature (normalized
+condition, diet and allergies). Users with the same signature get the same
+plans, so each plan is computed once per group, in a process pool, and the
+DietPlan rows are written with bulk_create. Web workers notice the new
+active rows themselves (home/diet.py get_daily_plan), so no cache is
+cleared here.
+
+Plans start tomorrow by default. The web path seeds a user's plan per user,
+these per group, so replacing today's plan would change the meals a user
+may already have been shown; with an explicit --start that includes today,
+users who already have an active plan for today with their current
+signature keep it.
+
+    python manage.py generate_diet_plans --days 7
+"""
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from home.diet import daily_rng, plan_for_signature, plan_key
+from home.models import DietPlan, HealthProfile
+
+
+def group_plans(signature, start, days):
+    """Plan content (JSON) for one signature, one entry per day. Runs in a worker."""
+    plans = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        plan = plan_for_signature(signature, daily_rng("group", day, signature))
+        plans.append(json.dumps(plan))
+    return signature, plans
+
+
+def chunked(iterator, size):
+    chunk = []
+    for item in iterator:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = "Generate DietPlan rows for all users, computing each plan once per profile group"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=7)
+        parser.add_argument("--start", type=date.fromisoformat, help="First day (default: tomorrow)")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Profiles per chunk")
+        parser.add_argument("--workers", type=int, default=None, help="Plan worker processes")
+
+    def handle(self, *args, **options):
+        days = options["days"]
+        today = timezone.localdate()
+        start = options["start"] or today + timedelta(days=1)
+        end = start + timedelta(days=days - 1)
+
+        plans = {}  # signature -> [plan_content per day]
+        users = rows = 0
+        started = time.monotonic()
+
+        profiles = HealthProfile.objects.values_list(
+            "user_id", "health_conditions", "allergies", "dietary_restrictions"
+        ).iterator(chunk_size=options["chunk_size"])
+
+        with ProcessPoolExecutor(max_workers=options["workers"], initializer=django.setup) as pool:
+            for chunk in chunked(profiles, options["chunk_size"]):
+                signatures = {}
+                for user_id, condition, allergies, diet in chunk:
+                    key = plan_key(condition or "", allergies or "", diet or "")
+                    signatures[user_id] = "%s:%s:%s" % key
+
+                served = set()  # users whose plan for today stays
+                if start <= today <= end:
+                    served = {
+                        user_id
+                        for user_id, signature in DietPlan.objects.filter(
+                            user_id__in=signatures.keys(), plan_date=today, is_active=True,
+                        ).values_list("user_id", "signature")
+                        if signatures[user_id] == signature
+                    }
+
+                missing = set(signatures.values()) - plans.keys()
+                futures = [pool.submit(group_plans, sig, start, days) for sig in missing]
+                for future in futures:
+                    signature, contents = future.result()
+                    plans[signature] = contents
+
+                new_rows = [
+                    DietPlan(
+                        user_id=user_id,
+                        plan_content=plans[signature][offset],
+                        plan_date=start + timedelta(days=offset),
+                        signature=signature,
+                        is_active=True,
+                    )
+                    for user_id, signature in signatures.items()
+                    for offset in range(days)
+                    if not (user_id in served and start + timedelta(days=offset) == today)
+                ]
+
+                with transaction.atomic():
+                    DietPlan.objects.filter(
+                        user_id__in=signatures.keys(),
+                        plan_date__range=(start, end),
+                        is_active=True,
+                    ).exclude(user_id__in=served, plan_date=today).update(is_active=False)
+                    DietPlan.objects.bulk_create(new_rows, batch_size=1000)
+
+                users += len(signatures)
+                rows += len(new_rows)
+                elapsed = time.monotonic() - started
+                self.stdout.write(f"  {users} users, {rows} plans, {users / max(elapsed, 1e-9):.0f} users/s")
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {rows} plans for {users} users ({len(plans)} distinct groups) "
+            f"in {elapsed:.1f}s: {users / max(elapsed, 1e-9):.0f} users/s, "
+            f"{rows / max(elapsed, 1e-9):.0f} plans/s"
+        ))
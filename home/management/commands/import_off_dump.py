@@ -0,0 +1,209 @@
+# home/management/commands/import_off_dump.py
+"""Import an OpenFoodFacts data dump into the local Product catalog.
+
+Streams the dump line by line (JSONL or the tab-separated CSV export, either
+optionally gzipped), so memory stays bounded by --batch-size regardless of
+dump size. Progress is checkpointed after every committed batch; re-running
+the same command resumes from the last checkpoint. Lines that are not a JSON
+object (or a CSV row) with a barcode and a name are counted as skipped.
+
+The checkpoint is an offset into the uncompressed stream. A gzipped dump
+cannot seek, so resuming one decompresses (without importing) everything
+up to that offset again; only the database work is saved.
+
+    python manage.py import_off_dump openfoodfacts-products.jsonl.gz
+    python manage.py import_off_dump en.openfoodfacts.org.products.csv.gz --delta
+"""
+import csv
+import gzip
+import json
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from home.models import Product
+from home.products import OFF_NUTRIMENTS, normalize_off_product
+
+UPDATE_FIELDS = [
+    "product_name", "brand", "nutriscore", "ingredients", "nutritional_info",
+    "categories", "source", "last_modified_t", "fetched_at",
+]
+
+# OpenFoodFacts CSV exports have very long ingredient/category cells
+csv.field_size_limit(sys.maxsize)
+
+
+def open_dump(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def detect_format(path):
+    name = path[:-3] if path.endswith(".gz") else path
+    if name.endswith((".csv", ".tsv")):
+        return "csv"
+    return "jsonl"
+
+
+def parse_jsonl(line, header):
+    raw = json.loads(line)
+    if not isinstance(raw, dict):
+        raise ValueError("Not a JSON object")
+    return raw
+
+
+def parse_csv(line, header):
+    values = next(csv.reader([line.decode("utf-8")], delimiter="\t", quoting=csv.QUOTE_NONE))
+    row = dict(zip(header, values))
+    row["nutriments"] = {key: row.get(key) for key in OFF_NUTRIMENTS.values()}
+    return row
+
+
+def to_product(raw, fetched_at):
+    barcode = (raw.get("code") or "").strip()
+    if not barcode.isdigit() or not raw.get("product_name"):
+        return None
+
+    product = normalize_off_product(barcode, raw)
+    try:
+        last_modified = int(raw.get("last_modified_t") or 0) or None
+    except ValueError:
+        last_modified = None
+
+    return Product(
+        barcode=barcode,
+        product_name=product["name"][:200],
+        brand=product["brand"][:200],
+        nutriscore=product["nutriscore"][:5] or None,
+        ingredients=product["ingredients"],
+        nutritional_info=json.dumps(product["nutrition"]),
+        categories=product["categories"],
+        source="dump",
+        last_modified_t=last_modified,
+        fetched_at=fetched_at,
+    )
+
+
+class Command(BaseCommand):
+    help = "Stream an OpenFoodFacts JSONL/CSV dump into the local product catalog"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Dump file (.jsonl, .csv, optionally .gz)")
+        parser.add_argument("--format", choices=["jsonl", "csv"], help="Defaults to the file extension")
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument("--checkpoint", help="Checkpoint file (default: <path>.checkpoint)")
+        parser.add_argument("--restart", action="store_true", help="Ignore any existing checkpoint")
+        parser.add_argument(
+            "--delta", action="store_true",
+            help="Only import products modified after the newest one already in the catalog",
+        )
+        parser.add_argument("--since", type=int, help="Only import products with last_modified_t > SINCE")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not os.path.exists(path):
+            raise CommandError(f"No such file: {path}")
+
+        fmt = options["format"] or detect_format(path)
+        parse = parse_csv if fmt == "csv" else parse_jsonl
+        batch_size = options["batch_size"]
+        checkpoint_path = options["checkpoint"] or f"{path}.checkpoint"
+
+        saved = None
+        if not options["restart"] and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as f:
+                saved = json.load(f)
+            if saved.get("path") != os.path.abspath(path):
+                saved = None
+
+        since = options["since"]
+        if options["delta"] and since is None:
+            # A resumed delta run must keep the cutoff it started with
+            if saved:
+                since = saved["since"]
+            else:
+                since = Product.objects.aggregate(m=Max("last_modified_t"))["m"] or 0
+
+        state = {"offset": 0, "lines": 0, "imported": 0, "skipped": 0}
+        if saved and saved.get("since") == since:
+            state.update(saved["state"])
+            self.stdout.write(f"Resuming at line {state['lines']} (byte {state['offset']})")
+
+        started = time.monotonic()
+        fetched_at = timezone.now()
+        batch = {}
+
+        with open_dump(path) as f:
+            header = None
+            if fmt == "csv":
+                header = f.readline().decode("utf-8").rstrip("\r\n").split("\t")
+            if state["offset"]:
+                # On a .gz dump this re-reads the stream up to the offset (see above)
+                f.seek(state["offset"])
+
+            for line in iter(f.readline, b""):
+                state["lines"] += 1
+                if not line.strip():
+                    continue
+                try:
+                    raw = parse(line, header)
+                except ValueError:
+                    state["skipped"] += 1
+                    continue
+
+                if since is not None:
+                    try:
+                        if int(raw.get("last_modified_t") or 0) <= since:
+                            continue
+                    except ValueError:
+                        continue
+
+                product = to_product(raw, fetched_at)
+                if product is None:
+                    state["skipped"] += 1
+                    continue
+                batch[product.barcode] = product
+
+                if len(batch) >= batch_size:
+                    state["offset"] = f.tell()
+                    self.flush(batch, state, path, since, checkpoint_path, started)
+                    batch = {}
+
+            state["offset"] = f.tell()
+            self.flush(batch, state, path, since, checkpoint_path, started)
+
+        os.remove(checkpoint_path)
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {state['imported']} products from {state['lines']} lines "
+            f"({state['skipped']} skipped) in {elapsed:.1f}s"
+        ))
+
+    def flush(self, batch, state, path, since, checkpoint_path, started):
+        """Upsert one batch, then record how far we got."""
+        if batch:
+            with transaction.atomic():
+                Product.objects.bulk_create(
+                    batch.values(),
+                    update_conflicts=True,
+                    unique_fields=["barcode"],
+                    update_fields=UPDATE_FIELDS,
+                )
+            state["imported"] += len(batch)
+
+        tmp_path = f"{checkpoint_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"path": os.path.abspath(path), "since": since, "state": state}, f)
+        os.replace(tmp_path, checkpoint_path)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f"  {state['imported']} products, {state['lines']} lines, "
+            f"{state['lines'] / max(elapsed, 1e-9):.0f} lines/s"
+        )
@@ -0,0 +1,76 @@
+# home/management/commands/rebuild_nutrition_rollups.py
+"""Rebuild DailyNutrition from ScannedProduct.
+
+Used to backfill the rollup for scans recorded before it existed, or to
+repair it. Scans are streamed and summed per (user, day); the affected
+rollup rows are replaced in one transaction.
+
+    python manage.py rebuild_nutrition_rollups [--since 2026-01-01] [--user alice]
+"""
+import json
+import time
+from collections import defaultdict
+from datetime import date, datetime, time as dt_time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from home.models import DailyNutrition, ScannedProduct
+from home.products import normalize_nutrition
+from home.rollups import add_to_totals, empty_totals
+
+
+class Command(BaseCommand):
+    help = "Recompute per-user daily nutrition rollups from scanned products"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", type=date.fromisoformat, help="First day to rebuild (default: all)")
+        parser.add_argument("--user", help="Only rebuild this username")
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        scans = ScannedProduct.objects.all()
+        rollups = DailyNutrition.objects.all()
+
+        if options["user"]:
+            user = User.objects.filter(username=options["user"]).first()
+            if user is None:
+                raise CommandError(f"No user named {options['user']!r}")
+            scans = scans.filter(user=user)
+            rollups = rollups.filter(user=user)
+
+        if options["since"]:
+            since = timezone.make_aware(datetime.combine(options["since"], dt_time.min))
+            scans = scans.filter(scanned_at__gte=since)
+            rollups = rollups.filter(day__gte=options["since"])
+
+        totals = defaultdict(empty_totals)
+        count = 0
+        rows = scans.values_list("user_id", "scanned_at", "nutritional_info").iterator(
+            chunk_size=options["batch_size"]
+        )
+        for user_id, scanned_at, nutritional_info in rows:
+            try:
+                nutrition = json.loads(nutritional_info or "{}")
+            except ValueError:
+                nutrition = {}
+            if not isinstance(nutrition, dict):
+                nutrition = {}
+            day = timezone.localdate(scanned_at)
+            add_to_totals(totals[user_id, day], normalize_nutrition(nutrition))
+            count += 1
+
+        with transaction.atomic():
+            deleted, _ = rollups.delete()
+            DailyNutrition.objects.bulk_create(
+                [DailyNutrition(user_id=user_id, day=day, **values) for (user_id, day), values in totals.items()],
+                batch_size=options["batch_size"],
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rolled up {count} scans into {len(totals)} user-days "
+            f"(replaced {deleted}) in {time.monotonic() - started:.1f}s"
+        ))
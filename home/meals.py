@@ -0,0 +1,65 @@
+# home/meals.py
+"""Immutable meal catalog for diet plan generation.
+
+Meals get small integer ids; names and calories live in parallel columns
+(a tuple and a read-only memoryview of an ``array``) indexed by id, and
+plans are nested read-only mappings of id tuples. Nothing here can be mutated after loading, so one
+catalog is safely shared by every request thread.
+"""
+import json
+from array import array
+from pathlib import Path
+from types import MappingProxyType
+
+DEFAULT_PATH = Path(__file__).resolve().parent / "data" / "meals.json"
+
+
+class MealCatalog:
+    __slots__ = ("names", "calories", "ids_by_name", "plans", "allergy_filters", "default_calories")
+
+    def __init__(self, data):
+        meals = sorted(data["meals"], key=lambda m: m["id"])
+        if [m["id"] for m in meals] != list(range(1, len(meals) + 1)):
+            raise ValueError("Meal ids must be 1..N without gaps")
+
+        self.default_calories = data["default_calories"]
+        # Column 0 is unused so meal ids index the columns directly
+        self.names = ("",) + tuple(m["name"] for m in meals)
+        self.calories = memoryview(
+            array("H", [0] + [m["calories"] or self.default_calories for m in meals])
+        ).toreadonly()
+        self.ids_by_name = MappingProxyType({name: i for i, name in enumerate(self.names) if i})
+
+        def meal_ids(names):
+            try:
+                return tuple(self.ids_by_name[name] for name in names)
+            except KeyError as e:
+                raise ValueError(f"Plan refers to unknown meal {e}") from None
+
+        self.plans = MappingProxyType({
+            condition: MappingProxyType({
+                diet: MappingProxyType({slot: meal_ids(names) for slot, names in slots.items()})
+                for diet, slots in diets.items()
+            })
+            for condition, diets in data["plans"].items()
+        })
+        self.allergy_filters = MappingProxyType({
+            allergy: tuple(keywords) for allergy, keywords in data["allergy_filters"].items()
+        })
+
+    def __setattr__(self, name, value):
+        if hasattr(self, name):
+            raise AttributeError("MealCatalog is immutable")
+        object.__setattr__(self, name, value)
+
+    def __len__(self):
+        return len(self.names) - 1
+
+    def calories_of(self, name):
+        meal_id = self.ids_by_name.get(name)
+        return self.calories[meal_id] if meal_id else self.default_calories
+
+
+def load_catalog(path=DEFAULT_PATH):
+    with open(path, encoding="utf-8") as f:
+        return MealCatalog(json.load(f))
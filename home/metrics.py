@@ -0,0 +1,200 @@
+# home/metrics.py
+"""In-process metrics in the Prometheus text format.
+
+The metrics middleware (home/middleware.py) opens a RequestStats for every
+request in a context variable. Database queries (through an execute wrapper
+installed on every new connection), outbound HTTP calls and barcode decodes
+add their time to it wherever they run in that request, including inside
+sync_to_async. When the response is ready, the totals are recorded under
+the request's URL name.
+
+Metrics live in process memory: with several worker processes, each one
+exposes its own numbers at /metrics and Prometheus sums them.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+_registry = []
+_lock = threading.Lock()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self._values = {}
+        _registry.append(self)
+
+    def inc(self, labels=(), amount=1.0):
+        with _lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {value:g}"
+
+
+class Gauge:
+    """A value read when /metrics is scraped."""
+
+    def __init__(self, name, help, labelnames=(), collect=None):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self.collect = collect  # () -> {labels: value}
+        _registry.append(self)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+        for labels, value in sorted(self.collect().items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {value:g}"
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self.buckets = tuple(buckets)
+        self._values = {}  # labels -> [per-bucket counts..., +Inf count, sum]
+        _registry.append(self)
+
+    def observe(self, labels, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with _lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, series in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                le = bound if bound == "+Inf" else f"{bound:g}"
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, [('le', le)])} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {series[-1]:g}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+def render():
+    lines = []
+    for metric in _registry:
+        if isinstance(metric, Gauge):
+            lines.extend(metric.render())  # collect() may take its own locks
+        else:
+            with _lock:
+                lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Time to produce a response, by URL name.", ("view", "method"))
+REQUESTS = Counter(
+    "http_requests_total", "Responses by URL name and status code.", ("view", "method", "status"))
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "SQL queries per request.", ("view",), buckets=COUNT_BUCKETS)
+DB_QUERIES = Counter("db_queries_total", "SQL queries run while serving requests.", ("view",))
+DB_SECONDS = Counter("db_query_seconds_total", "Time spent in SQL while serving requests.", ("view",))
+OUTBOUND_SECONDS = Histogram(
+    "outbound_http_request_duration_seconds", "Outbound HTTP call latency, by host.", ("host",))
+VIEW_OUTBOUND_SECONDS = Counter(
+    "http_request_outbound_seconds_total", "Time spent in outbound HTTP calls, by URL name.", ("view",))
+DECODE_SECONDS = Histogram(
+    "barcode_decode_duration_seconds", "Wall time of one barcode decode batch.", ("source",))
+VIEW_DECODE_SECONDS = Counter(
+    "http_request_decode_seconds_total", "Time spent decoding barcodes, by URL name.", ("view",))
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds", "outbound_seconds", "decode_seconds", "query_log")
+
+    def __init__(self, log_queries=False):
+        self.queries = 0
+        self.db_seconds = self.outbound_seconds = self.decode_seconds = 0.0
+        self.query_log = [] if log_queries else None
+
+
+current_stats = contextvars.ContextVar("request_stats", default=None)
+
+
+def _record_query(execute, sql, params, many, context):
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        stats.queries += 1
+        stats.db_seconds += elapsed
+        if stats.query_log is not None and len(stats.query_log) < 100:
+            stats.query_log.append((sql, round(elapsed * 1000, 3)))
+
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+@contextmanager
+def outbound_timer(host):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        OUTBOUND_SECONDS.observe((host,), elapsed)
+        stats = current_stats.get()
+        if stats is not None:
+            stats.outbound_seconds += elapsed
+
+
+@contextmanager
+def decode_timer(source):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        DECODE_SECONDS.observe((source,), elapsed)
+        stats = current_stats.get()
+        if stats is not None:
+            stats.decode_seconds += elapsed
+
+
+def record_request(view, method, status, seconds, stats):
+    REQUEST_SECONDS.observe((view, method), seconds)
+    REQUESTS.inc((view, method, str(status)))
+    REQUEST_QUERIES.observe((view,), stats.queries)
+    if stats.queries:
+        DB_QUERIES.inc((view,), stats.queries)
+        DB_SECONDS.inc((view,), stats.db_seconds)
+    if stats.outbound_seconds:
+        VIEW_OUTBOUND_SECONDS.inc((view,), stats.outbound_seconds)
+    if stats.decode_seconds:
+        VIEW_DECODE_SECONDS.inc((view,), stats.decode_seconds)
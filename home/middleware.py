@@ -0,0 +1,155 @@
+# home/middleware.py
+import json
+import logging
+import mimetypes
+import os
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.templatetags.static import static
+from django.utils.decorators import sync_and_async_middleware
+
+from .assets import ENCODING_SUFFIXES, built_entry
+from .metrics import RequestStats, current_stats, record_request
+
+slow_logger = logging.getLogger("home.slow_requests")
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    """Record latency, SQL, outbound and decode time per URL name (home/metrics.py).
+
+    With METRICS_SLOW_REQUEST_MS set, a METRICS_SLOW_REQUEST_SAMPLE_RATE share
+    of requests also collect their SQL, and those slower than the limit are
+    logged with the query list.
+    """
+
+    def start():
+        sampled = (
+            settings.METRICS_SLOW_REQUEST_MS is not None
+            and random.random() < settings.METRICS_SLOW_REQUEST_SAMPLE_RATE
+        )
+        stats = RequestStats(log_queries=sampled)
+        return stats, current_stats.set(stats), time.perf_counter()
+
+    def finish(request, response, stats, token, started):
+        seconds = time.perf_counter() - started
+        current_stats.reset(token)
+        match = request.resolver_match
+        view = (match.view_name or "unnamed") if match else "unmatched"
+        status = response.status_code if response is not None else 500
+        record_request(view, request.method, status, seconds, stats)
+
+        if stats.query_log is not None and seconds * 1000 >= settings.METRICS_SLOW_REQUEST_MS:
+            slow_logger.warning("Slow request %s", json.dumps({
+                "view": view,
+                "path": request.path,
+                "method": request.method,
+                "status": status,
+                "ms": round(seconds * 1000, 1),
+                "db_ms": round(stats.db_seconds * 1000, 1),
+                "outbound_ms": round(stats.outbound_seconds * 1000, 1),
+                "decode_ms": round(stats.decode_seconds * 1000, 1),
+                "queries": [{"sql": sql, "ms": ms} for sql, ms in stats.query_log],
+            }))
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            stats, token, started = start()
+            response = None
+            try:
+                response = await get_response(request)
+                return response
+            finally:
+                finish(request, response, stats, token, started)
+    else:
+        def middleware(request):
+            stats, token, started = start()
+            response = None
+            try:
+                response = get_response(request)
+                return response
+            finally:
+                finish(request, response, stats, token, started)
+
+    return middleware
+
+
+def _accepted_encodings(header):
+    """Encodings the client accepts (q > 0), from an Accept-Encoding header."""
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name and q > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def _serve_asset(request, filename, entry):
+    accepted = _accepted_encodings(request.headers.get("Accept-Encoding", ""))
+    encoding = next((e for e in ("br", "gzip") if e in entry["encodings"] and e in accepted), None)
+    path = os.path.join(settings.ASSET_BUILD_DIR, filename)
+    if encoding:
+        path += ENCODING_SUFFIXES[encoding]
+
+    # The file name already contains a hash of the content
+    etag = f'"{filename.rsplit(".", 2)[-2]}-{encoding or "identity"}"'
+    if request.headers.get("If-None-Match") == etag:
+        response = HttpResponseNotModified()
+    else:
+        with open(path, "rb") as f:
+            body = f.read()
+        content_type, _ = mimetypes.guess_type(filename)
+        content_type = content_type or "application/octet-stream"
+        if content_type.startswith("text/") or content_type in ("application/javascript", "application/json"):
+            content_type += "; charset=utf-8"
+        response = HttpResponse(body if request.method == "GET" else b"", content_type=content_type)
+        response["Content-Length"] = str(len(body))
+        if encoding:
+            response["Content-Encoding"] = encoding
+    response["ETag"] = etag
+    response["Vary"] = "Accept-Encoding"
+    response["Cache-Control"] = f"public, max-age={settings.ASSET_MAX_AGE}, immutable"
+    return response
+
+
+@sync_and_async_middleware
+def static_assets_middleware(get_response):
+    """Serve built assets (home/assets.py) precompressed, with immutable cache headers.
+
+    Only files named in the build manifest are served here; anything else
+    under the prefix falls through to the rest of the stack.
+    """
+    prefix = static(settings.ASSET_URL_PREFIX)
+
+    def lookup(request):
+        if request.method not in ("GET", "HEAD") or not request.path.startswith(prefix):
+            return None
+        filename = request.path[len(prefix):]
+        entry = built_entry(filename)
+        return _serve_asset(request, filename, entry) if entry is not None else None
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            response = lookup(request)
+            if response is None:
+                response = await get_response(request)
+            return response
+    else:
+        def middleware(request):
+            response = lookup(request)
+            if response is None:
+                response = get_response(request)
+            return response
+
+    return middleware
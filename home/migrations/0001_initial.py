@@ -1,61 +1,61 @@
-# Generated by Django 6.0.1 on 2026-02-01 05:36
-
-import django.db.models.deletion
-from django.conf import settings
-from django.db import migrations, models
-
-
-class Migration(migrations.Migration):
-
-    initial = True
-
-    dependencies = [
-        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
-    ]
-
-    operations = [
-        migrations.CreateModel(
-            name='DietPlan',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('meal_type', models.CharField(max_length=20)),
-                ('title', models.CharField(max_length=255)),
-                ('description', models.TextField()),
-                ('calories', models.FloatField(blank=True, null=True)),
-                ('protein', models.FloatField(blank=True, null=True)),
-                ('carbs', models.FloatField(blank=True, null=True)),
-                ('generated_at', models.DateTimeField(auto_now_add=True)),
-                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
-            ],
-        ),
-        migrations.CreateModel(
-            name='HealthProfile',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('health_condition', models.CharField(blank=True, max_length=255, null=True)),
-                ('allergies', models.CharField(blank=True, max_length=255, null=True)),
-                ('diet_preference', models.CharField(blank=True, choices=[('veg', 'Vegetarian'), ('nonveg', 'Non-Vegetarian'), ('vegan', 'Vegan')], max_length=10, null=True)),
-                ('created_at', models.DateTimeField(auto_now_add=True)),
-                ('updated_at', models.DateTimeField(auto_now=True)),
-                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
-            ],
-        ),
-        migrations.CreateModel(
-            name='ScannedProduct',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('barcode', models.CharField(max_length=50)),
-                ('product_name', models.CharField(max_length=255)),
-                ('brand', models.CharField(blank=True, max_length=255, null=True)),
-                ('nutri_score', models.CharField(blank=True, max_length=5, null=True)),
-                ('calories', models.FloatField(blank=True, null=True)),
-                ('protein', models.FloatField(blank=True, null=True)),
-                ('carbs', models.FloatField(blank=True, null=True)),
-                ('fiber', models.FloatField(blank=True, null=True)),
-                ('sugar', models.FloatField(blank=True, null=True)),
-                ('fat', models.FloatField(blank=True, null=True)),
-                ('scanned_at', models.DateTimeField(auto_now_add=True)),
-                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
-            ],
-        ),
-    ]
+# Generated by Django 6.0.1 on 2026-02-01 05:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DietPlan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('meal_type', models.CharField(max_length=20)),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField()),
+                ('calories', models.FloatField(blank=True, null=True)),
+                ('protein', models.FloatField(blank=True, null=True)),
+                ('carbs', models.FloatField(blank=True, null=True)),
+                ('generated_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='HealthProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('health_condition', models.CharField(blank=True, max_length=255, null=True)),
+                ('allergies', models.CharField(blank=True, max_length=255, null=True)),
+                ('diet_preference', models.CharField(blank=True, choices=[('veg', 'Vegetarian'), ('nonveg', 'Non-Vegetarian'), ('vegan', 'Vegan')], max_length=10, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ScannedProduct',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('barcode', models.CharField(max_length=50)),
+                ('product_name', models.CharField(max_length=255)),
+                ('brand', models.CharField(blank=True, max_length=255, null=True)),
+                ('nutri_score', models.CharField(blank=True, max_length=5, null=True)),
+                ('calories', models.FloatField(blank=True, null=True)),
+                ('protein', models.FloatField(blank=True, null=True)),
+                ('carbs', models.FloatField(blank=True, null=True)),
+                ('fiber', models.FloatField(blank=True, null=True)),
+                ('sugar', models.FloatField(blank=True, null=True)),
+                ('fat', models.FloatField(blank=True, null=True)),
+                ('scanned_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -1,32 +1,32 @@
-# Generated by Django 6.0.1 on 2026-02-03 17:54
-
-import django.db.models.deletion
-from django.conf import settings
-from django.db import migrations, models
-
-
-class Migration(migrations.Migration):
-
-    dependencies = [
-        ('home', '0001_initial'),
-        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
-    ]
-
-    operations = [
-        migrations.CreateModel(
-            name='BarcodeHistory',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('barcode', models.CharField(max_length=50)),
-                ('product_name', models.CharField(max_length=255)),
-                ('brand', models.CharField(blank=True, max_length=255, null=True)),
-                ('nutri_score', models.CharField(blank=True, max_length=5, null=True)),
-                ('scanned_at', models.DateTimeField(auto_now_add=True)),
-                ('calories', models.FloatField(blank=True, null=True)),
-                ('protein', models.FloatField(blank=True, null=True)),
-                ('carbs', models.FloatField(blank=True, null=True)),
-                ('fat', models.FloatField(blank=True, null=True)),
-                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
-            ],
-        ),
-    ]
+# Generated by Django 6.0.1 on 2026-02-03 17:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BarcodeHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('barcode', models.CharField(max_length=50)),
+                ('product_name', models.CharField(max_length=255)),
+                ('brand', models.CharField(blank=True, max_length=255, null=True)),
+                ('nutri_score', models.CharField(blank=True, max_length=5, null=True)),
+                ('scanned_at', models.DateTimeField(auto_now_add=True)),
+                ('calories', models.FloatField(blank=True, null=True)),
+                ('protein', models.FloatField(blank=True, null=True)),
+                ('carbs', models.FloatField(blank=True, null=True)),
+                ('fat', models.FloatField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
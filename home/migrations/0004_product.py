@@ -0,0 +1,26 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0003_rename_generated_at_dietplan_created_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Product',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('barcode', models.CharField(max_length=100, unique=True)),
+                ('product_name', models.CharField(max_length=200)),
+                ('brand', models.CharField(blank=True, max_length=200, null=True)),
+                ('nutriscore', models.CharField(blank=True, max_length=5, null=True)),
+                ('ingredients', models.TextField(blank=True, null=True)),
+                ('nutritional_info', models.TextField(blank=True, null=True)),
+                ('fetched_at', models.DateTimeField()),
+            ],
+        ),
+    ]
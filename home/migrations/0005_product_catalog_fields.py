@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0004_product'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='categories',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='last_modified_t',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='source',
+            field=models.CharField(default='api', max_length=10),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0005_product_catalog_fields'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dietplan',
+            name='plan_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='dietplan',
+            name='signature',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='dietplan',
+            index=models.Index(fields=['user', 'plan_date'], name='home_dietpl_user_id_3308a2_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0006_dietplan_plan_date_signature'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='barcodehistory',
+            index=models.Index(fields=['user', '-scanned_at', '-id'], name='history_user_scanned_idx'),
+        ),
+    ]
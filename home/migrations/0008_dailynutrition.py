@@ -0,0 +1,32 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0007_barcodehistory_user_scanned_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyNutrition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('calories', models.FloatField(default=0)),
+                ('sugar', models.FloatField(default=0)),
+                ('fat', models.FloatField(default=0)),
+                ('salt', models.FloatField(default=0)),
+                ('products', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'day'), name='daily_nutrition_user_day')],
+            },
+        ),
+    ]
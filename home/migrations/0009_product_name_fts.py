@@ -0,0 +1,56 @@
+# Full-text index over Product.product_name for search_catalog (SQLite FTS5)
+
+from django.db import migrations
+
+CREATE = [
+    """CREATE VIRTUAL TABLE home_product_fts USING fts5(
+        product_name, content='home_product', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER home_product_fts_insert AFTER INSERT ON home_product BEGIN
+        INSERT INTO home_product_fts(rowid, product_name) VALUES (new.id, new.product_name);
+    END""",
+    """CREATE TRIGGER home_product_fts_delete AFTER DELETE ON home_product BEGIN
+        INSERT INTO home_product_fts(home_product_fts, rowid, product_name)
+        VALUES ('delete', old.id, old.product_name);
+    END""",
+    """CREATE TRIGGER home_product_fts_update AFTER UPDATE OF product_name ON home_product BEGIN
+        INSERT INTO home_product_fts(home_product_fts, rowid, product_name)
+        VALUES ('delete', old.id, old.product_name);
+        INSERT INTO home_product_fts(rowid, product_name) VALUES (new.id, new.product_name);
+    END""",
+    "INSERT INTO home_product_fts(home_product_fts) VALUES ('rebuild')",
+]
+
+DROP = [
+    "DROP TRIGGER IF EXISTS home_product_fts_insert",
+    "DROP TRIGGER IF EXISTS home_product_fts_delete",
+    "DROP TRIGGER IF EXISTS home_product_fts_update",
+    "DROP TABLE IF EXISTS home_product_fts",
+]
+
+
+def execute_on_sqlite(schema_editor, statements):
+    # Other databases keep the LIKE search in search_catalog
+    if schema_editor.connection.vendor == "sqlite":
+        for statement in statements:
+            schema_editor.execute(statement)
+
+
+def create_fts(apps, schema_editor):
+    execute_on_sqlite(schema_editor, CREATE)
+
+
+def drop_fts(apps, schema_editor):
+    execute_on_sqlite(schema_editor, DROP)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0008_dailynutrition'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:48
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0009_product_name_fts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='barcodehistory',
+            name='scanned_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='scannedproduct',
+            name='scanned_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
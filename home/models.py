@@ -1,49 +1,97 @@
-# home/models.py
-from django.db import models
-from django.contrib.auth.models import User
-
-# DELETE this line - it's causing circular import
-# from .models import HealthProfile, BarcodeHistory, DietPlan  # DELETE THIS LINE
-
-class HealthProfile(models.Model):
-    user = models.OneToOneField(User, on_delete=models.CASCADE)
-    # Make sure field names are correct
-    health_conditions = models.TextField(blank=True, null=True)  # Note: plural 'conditions'
-    allergies = models.TextField(blank=True, null=True)
-    dietary_restrictions = models.TextField(blank=True, null=True)
-    weight = models.FloatField(blank=True, null=True)
-    height = models.FloatField(blank=True, null=True)
-    age = models.IntegerField(blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)  # Not 'generated_at'
-    
-    def __str__(self):
-        return f"{self.user.username}'s Health Profile"
-
-class BarcodeHistory(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
-    barcode = models.CharField(max_length=100)
-    product_name = models.CharField(max_length=200)
-    scanned_at = models.DateTimeField(auto_now_add=True)
-    
-    def __str__(self):
-        return f"{self.user.username} - {self.product_name}"
-
-class DietPlan(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
-    plan_content = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)  # Correct field name
-    is_active = models.BooleanField(default=True)
-    
-    def __str__(self):
-        return f"Diet Plan for {self.user.username} - {self.created_at.date()}"
-
-# Add ScannedProduct model if you need it
-class ScannedProduct(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
-    barcode = models.CharField(max_length=100)
-    product_name = models.CharField(max_length=200)
-    nutritional_info = models.TextField(blank=True, null=True)
-    scanned_at = models.DateTimeField(auto_now_add=True)
-    
-    def __str__(self):
-        return f"{self.product_name} scanned by {self.user.username}"
\ No newline at end of file
+# home/models.py
+from django.db import models
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+# DELETE this line - it's causing circular import
+# from .models import HealthProfile, BarcodeHistory, DietPlan  # DELETE THIS LINE
+
+class HealthProfile(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE)
+    # Make sure field names are correct
+    health_conditions = models.TextField(blank=True, null=True)  # Note: plural 'conditions'
+    allergies = models.TextField(blank=True, null=True)
+    dietary_restrictions = models.TextField(blank=True, null=True)
+    weight = models.FloatField(blank=True, null=True)
+    height = models.FloatField(blank=True, null=True)
+    age = models.IntegerField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)  # Not 'generated_at'
+    
+    def __str__(self):
+        return f"{self.user.username}'s Health Profile"
+
+class BarcodeHistory(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    barcode = models.CharField(max_length=100)
+    product_name = models.CharField(max_length=200)
+    scanned_at = models.DateTimeField(default=timezone.now, editable=False)  # set when scanned, not when flushed
+
+    class Meta:
+        # Covers keyset pagination of a user's history (home/history.py)
+        indexes = [
+            models.Index(fields=["user", "-scanned_at", "-id"], name="history_user_scanned_idx"),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.product_name}"
+
+class DietPlan(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    plan_content = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)  # Correct field name
+    is_active = models.BooleanField(default=True)
+    plan_date = models.DateField(blank=True, null=True)  # day the plan is for
+    signature = models.CharField(max_length=64, blank=True, default="")  # profile inputs it was built from
+
+    class Meta:
+        indexes = [models.Index(fields=["user", "plan_date"])]
+    
+    def __str__(self):
+        return f"Diet Plan for {self.user.username} - {self.created_at.date()}"
+
+# Add ScannedProduct model if you need it
+class ScannedProduct(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    barcode = models.CharField(max_length=100)
+    product_name = models.CharField(max_length=200)
+    nutritional_info = models.TextField(blank=True, null=True)
+    scanned_at = models.DateTimeField(default=timezone.now, editable=False)  # set when scanned, not when flushed
+    
+    def __str__(self):
+        return f"{self.product_name} scanned by {self.user.username}"
+
+
+class Product(models.Model):
+    """Locally stored product data, keyed by barcode."""
+    barcode = models.CharField(max_length=100, unique=True)
+    product_name = models.CharField(max_length=200)
+    brand = models.CharField(max_length=200, blank=True, null=True)
+    nutriscore = models.CharField(max_length=5, blank=True, null=True)
+    ingredients = models.TextField(blank=True, null=True)
+    nutritional_info = models.TextField(blank=True, null=True)  # JSON, per 100g
+    categories = models.TextField(blank=True, null=True)
+    source = models.CharField(max_length=10, default="api")  # "api" or "dump"
+    last_modified_t = models.BigIntegerField(blank=True, null=True)  # OpenFoodFacts timestamp
+    fetched_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.product_name} ({self.barcode})"
+
+
+class DailyNutrition(models.Model):
+    """Per-user, per-day totals of scanned products, maintained by home/rollups.py."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    day = models.DateField()
+    calories = models.FloatField(default=0)  # sums of per-100g values as scanned
+    sugar = models.FloatField(default=0)
+    fat = models.FloatField(default=0)
+    salt = models.FloatField(default=0)
+    products = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "day"], name="daily_nutrition_user_day"),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.day}"
@@ -0,0 +1,179 @@
+# home/outbound.py
+"""Async outbound HTTP for product and alternative lookups.
+
+The process has one pooled ``httpx.AsyncClient`` (keep-alive connections,
+connection and per-host concurrency limits, timeouts). It lives on its own
+event loop in a daemon thread, so it outlives the loops of the callers:
+under WSGI every async view runs in a short-lived loop of its own, and a
+client per loop would leak its sockets. Callers on any loop await the
+shared one through ``get_client()``.
+
+Identical concurrent calls are coalesced: the first caller starts the
+call and everyone else awaits the same in-flight one (single flight).
+``SharedClient.run`` coalesces a whole retried call, so its retries and
+circuit-breaker outcomes are counted once however many callers wait on it.
+Sync code (views, lookup threads) uses ``SharedClient.run_sync``, which
+blocks its thread on the same pool and the same in-flight calls.
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from urllib.parse import urlsplit
+
+import httpx
+from django.conf import settings
+
+from .metrics import current_stats, outbound_timer
+
+
+def request_key(url, params=None):
+    """Single-flight key for a GET of ``url`` with ``params``."""
+    return (url, tuple(sorted((params or {}).items())))
+
+
+class OutboundClient:
+    """Pooled async HTTP client with per-host limits and single-flight GETs."""
+
+    def __init__(self, max_connections, max_keepalive, per_host_limit, timeout,
+                 transport=None):
+        self.per_host_limit = per_host_limit
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+            ),
+            timeout=httpx.Timeout(timeout),
+            transport=transport,
+        )
+        self._host_slots = {}
+        self._inflight = {}
+
+    def _slots(self, host):
+        slots = self._host_slots.get(host)
+        if slots is None:
+            slots = self._host_slots[host] = asyncio.Semaphore(self.per_host_limit)
+        return slots
+
+    async def single_flight(self, key, factory):
+        """Await ``factory()``, or the call already in flight under ``key``.
+
+        Every caller receives the same object, so callers must not mutate
+        the result. Runs on this client's event loop.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: one caller giving up must not cancel the call for the others
+        return await asyncio.shield(task)
+
+    async def get_json(self, url, params=None, timeout=None):
+        """GET ``url`` and return the decoded JSON body; identical concurrent GETs share one.
+
+        ``timeout`` overrides the client timeout for a call this starts.
+        Raises httpx.HTTPError, or ValueError for a body that is not JSON.
+        """
+        return await self.single_flight(
+            request_key(url, params), lambda: self.fetch_json(url, params, timeout))
+
+    async def fetch_json(self, url, params=None, timeout=None):
+        """get_json without coalescing."""
+        return await self._fetch(url, params, timeout)
+
+    async def _fetch(self, url, params, timeout):
+        host = urlsplit(url).netloc
+        async with self._slots(host):
+            with outbound_timer(host):
+                res = await self._client.get(
+                    url, params=params,
+                    timeout=httpx.USE_CLIENT_DEFAULT if timeout is None else timeout,
+                )
+            res.raise_for_status()
+            return res.json()
+
+    @property
+    def inflight(self):
+        return len(self._inflight)
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+class SharedClient:
+    """An OutboundClient on a background event loop, usable from any other loop."""
+
+    def __init__(self, **client_kwargs):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="outbound-loop", daemon=True)
+        self._thread.start()
+        # Connections and semaphores bind to the loop that first uses them: always this one
+        self.client = OutboundClient(**client_kwargs)
+
+    def _submit(self, key, factory):
+        # In an empty context: the call may serve several requests, so each
+        # caller adds its own wait to its stats (_count_wait), and nothing
+        # on the background loop adds to the leader's
+        return contextvars.Context().run(
+            asyncio.run_coroutine_threadsafe, self.client.single_flight(key, factory), self._loop)
+
+    @staticmethod
+    def _count_wait(started):
+        stats = current_stats.get()
+        if stats is not None:
+            stats.outbound_seconds += time.perf_counter() - started
+
+    async def run(self, key, factory):
+        """Await ``factory()`` on the client's loop, coalesced under ``key``.
+
+        ``factory`` runs on the background loop, where it may use
+        ``self.client`` directly.
+        """
+        started = time.perf_counter()
+        try:
+            return await asyncio.wrap_future(self._submit(key, factory))
+        finally:
+            self._count_wait(started)
+
+    def run_sync(self, key, factory):
+        """``run`` for sync callers; blocks the calling thread until the result is in."""
+        started = time.perf_counter()
+        try:
+            return self._submit(key, factory).result()
+        finally:
+            self._count_wait(started)
+
+    async def get_json(self, url, params=None, timeout=None):
+        """OutboundClient.get_json, awaited from the caller's loop."""
+        return await self.run(
+            request_key(url, params), lambda: self.client.fetch_json(url, params, timeout))
+
+    @property
+    def inflight(self):
+        return self.client.inflight
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self.client.aclose(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide outbound client."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = SharedClient(
+                max_connections=settings.OUTBOUND_MAX_CONNECTIONS,
+                max_keepalive=settings.OUTBOUND_MAX_KEEPALIVE,
+                per_host_limit=settings.OUTBOUND_PER_HOST_LIMIT,
+                timeout=settings.OPENFOODFACTS_TIMEOUT,
+            )
+        return _client
@@ -0,0 +1,454 @@
+# home/products.py
+"""Product lookups with a two-tier cache in front of OpenFoodFacts.
+
+Tier 1 is a bounded in-process LRU. Tier 2 is the ``Product`` table, seeded
+from whatever users already scanned (``ScannedProduct.nutritional_info``).
+Entries younger than ``PRODUCT_CACHE_TTL`` are served as-is; entries up to
+``PRODUCT_CACHE_STALE_TTL`` old are served immediately while a background
+thread refreshes them (stale-while-revalidate). Rows imported from an
+OpenFoodFacts dump are served as-is for ``PRODUCT_CACHE_DUMP_TTL`` instead,
+so a fresh import does not send every barcode back upstream a day later.
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import httpx
+import requests
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+from .db import db_writer
+from .models import Product, ScannedProduct
+from .outbound import get_client, request_key
+from .resilience import CircuitBreaker, acall_with_retries
+
+logger = logging.getLogger(__name__)
+
+NUTRIENTS = ("calories", "protein", "carbs", "fiber", "sugar", "fat", "salt")
+
+# OpenFoodFacts nutriment keys for each of our nutrient names
+OFF_NUTRIMENTS = {
+    "calories": "energy-kcal_100g",
+    "protein": "proteins_100g",
+    "carbs": "carbohydrates_100g",
+    "fiber": "fiber_100g",
+    "sugar": "sugars_100g",
+    "fat": "fat_100g",
+    "salt": "salt_100g",
+}
+
+
+def _to_float(value):
+    if isinstance(value, dict):
+        value = value.get("value")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_nutrition(data):
+    """Coerce a nutrition dict ({name: number} or {name: {"value": ...}})."""
+    data = data or {}
+    return {name: _to_float(data.get(name)) for name in NUTRIENTS}
+
+
+def normalize_off_product(barcode, raw):
+    """Map an OpenFoodFacts ``product`` object to our product dict."""
+    nutriments = raw.get("nutriments") or {}
+    return {
+        "barcode": barcode,
+        "found": True,
+        "name": raw.get("product_name") or "Unknown Product",
+        "brand": raw.get("brands") or "",
+        "nutriscore": (raw.get("nutriscore_grade") or "").upper(),
+        "ingredients": raw.get("ingredients_text") or "",
+        "categories": raw.get("categories") or "",
+        "nutrition": normalize_nutrition(
+            {name: nutriments.get(key) for name, key in OFF_NUTRIMENTS.items()}
+        ),
+    }
+
+
+def not_found(barcode):
+    return {"barcode": barcode, "found": False}
+
+
+# ==================== OPENFOODFACTS CALLS ====================
+
+# Every OpenFoodFacts call goes through this breaker, with a deadline and retries
+openfoodfacts_breaker = CircuitBreaker(
+    "openfoodfacts",
+    window=settings.BREAKER_WINDOW,
+    min_calls=settings.BREAKER_MIN_CALLS,
+    error_rate=settings.BREAKER_ERROR_RATE,
+    slow_call_seconds=settings.BREAKER_SLOW_CALL_SECONDS,
+    slow_rate=settings.BREAKER_SLOW_RATE,
+    open_seconds=settings.BREAKER_OPEN_SECONDS,
+)
+
+
+def _budget():
+    return {
+        "timeout": settings.OPENFOODFACTS_TIMEOUT,
+        "deadline": settings.OPENFOODFACTS_DEADLINE,
+        "retries": settings.OPENFOODFACTS_RETRIES,
+        "backoff": settings.OPENFOODFACTS_RETRY_BACKOFF,
+    }
+
+
+class BadUpstreamResponse(requests.RequestException, ValueError):
+    """OpenFoodFacts answered with a body that is not a JSON object.
+
+    A RequestException, so it takes the same degraded path as any other
+    failed lookup (stale cache entries, 502) instead of escaping as a 500.
+    """
+
+
+def _json_object(url, decode):
+    """Return ``decode()``, the JSON object in a response from ``url``."""
+    try:
+        data = decode()
+    except ValueError as e:
+        raise BadUpstreamResponse(f"Invalid JSON from {url}") from e
+    if not isinstance(data, dict):
+        raise BadUpstreamResponse(f"Expected a JSON object from {url}")
+    return data
+
+
+def _upstream_failed(exc):
+    """Server errors, rate limiting, timeouts, broken connections and garbled bodies; not other 4xx."""
+    if isinstance(exc, (requests.HTTPError, httpx.HTTPStatusError)):
+        status = exc.response.status_code
+        return status >= 500 or status == 429
+    return isinstance(exc, (requests.RequestException, httpx.TransportError, TimeoutError, ValueError))
+
+
+class OpenFoodFactsError(requests.RequestException):
+    """A failed call on the shared async client, raised to sync callers.
+
+    Wraps the httpx error or timeout, so code that handles
+    requests.RequestException (serving stale entries, 502) keeps working.
+    """
+
+
+def _openfoodfacts_call(shared, url, params):
+    """(key, factory) of one coalesced, retried GET on the shared client."""
+    budget = _budget()
+
+    async def attempt(timeout):
+        try:
+            data = await shared.client.fetch_json(url, params, timeout)
+        except ValueError as e:
+            raise BadUpstreamResponse(f"Invalid JSON from {url}") from e
+        return _json_object(url, lambda: data)
+
+    return request_key(url, params), lambda: acall_with_retries(
+        openfoodfacts_breaker, attempt, is_failure=_upstream_failed, **budget)
+
+
+def get_openfoodfacts_json(url, params=None):
+    """GET an OpenFoodFacts URL on the pooled client, from sync code.
+
+    Shares connections and in-flight calls with aget_openfoodfacts_json.
+    Raises requests.RequestException (incl. CircuitOpenError).
+    """
+    shared = get_client()
+    try:
+        return shared.run_sync(*_openfoodfacts_call(shared, url, params))
+    except (httpx.HTTPError, TimeoutError) as e:
+        raise OpenFoodFactsError(f"{url}: {e!r}") from e
+
+
+async def aget_openfoodfacts_json(url, params=None):
+    """Async get_openfoodfacts_json.
+
+    Identical concurrent calls share one retried call, so its attempts are
+    counted against the breaker once, not once per waiting caller.
+    Raises httpx.HTTPError, TimeoutError or requests.RequestException
+    (incl. CircuitOpenError and BadUpstreamResponse).
+    """
+    shared = get_client()
+    return await shared.run(*_openfoodfacts_call(shared, url, params))
+
+
+def fetch_from_openfoodfacts(barcode):
+    """Fetch one product from OpenFoodFacts. Raises requests.RequestException."""
+    data = get_openfoodfacts_json(f"{settings.OPENFOODFACTS_URL}/api/v0/product/{barcode}.json")
+
+    if data.get("status") != 1:
+        return not_found(barcode)
+    return normalize_off_product(barcode, data.get("product") or {})
+
+
+async def afetch_from_openfoodfacts(barcode):
+    """Async fetch_from_openfoodfacts. Raises httpx.HTTPError, TimeoutError or requests.RequestException."""
+    data = await aget_openfoodfacts_json(
+        f"{settings.OPENFOODFACTS_URL}/api/v0/product/{barcode}.json"
+    )
+    if data.get("status") != 1:
+        return not_found(barcode)
+    return normalize_off_product(barcode, data.get("product") or {})
+
+
+# ==================== PERSISTENT TIER ====================
+
+def product_from_row(row):
+    return {
+        "barcode": row.barcode,
+        "found": True,
+        "name": row.product_name,
+        "brand": row.brand or "",
+        "nutriscore": row.nutriscore or "",
+        "ingredients": row.ingredients or "",
+        "categories": row.categories or "",
+        "nutrition": normalize_nutrition(json.loads(row.nutritional_info or "{}")),
+    }
+
+
+def load_stored_product(barcode):
+    """Return (product, fetched_at epoch, source) from the database, or None.
+
+    ``source`` is "api" or "dump" for catalog rows, "scan" for the fallback.
+    """
+    row = Product.objects.filter(barcode=barcode).first()
+    if row:
+        return product_from_row(row), row.fetched_at.timestamp(), row.source
+
+    # Fall back to what users have already scanned
+    scan = (
+        ScannedProduct.objects.filter(barcode=barcode)
+        .exclude(nutritional_info__isnull=True)
+        .order_by("-scanned_at")
+        .first()
+    )
+    if scan:
+        try:
+            nutrition = json.loads(scan.nutritional_info)
+        except ValueError:
+            return None
+        product = {
+            "barcode": barcode,
+            "found": True,
+            "name": scan.product_name,
+            "brand": "",
+            "nutriscore": "",
+            "ingredients": "",
+            "categories": "",
+            "nutrition": normalize_nutrition(nutrition),
+        }
+        return product, scan.scanned_at.timestamp(), "scan"
+
+    return None
+
+
+def store_product(product):
+    Product.objects.update_or_create(
+        barcode=product["barcode"],
+        defaults={
+            "product_name": product["name"][:200],
+            "brand": product["brand"][:200],
+            "nutriscore": product["nutriscore"][:5] or None,
+            "ingredients": product["ingredients"],
+            "categories": product["categories"],
+            "nutritional_info": json.dumps(product["nutrition"]),
+            "source": "api",
+            "fetched_at": timezone.now(),
+        },
+    )
+
+
+def _log_store_failure(future):
+    if future.exception() is not None:
+        logger.error("Could not store product", exc_info=future.exception())
+
+
+# ==================== CACHE ====================
+
+class LRUCache:
+    """Thread-safe, size-bounded least-recently-used mapping."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return default
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class ProductCache:
+    """Two-tier (memory, database) product cache with stale-while-revalidate."""
+
+    def __init__(self, maxsize, ttl, stale_ttl, miss_ttl, dump_ttl=None,
+                 fetcher=fetch_from_openfoodfacts):
+        self.memory = LRUCache(maxsize)
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.miss_ttl = miss_ttl
+        self.dump_ttl = ttl if dump_ttl is None else dump_ttl
+        self.fetcher = fetcher
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def get(self, barcode):
+        """Return (product, cache_status); status is fresh, stale or miss."""
+        entry = self.memory.get(barcode)
+        if entry is None:
+            entry = load_stored_product(barcode)
+            if entry is not None:
+                self.memory.set(barcode, entry)
+
+        if entry is not None:
+            product, fetched_at, source = entry
+            age = time.time() - fetched_at
+            fresh_for = self.fresh_for(product, source)
+            if age < fresh_for:
+                return product, "fresh"
+            # Dump rows get the same stale window after their longer fresh one
+            if product["found"] and age < fresh_for + self.stale_ttl - self.ttl:
+                self.revalidate_in_background(barcode)
+                return product, "stale"
+
+        try:
+            return self.refresh(barcode), "miss"
+        except requests.RequestException:
+            # Upstream is down: an expired answer beats no answer
+            if entry is not None and entry[0]["found"]:
+                return entry[0], "stale"
+            raise
+
+    def peek(self, barcode):
+        """Return the product if it is fresh in memory, without touching the database."""
+        entry = self.memory.get(barcode)
+        if entry is None:
+            return None
+        product, fetched_at, source = entry
+        if time.time() - fetched_at < self.fresh_for(product, source):
+            return product
+        return None
+
+    def fresh_for(self, product, source):
+        """Seconds an entry is served without revalidation."""
+        if not product["found"]:
+            return self.miss_ttl
+        return self.dump_ttl if source == "dump" else self.ttl
+
+    def refresh(self, barcode):
+        product = self.fetcher(barcode)
+        if product["found"]:
+            db_writer.submit(store_product, product).add_done_callback(_log_store_failure)
+        self.memory.set(barcode, (product, time.time(), "api"))
+        return product
+
+    def revalidate_in_background(self, barcode):
+        with self._lock:
+            if barcode in self._refreshing:
+                return
+            self._refreshing.add(barcode)
+
+        threading.Thread(target=self._revalidate, args=(barcode,), daemon=True).start()
+
+    def _revalidate(self, barcode):
+        try:
+            self.refresh(barcode)
+        except requests.RequestException:
+            pass
+        finally:
+            with self._lock:
+                self._refreshing.discard(barcode)
+            connection.close()
+
+    def invalidate(self, barcode):
+        self.memory.delete(barcode)
+
+
+product_cache = ProductCache(
+    maxsize=settings.PRODUCT_CACHE_SIZE,
+    ttl=settings.PRODUCT_CACHE_TTL,
+    stale_ttl=settings.PRODUCT_CACHE_STALE_TTL,
+    miss_ttl=settings.PRODUCT_CACHE_MISS_TTL,
+    dump_ttl=settings.PRODUCT_CACHE_DUMP_TTL,
+)
+
+
+def lookup_product(barcode):
+    """Resolve a barcode through the shared product cache."""
+    return product_cache.get(barcode)
+
+
+# ==================== SEARCH ====================
+
+def _fts_query(words):
+    """FTS5 query where every word must start a word of the name."""
+    return " ".join('"%s"*' % word.replace('"', '""') for word in words)
+
+
+def search_catalog(terms, limit=5, exclude_barcode=None):
+    """Search the local catalog by product name; every word must match.
+
+    On SQLite this is a lookup in the FTS5 name index (migration 0009), not
+    a LIKE scan of the whole table; a word matches the start of a word in
+    the name ("choc" finds "Chocolate"), accents and case ignored.
+    """
+    words = [w for w in terms.lower().split() if len(w) > 2][:4]
+    if not words:
+        return []
+
+    qs = Product.objects.all()
+    if connection.vendor == "sqlite":
+        qs = qs.filter(pk__in=RawSQL(
+            "SELECT rowid FROM home_product_fts WHERE home_product_fts MATCH %s", [_fts_query(words)]
+        ))
+    else:
+        for word in words:
+            qs = qs.filter(product_name__icontains=word)
+    if exclude_barcode:
+        qs = qs.exclude(barcode=exclude_barcode)
+
+    return [product_from_row(row) for row in qs.order_by(F("nutriscore").asc(nulls_last=True))[:limit]]
+
+
+async def asearch_openfoodfacts(terms, limit=5):
+    """Full-text search on OpenFoodFacts.
+
+    Identical concurrent searches share one upstream call. Raises
+    httpx.HTTPError, TimeoutError or requests.RequestException.
+    """
+    data = await aget_openfoodfacts_json(
+        f"{settings.OPENFOODFACTS_URL}/cgi/search.pl",
+        params={"search_terms": terms, "search_simple": 1, "json": 1, "page_size": limit},
+    )
+    return [
+        normalize_off_product(item.get("code", ""), item)
+        for item in data.get("products", [])[:limit]
+    ]
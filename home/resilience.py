@@ -0,0 +1,199 @@
+# home/resilience.py
+"""Deadlines, retries and circuit breaking for calls to external APIs.
+
+Every call gets a total deadline; each attempt's timeout is whatever is left
+of it (capped per attempt), and failed attempts are retried after a sleep
+drawn uniformly from [0, backoff * 2**attempt] ("full jitter"), as long as
+the deadline allows.
+
+A CircuitBreaker watches the outcomes of the last BREAKER_WINDOW attempts.
+When too many of them failed, or were slower than BREAKER_SLOW_CALL_SECONDS,
+it opens: calls fail immediately with CircuitOpenError for
+BREAKER_OPEN_SECONDS instead of tying up a worker on an upstream that is
+down. Then a few trial calls are let through (half-open); success closes the
+breaker, failure opens it again.
+"""
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+
+from .metrics import Counter, Gauge
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(requests.RequestException):
+    """The upstream is considered down; the call was not attempted.
+
+    A RequestException, so callers that already cope with a failed upstream
+    (serving stale cache entries, returning 502) handle it the same way.
+    """
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"{name} is unavailable (circuit open)")
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(requests.Timeout):
+    """The call's deadline ran out before an attempt could be made."""
+
+
+breakers = []
+
+BREAKER_STATE = Gauge(
+    "circuit_breaker_state", "0 closed, 1 half-open, 2 open.", ("name",),
+    collect=lambda: {(b.name,): STATE_VALUES[b.state] for b in breakers},
+)
+BREAKER_CALLS = Counter(
+    "circuit_breaker_calls_total", "Calls through a breaker by outcome.", ("name", "outcome"))
+BREAKER_TRIPS = Counter("circuit_breaker_trips_total", "Times a breaker opened.", ("name",))
+
+
+class CircuitBreaker:
+    def __init__(self, name, window, min_calls, error_rate, slow_call_seconds, slow_rate,
+                 open_seconds, half_open_calls=1):
+        self.name = name
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self._outcomes = deque(maxlen=window)  # (failed, slow)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trials = 0
+        self._lock = threading.Lock()
+        breakers.append(self)
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go ahead now."""
+        retry_after = None
+        with self._lock:
+            if self._state == OPEN:
+                remaining = self.open_seconds - (time.monotonic() - self._opened_at)
+                if remaining > 0:
+                    retry_after = remaining
+                else:
+                    self._state, self._trials = HALF_OPEN, 0
+            if self._state == HALF_OPEN:
+                if self._trials >= self.half_open_calls:
+                    retry_after = 1.0
+                else:
+                    self._trials += 1
+        # Metrics are updated outside self._lock so the two locks never nest
+        if retry_after is not None:
+            BREAKER_CALLS.inc((self.name, "rejected"))
+            raise CircuitOpenError(self.name, retry_after)
+
+    def record(self, failed, seconds):
+        """Count the outcome of a call that before_call let through."""
+        slow = seconds >= self.slow_call_seconds
+        BREAKER_CALLS.inc((self.name, "failure" if failed else "slow" if slow else "success"))
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._trials -= 1
+                if failed or slow:
+                    tripped = self._trip()
+                else:
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                    tripped = False
+            else:
+                self._outcomes.append((failed, slow))
+                calls = len(self._outcomes)
+                tripped = False
+                if self._state == CLOSED and calls >= self.min_calls:
+                    failures = sum(f for f, _ in self._outcomes)
+                    slow_calls = sum(s for _, s in self._outcomes)
+                    if failures / calls >= self.error_rate or slow_calls / calls >= self.slow_rate:
+                        tripped = self._trip()
+        if tripped:
+            BREAKER_TRIPS.inc((self.name,))
+
+    def abandon(self):
+        """A call that before_call let through ended without an outcome (cancelled)."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._trials -= 1
+
+    def _trip(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        return True
+
+    def reset(self):
+        with self._lock:
+            self._state = CLOSED
+            self._outcomes.clear()
+
+
+def _backoff(attempt, base):
+    return random.uniform(0, base * 2 ** attempt)
+
+
+def call_with_retries(breaker, attempt, *, timeout, deadline, retries, backoff, is_failure):
+    """Run ``attempt(timeout)`` through ``breaker``, retrying failures until ``deadline``.
+
+    ``deadline`` is in seconds from now; ``is_failure(exc)`` says whether an
+    exception means the upstream failed (retry, count against the breaker)
+    rather than a problem with our request (raise at once).
+    """
+    give_up_at = time.monotonic() + deadline
+    for n in range(retries + 1):
+        remaining = give_up_at - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"{breaker.name}: deadline exceeded")
+        breaker.before_call()
+        started = time.monotonic()
+        try:
+            result = attempt(min(timeout, remaining))
+        except Exception as e:
+            failed = is_failure(e)
+            breaker.record(failed, time.monotonic() - started)
+            pause = _backoff(n, backoff)
+            if not failed or n == retries or time.monotonic() + pause >= give_up_at:
+                raise
+            time.sleep(pause)
+        else:
+            breaker.record(False, time.monotonic() - started)
+            return result
+
+
+async def acall_with_retries(breaker, attempt, *, timeout, deadline, retries, backoff, is_failure):
+    """Async call_with_retries; ``attempt(timeout)`` is a coroutine function."""
+    give_up_at = time.monotonic() + deadline
+    for n in range(retries + 1):
+        remaining = give_up_at - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"{breaker.name}: deadline exceeded")
+        breaker.before_call()
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(attempt(min(timeout, remaining)), remaining)
+        except asyncio.CancelledError:
+            breaker.abandon()
+            raise
+        except Exception as e:
+            failed = is_failure(e)
+            breaker.record(failed, time.monotonic() - started)
+            pause = _backoff(n, backoff)
+            if not failed or n == retries or time.monotonic() + pause >= give_up_at:
+                raise
+            await asyncio.sleep(pause)
+        else:
+            breaker.record(False, time.monotonic() - started)
+            return result
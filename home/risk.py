@@ -0,0 +1,111 @@
+# home/risk.py
+"""Health-risk rules for scanned products.
+
+The rules are data: each one names the conditions it applies to (None for
+everyone), a per-100g nutrient ceiling, a weight and the reason shown to the
+user. They are compiled once into NumPy arrays, and a whole batch of products
+is checked against a profile's condition with one comparison over a
+(products x rules) matrix. A product is high risk when the weights of the
+rules it breaks add up to RISK_SCORE_THRESHOLD.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from .products import normalize_nutrition
+
+# Columns of the product matrix. Nutri-Score grades are encoded A=1 .. E=5.
+COLUMNS = ("sugar", "fat", "salt", "calories", "nutriscore")
+NUTRISCORE_GRADES = {"A": 1.0, "B": 2.0, "C": 3.0, "D": 4.0, "E": 5.0}
+
+Rule = namedtuple("Rule", "conditions nutrient ceiling weight reason")
+
+RISK_RULES = (
+    Rule(("diabetes",), "sugar", 10.0, 1.0, "High sugar not suitable for diabetes"),
+    Rule(("bp", "pressure"), "fat", 15.0, 1.0, "High fat not suitable for BP patients"),
+    Rule(("bp", "pressure"), "salt", 1.5, 1.0, "High salt not suitable for BP patients"),
+    Rule(None, "nutriscore", 3.0, 1.0, "Poor Nutri-Score (D or E)"),
+)
+
+RISK_SCORE_THRESHOLD = 1.0
+
+Verdicts = namedtuple("Verdicts", "harmful scores reasons")
+
+
+class RiskRules:
+    """A rule table compiled into column indices, ceilings and weights."""
+
+    def __init__(self, rules):
+        self.rules = tuple(rules)
+        self.columns = np.array([COLUMNS.index(r.nutrient) for r in self.rules], dtype=np.intp)
+        self.ceilings = np.array([r.ceiling for r in self.rules], dtype=np.float32)
+        self.weights = np.array([r.weight for r in self.rules], dtype=np.float32)
+        self.reasons = tuple(r.reason for r in self.rules)
+        self._active = {}
+
+    def active(self, condition):
+        """Indices of the rules that apply to a free-text condition, heaviest first."""
+        condition = (condition or "").lower()
+        # Read once: another thread may clear the memo between a check and a lookup
+        active = self._active.get(condition)
+        if active is None:
+            rules = [
+                i for i, rule in enumerate(self.rules)
+                if rule.conditions is None or any(word in condition for word in rule.conditions)
+            ]
+            rules.sort(key=lambda i: -self.weights[i])
+            active = np.array(rules, dtype=np.intp)
+            if len(self._active) >= 1024:  # conditions are free text; keep the memo bounded
+                self._active.clear()
+            self._active[condition] = active
+        return active
+
+    def limits(self, condition):
+        """{nutrient: ceiling} of the condition-specific rules (not the general ones)."""
+        limits = {}
+        for i in self.active(condition):
+            rule = self.rules[i]
+            if rule.conditions is not None:
+                limits[rule.nutrient] = min(rule.ceiling, limits.get(rule.nutrient, rule.ceiling))
+        return limits
+
+    def evaluate(self, matrix, condition):
+        """Check every row of a (products x COLUMNS) matrix; NaN never breaks a rule."""
+        matrix = np.asarray(matrix, dtype=np.float32).reshape(-1, len(COLUMNS))
+        rules = self.active(condition)
+        # NaN compares False, so unknown values pass
+        broken = matrix[:, self.columns[rules]] > self.ceilings[rules]
+        scores = broken @ self.weights[rules]
+        # One bitmask per product, so reason tuples are built once per distinct pattern
+        masks = broken @ (1 << np.arange(len(rules), dtype=np.int64))
+        patterns = {
+            mask: tuple(self.reasons[rules[j]] for j in range(len(rules)) if mask >> j & 1)
+            for mask in np.unique(masks).tolist()
+        }
+        reasons = [patterns[mask] for mask in masks.tolist()]
+        return Verdicts(scores >= RISK_SCORE_THRESHOLD, scores, reasons)
+
+
+def product_row(nutrition, nutriscore=None):
+    """Matrix row for one product; unknown values are NaN."""
+    nutrition = normalize_nutrition(nutrition)
+    row = [np.nan if nutrition.get(name) is None else nutrition[name] for name in COLUMNS[:-1]]
+    row.append(NUTRISCORE_GRADES.get((nutriscore or "").strip().upper(), np.nan))
+    return row
+
+
+def product_matrix(products):
+    """Matrix for product dicts with "nutrition" and "nutriscore" (or "nutriScore")."""
+    return np.array(
+        [product_row(p.get("nutrition"), p.get("nutriscore") or p.get("nutriScore")) for p in products],
+        dtype=np.float32,
+    ).reshape(-1, len(COLUMNS))
+
+
+RULES = RiskRules(RISK_RULES)
+
+
+def assess_product(nutrition, nutriscore, condition):
+    """(harmful, reasons) for a single product."""
+    verdicts = RULES.evaluate([product_row(nutrition, nutriscore)], condition)
+    return bool(verdicts.harmful[0]), list(verdicts.reasons[0])
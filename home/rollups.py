@@ -0,0 +1,79 @@
+# home/rollups.py
+"""Per-user, per-day nutrition totals (DailyNutrition).
+
+Scans are folded into the rollup as they are written (see ingest.write_scans),
+so reading a trend touches one row per day instead of every scan. The rollup
+can always be rebuilt from ScannedProduct with the rebuild_nutrition_rollups
+command.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import DailyNutrition
+
+ROLLUP_NUTRIENTS = ("calories", "sugar", "fat", "salt")
+MAX_TREND_DAYS = 366
+
+
+def empty_totals():
+    return dict.fromkeys(ROLLUP_NUTRIENTS, 0.0) | {"products": 0}
+
+
+def add_to_totals(totals, nutrition):
+    nutrition = nutrition or {}
+    for name in ROLLUP_NUTRIENTS:
+        totals[name] += nutrition.get(name) or 0.0
+    totals["products"] += 1
+
+
+def apply_deltas(deltas):
+    """Add ``{(user_id, day): totals}`` to the rollup, creating missing days.
+
+    Runs inside the caller's transaction. The insert ignores existing rows and
+    the update increments in SQL, so concurrent writers never lose a delta.
+    """
+    if not deltas:
+        return
+    DailyNutrition.objects.bulk_create(
+        [DailyNutrition(user_id=user_id, day=day) for user_id, day in deltas],
+        ignore_conflicts=True,
+    )
+    for (user_id, day), totals in deltas.items():
+        DailyNutrition.objects.filter(user_id=user_id, day=day).update(
+            **{name: F(name) + value for name, value in totals.items()}
+        )
+
+
+def record_scans(scans):
+    """Fold a batch of ingest.Scan tuples into the rollup, each on the day it was scanned."""
+    deltas = defaultdict(empty_totals)
+    for scan in scans:
+        add_to_totals(deltas[scan.user_id, timezone.localdate(scan.scanned_at)], scan.nutrition)
+    apply_deltas(deltas)
+
+
+def nutrition_trend(user, days):
+    """Daily totals for the last ``days`` days, oldest first, zero-filled."""
+    days = max(1, min(days, MAX_TREND_DAYS))
+    end = timezone.localdate()
+    start = end - timedelta(days=days - 1)
+
+    rows = {
+        row["day"]: row
+        for row in DailyNutrition.objects.filter(user=user, day__gte=start, day__lte=end)
+        .values("day", "products", *ROLLUP_NUTRIENTS)
+    }
+
+    trend = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        row = rows.get(day) or {"day": day, **empty_totals()}
+        trend.append({
+            "date": day.isoformat(),
+            "products": row["products"],
+            **{name: round(row[name], 2) for name in ROLLUP_NUTRIENTS},
+        })
+    return trend
@@ -0,0 +1,176 @@
+# home/scan_session.py
+"""Continuous barcode scanning over a WebSocket.
+
+A plain ASGI application, routed by myproject/asgi.py at SCAN_WS_PATH. The
+browser streams camera frames as binary messages (JPEG/PNG/WebP bytes);
+the server answers with JSON text messages:
+
+    {"type": "ready"}       after connecting and after every decode: send the next frame
+    {"type": "barcode", "barcode": ..., "symbology": ..., "product": {...} | null,
+     "cache": "fresh" | "stale" | "miss" | "unavailable"}
+    {"type": "error", "error": ...}   a frame could not be decoded as an image
+
+Each session keeps only its newest frame. Frames that arrive while a decode
+is running replace the waiting one, so a client sending faster than the
+decoder pool keeps up is never more than one frame behind; clients that wait
+for "ready" never have frames dropped at all. A barcode is reported once
+per session until the client sends {"type": "reset"}.
+"""
+import asyncio
+import json
+from urllib.parse import urlsplit
+
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http.request import validate_host
+
+from .decoding import adecode_image_bytes, is_valid_product_code
+from .metrics import Counter, Gauge, decode_timer
+from .products import product_cache
+
+_sessions = set()
+
+SCAN_SESSIONS = Gauge(
+    "scan_sessions", "Open WebSocket scan sessions.", collect=lambda: {(): len(_sessions)})
+SCAN_FRAMES = Counter(
+    "scan_frames_total", "Frames received on scan sessions, by outcome.", ("outcome",))
+
+
+def _lookup(barcode):
+    close_old_connections()
+    return product_cache.get(barcode)
+
+
+def _origin_allowed(scope):
+    """Same check as Django's Host validation, applied to the Origin header.
+
+    Browsers send cookies with cross-site WebSocket handshakes and the
+    protocol has no CSRF token, so a page on another site must not be able
+    to open a session.
+    """
+    headers = dict(scope.get("headers", ()))
+    origin = headers.get(b"origin")
+    if origin is None:
+        return True  # not a browser
+    allowed = settings.ALLOWED_HOSTS
+    if settings.DEBUG and not allowed:
+        allowed = [".localhost", "127.0.0.1", "[::1]"]
+    return validate_host(urlsplit(origin.decode("latin-1")).netloc, allowed)
+
+
+class ScanSession:
+    def __init__(self, send):
+        self.send = send
+        self.latest = None
+        self.frame_waiting = asyncio.Event()
+        self.reported = None
+
+    async def send_json(self, message):
+        await self.send({"type": "websocket.send", "text": json.dumps(message)})
+
+    def offer(self, frame):
+        """Make ``frame`` the next one to decode, dropping any frame still waiting."""
+        if self.latest is not None:
+            SCAN_FRAMES.inc(("dropped",))
+        self.latest = frame
+        self.frame_waiting.set()
+
+    async def decode_frames(self):
+        while True:
+            await self.frame_waiting.wait()
+            self.frame_waiting.clear()
+            frame, self.latest = self.latest, None
+            if frame is None:
+                continue
+
+            try:
+                with decode_timer("websocket"):
+                    symbols = await adecode_image_bytes(frame)
+            except ValueError as e:
+                SCAN_FRAMES.inc(("error",))
+                await self.send_json({"type": "error", "error": str(e)})
+                await self.send_json({"type": "ready"})
+                continue
+
+            if symbols is None:
+                # Decoder pool is full: keep this frame unless a newer one arrived
+                SCAN_FRAMES.inc(("busy",))
+                if self.latest is None:
+                    self.latest = frame
+                await asyncio.sleep(settings.SCAN_WS_BUSY_RETRY)
+                self.frame_waiting.set()
+                continue
+
+            code = next((s for s in symbols if is_valid_product_code(s["data"], s["type"])), None)
+            SCAN_FRAMES.inc(("decoded" if code else "empty",))
+            if code is not None and code["data"] != self.reported:
+                self.reported = code["data"]
+                await self.report(code)
+            await self.send_json({"type": "ready"})
+
+    async def report(self, code):
+        barcode = code["data"]
+        product, cache_status = product_cache.peek(barcode), "fresh"
+        if product is None:
+            try:
+                product, cache_status = await sync_to_async(_lookup, thread_sensitive=False)(barcode)
+            except requests.RequestException:
+                product, cache_status = None, "unavailable"
+        await self.send_json({
+            "type": "barcode",
+            "barcode": barcode,
+            "symbology": code["type"],
+            "product": product,
+            "cache": cache_status,
+        })
+
+    def handle_text(self, text):
+        try:
+            message = json.loads(text)
+        except ValueError:
+            return
+        if isinstance(message, dict) and message.get("type") == "reset":
+            self.reported = None
+
+
+async def scan_session(scope, receive, send):
+    """ASGI application for one WebSocket scan session."""
+    message = await receive()
+    if message["type"] != "websocket.connect":
+        return
+    if not _origin_allowed(scope):
+        await send({"type": "websocket.close", "code": 4003})
+        return
+    if len(_sessions) >= settings.SCAN_WS_MAX_SESSIONS:
+        await send({"type": "websocket.close", "code": 1013})  # try again later
+        return
+
+    await send({"type": "websocket.accept"})
+    session = ScanSession(send)
+    _sessions.add(session)
+    decoder = asyncio.create_task(session.decode_frames())
+    try:
+        await session.send_json({"type": "ready"})
+        while True:
+            message = await receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes") is not None:
+                if len(message["bytes"]) > settings.SCAN_WS_MAX_FRAME_BYTES:
+                    await send({"type": "websocket.close", "code": 1009})  # message too big
+                    break
+                SCAN_FRAMES.inc(("received",))
+                session.offer(message["bytes"])
+            elif message.get("text") is not None:
+                session.handle_text(message["text"])
+            if decoder.done():
+                break  # the decoder failed; its exception is raised below
+    finally:
+        _sessions.discard(session)
+        decoder.cancel()
+        try:
+            await decoder
+        except asyncio.CancelledError:
+            pass
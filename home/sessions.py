@@ -0,0 +1,298 @@
+# home/sessions.py
+"""Database sessions with an in-process cache in front (SESSION_ENGINE).
+
+Sessions are still stored in django_session, but the SESSION_CACHE_SIZE
+most recently used ones are kept in process memory, decoded, together with
+the users they resolve to. A request for a hot session therefore runs no
+SQL before the view: no session read and no User load.
+
+Changes to a session's data are written to the cache at once and to the
+database behind the request, through the serialized writer (home/db.py).
+Creating and deleting a session (login, logout, cycle_key) stay
+synchronous: a new key must be known to be unique, and a session that was
+logged out must stop working everywhere.
+
+Other processes write the same table, so every cache entry is trusted for
+at most SESSION_CACHE_TTL seconds. That bounds how long a logout or a
+password change made in another worker goes unseen here; in this process
+they take effect immediately. Users are resolved by
+SessionCacheAuthenticationMiddleware, which replaces Django's
+AuthenticationMiddleware and still checks the session's password hash on
+every request. Hit rates are exported as session_cache_lookups_total.
+"""
+import atexit
+import copy
+import logging
+import threading
+import time
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model, load_backend,
+)
+from django.contrib.auth.signals import user_logged_in
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+from .db import db_writer
+from .metrics import Counter, Gauge
+from .products import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# session key -> (serialized data, expire date, cached at)
+session_cache = LRUCache(settings.SESSION_CACHE_SIZE)
+# user id -> (backend path, user, cached at)
+user_cache = LRUCache(settings.SESSION_CACHE_SIZE)
+
+_pending = {}  # session key -> Future of its latest queued write
+_pending_lock = threading.Lock()
+# Bumped by every change; a load that raced one does not fill the cache
+_generation = [0]
+
+SESSION_CACHE_LOOKUPS = Counter(
+    "session_cache_lookups_total", "Session and user lookups, by cache result.", ("kind", "result"))
+SESSION_CACHE_ENTRIES = Gauge(
+    "session_cache_entries", "Sessions and users held in the session cache.", ("kind",),
+    collect=lambda: {("session",): len(session_cache), ("user",): len(user_cache)},
+)
+SESSION_WRITES = Counter(
+    "session_writes_total", "Session changes written behind requests, by outcome.", ("outcome",))
+SESSION_WRITES_PENDING = Gauge(
+    "session_writes_pending", "Session changes queued for the database.",
+    collect=lambda: {(): len(_pending)},
+)
+
+
+def _changed():
+    with _pending_lock:
+        _generation[0] += 1
+
+
+def _fresh(cached_at):
+    return time.monotonic() - cached_at < settings.SESSION_CACHE_TTL
+
+
+def _write_session(model, session_key, session_data, expire_date):
+    updated = model.objects.filter(session_key=session_key).update(
+        session_data=session_data, expire_date=expire_date
+    )
+    if not updated:
+        # Deleted since the request loaded it (e.g. logged out in another worker)
+        session_cache.delete(session_key)
+        _changed()
+    return updated
+
+
+def _write_done(session_key, future):
+    with _pending_lock:
+        if _pending.get(session_key) is future:
+            del _pending[session_key]
+    if future.exception() is not None:
+        SESSION_WRITES.inc(("failed",))
+        session_cache.delete(session_key)  # the database is the truth again
+        _changed()
+        logger.error("Could not write session", exc_info=future.exception())
+    else:
+        SESSION_WRITES.inc(("written" if future.result() else "gone",))
+
+
+def _wait_for_write(session_key, timeout=None):
+    with _pending_lock:
+        future = _pending.get(session_key)
+    if future is not None:
+        try:
+            future.result(timeout)
+        except Exception:
+            pass  # logged by _write_done
+
+
+class SessionStore(DBStore):
+    def _cached(self):
+        entry = session_cache.get(self.session_key) if self.session_key else None
+        if entry is not None and _fresh(entry[2]) and entry[1] > timezone.now():
+            SESSION_CACHE_LOOKUPS.inc(("session", "hit"))
+            return self.serializer().loads(entry[0])
+        SESSION_CACHE_LOOKUPS.inc(("session", "miss"))
+        return None
+
+    def _remember(self, data, expire_date, generation=None):
+        with _pending_lock:
+            if generation is not None and generation != _generation[0]:
+                return
+            _generation[0] += 1
+        session_cache.set(
+            self.session_key, (self.serializer().dumps(data), expire_date, time.monotonic())
+        )
+
+    def _load_uncached(self):
+        # A change of ours may still be queued behind the request that made it
+        _wait_for_write(self.session_key)
+        generation = _generation[0]
+        s = self._get_session_from_db()
+        if s is None:
+            return {}
+        data = self.decode(s.session_data)
+        if data:
+            self._remember(data, s.expire_date, generation)
+        return data
+
+    def load(self):
+        data = self._cached()
+        return data if data is not None else self._load_uncached()
+
+    async def aload(self):
+        data = self._cached()
+        return data if data is not None else await sync_to_async(self._load_uncached)()
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        if must_create:
+            # Synchronous: create() retries with a new key on CreateError
+            db_writer.run(super().save, must_create=True)
+            self._remember(self._get_session(no_load=True), self.get_expiry_date())
+            return
+
+        data = self._get_session()
+        expire_date = self.get_expiry_date()
+        self._remember(data, expire_date)
+        future = db_writer.submit(
+            _write_session, self.model, self.session_key, self.encode(data), expire_date
+        )
+        with _pending_lock:
+            _pending[self.session_key] = future
+        future.add_done_callback(partial(_write_done, self.session_key))
+
+    async def asave(self, must_create=False):
+        return await sync_to_async(self.save)(must_create)
+
+    def delete(self, session_key=None):
+        if session_key is None:
+            if self.session_key is None:
+                return
+            session_key = self.session_key
+        session_cache.delete(session_key)
+        _changed()
+        db_writer.run(super().delete, session_key)
+
+    async def adelete(self, session_key=None):
+        return await sync_to_async(self.delete)(session_key)
+
+
+def flush_session_writes(timeout=5):
+    """Wait up to ``timeout`` seconds for queued session writes; returns how many are left."""
+    deadline = time.monotonic() + timeout
+    for session_key in list(_pending):
+        _wait_for_write(session_key, max(0.0, deadline - time.monotonic()))
+    return len(_pending)
+
+
+def _flush_at_exit():
+    left = flush_session_writes()
+    if left:
+        logger.warning("Exiting with %d session writes still queued", left)
+
+
+atexit.register(_flush_at_exit)
+
+
+# ==================== USERS ====================
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def _forget_user(sender, instance, **kwargs):
+    user_cache.delete(instance.pk)
+    _changed()
+
+
+@receiver(user_logged_in)
+def _remember_user(sender, request, user, **kwargs):
+    # Connected after auth's update_last_login, so this is the saved user.
+    # login() records the backend in the session; ``user.backend`` is only
+    # set on users that came from authenticate().
+    session = getattr(request, "session", None)
+    backend_path = session.get(BACKEND_SESSION_KEY) if session is not None else None
+    if backend_path is None:
+        return
+    with _pending_lock:
+        _generation[0] += 1
+        user_cache.set(user.pk, (backend_path, copy.copy(user), time.monotonic()))
+
+
+def _backend_user(backend_path, user_id):
+    """``backend.get_user(user_id)``, served from ``user_cache`` while fresh.
+
+    Each caller gets its own copy: views may set attributes on request.user.
+    """
+    entry = user_cache.get(user_id)
+    if entry is not None and entry[0] == backend_path and _fresh(entry[2]):
+        SESSION_CACHE_LOOKUPS.inc(("user", "hit"))
+        return copy.copy(entry[1])
+    SESSION_CACHE_LOOKUPS.inc(("user", "miss"))
+
+    generation = _generation[0]
+    user = load_backend(backend_path).get_user(user_id)
+    if user is not None:
+        with _pending_lock:
+            if generation == _generation[0]:
+                user_cache.set(user_id, (backend_path, user, time.monotonic()))
+        user = copy.copy(user)
+    return user
+
+
+def get_user(request):
+    """django.contrib.auth.get_user, with the user loaded through ``user_cache``."""
+    if hasattr(request, "_cached_user"):
+        return request._cached_user
+
+    user = None
+    session = request.session
+    try:
+        user_id = get_user_model()._meta.pk.to_python(session[SESSION_KEY])
+        backend_path = session[BACKEND_SESSION_KEY]
+    except KeyError:
+        pass
+    else:
+        if backend_path in settings.AUTHENTICATION_BACKENDS:
+            user = _backend_user(backend_path, user_id)
+            # Verify the session, as Django does, against the user's current password
+            if hasattr(user, "get_session_auth_hash"):
+                session_hash = session.get(HASH_SESSION_KEY)
+                session_auth_hash = user.get_session_auth_hash()
+                if not (session_hash and constant_time_compare(session_hash, session_auth_hash)):
+                    if session_hash and any(
+                        constant_time_compare(session_hash, fallback_hash)
+                        for fallback_hash in user.get_session_auth_fallback_hash()
+                    ):
+                        session.cycle_key()
+                        session[HASH_SESSION_KEY] = session_auth_hash
+                    else:
+                        session.flush()
+                        user = None
+
+    request._cached_user = user or AnonymousUser()
+    return request._cached_user
+
+
+async def aget_user(request):
+    if hasattr(request, "_cached_user"):
+        return request._cached_user
+    return await sync_to_async(get_user)(request)
+
+
+class SessionCacheAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware that resolves users through ``user_cache``."""
+
+    def process_request(self, request):
+        super().process_request(request)  # checks that sessions are installed
+        request.user = SimpleLazyObject(lambda: get_user(request))
+        request.auser = partial(aget_user, request)
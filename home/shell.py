@@ -0,0 +1,72 @@
+# home/shell.py
+"""Pages served as a cached shell plus a small per-request fragment.
+
+Most of a page is identical for every visitor. ``page_shell`` renders the
+template once, with a marker in the slot where the per-user fragment goes,
+splits the HTML there and keeps both halves in memory. A request then only
+renders the fragment template and joins three strings.
+
+The shell is rendered without a request, so no context processor can leak
+one visitor's data into everyone's page. It is keyed by DEPLOY_VERSION and
+by the asset manifest (it embeds hashed asset URLs), so a deploy or an asset
+rebuild renders a fresh one. With PAGE_SHELL_CACHE off (the default under
+DEBUG) the shell is rendered on every request, so template edits show up.
+"""
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from django.template.loader import get_template, render_to_string
+from django.utils.safestring import mark_safe
+
+from .assets import manifest_version
+
+MARKER = "<!--page-shell-slot-->"
+
+_shells = {}
+_fragments = {}
+_lock = threading.Lock()
+
+
+def _render(template_name, slot):
+    html = render_to_string(template_name, {slot: mark_safe(MARKER)})
+    before, found, after = html.partition(MARKER)
+    if not found:
+        raise ImproperlyConfigured(f"{template_name} does not output {{{{ {slot} }}}}")
+    # Encoded once here rather than on every response
+    return before.encode(), after.encode()
+
+
+def page_shell(template_name, slot):
+    """(before, after) UTF-8 halves of ``template_name`` rendered once, split at ``{{ slot }}``."""
+    if not settings.PAGE_SHELL_CACHE:
+        return _render(template_name, slot)
+
+    key = (template_name, slot, settings.DEPLOY_VERSION, manifest_version())
+    shell = _shells.get(key)
+    if shell is None:
+        shell = _render(template_name, slot)
+        with _lock:
+            # Shells of earlier versions will not be asked for again
+            for old in [k for k in _shells if k[:2] == key[:2]]:
+                del _shells[old]
+            _shells[key] = shell
+    return shell
+
+
+def fragment_template(name):
+    """Compiled fragment template, kept alongside the shells."""
+    if not settings.PAGE_SHELL_CACHE:
+        return get_template(name)
+    template = _fragments.get(name)
+    if template is None:
+        template = _fragments[name] = get_template(name)
+    return template
+
+
+def render_with_shell(template_name, slot, fragment_name, context):
+    """Response of the cached shell with the ``fragment_name`` template rendered into its slot."""
+    before, after = page_shell(template_name, slot)
+    fragment = fragment_template(fragment_name).render(context).encode()
+    return HttpResponse(b"".join((before, fragment, after)))
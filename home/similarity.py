@@ -0,0 +1,216 @@
+# home/similarity.py
+"""Nutrient-vector index over the local Product catalog.
+
+Each product becomes a vector of (sugar, fat, salt, fiber, calories) per
+100g. Rows are sorted by category so every category is a contiguous slice of
+one float32 matrix, and a kNN query is a handful of vectorized NumPy ops on
+that slice: drop anything that is not at least as good as the scanned
+product on every nutrient the user cares about, then rank the rest by
+distance so the alternatives stay close to what was scanned.
+
+The index is built in a background thread, started when the server starts
+(warm_index) or on first use, never inside a request: until it is ready
+find_healthier_alternatives returns nothing and callers fall back to the
+name search.
+"""
+import json
+import logging
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from django.db import connection
+
+from .models import Product
+from .risk import RULES
+
+logger = logging.getLogger(__name__)
+
+FEATURES = ("sugar", "fat", "salt", "fiber", "calories")
+SUGAR, FAT, SALT, FIBER, CALORIES = range(len(FEATURES))
+
+# Reference daily amounts, used to put nutrients on a comparable scale
+SCALE = np.array([50.0, 70.0, 6.0, 30.0, 2000.0], dtype=np.float32)
+
+# Nutrients where less is better (fiber is the only one where more is)
+LOWER_IS_BETTER = (SUGAR, FAT, SALT, CALORIES)
+
+
+def condition_limits(condition):
+    """Per-100g ceilings an alternative must respect: the condition's risk rules."""
+    return {
+        FEATURES.index(name): ceiling
+        for name, ceiling in RULES.limits(condition).items()
+        if name in FEATURES
+    }
+
+
+def primary_category(categories):
+    """Most specific OpenFoodFacts category (they are listed general first)."""
+    parts = [c.strip().lower() for c in (categories or "").split(",") if c.strip()]
+    return parts[-1] if parts else ""
+
+
+def nutrient_vector(nutrition):
+    """Vector for a {name: value} nutrition dict; unknown values are NaN."""
+    vector = np.full(len(FEATURES), np.nan, dtype=np.float32)
+    for i, name in enumerate(FEATURES):
+        value = (nutrition or {}).get(name)
+        if isinstance(value, dict):
+            value = value.get("value")
+        try:
+            vector[i] = float(value)
+        except (TypeError, ValueError):
+            pass
+    return vector
+
+
+class NutrientIndex:
+    """Immutable snapshot of the catalog as category-sorted nutrient vectors."""
+
+    def __init__(self, barcodes, names, brands, nutriscores, categories, vectors):
+        order = np.argsort(np.asarray(categories, dtype=object), kind="stable")
+
+        self.barcodes = [barcodes[i] for i in order]
+        self.names = [names[i] for i in order]
+        self.brands = [brands[i] for i in order]
+        self.nutriscores = [nutriscores[i] for i in order]
+        self.vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, len(FEATURES))[order]
+        self.scaled = np.nan_to_num(self.vectors / SCALE)
+
+        self.row_of = {barcode: row for row, barcode in enumerate(self.barcodes)}
+        self.category_of_row = [categories[i] for i in order]
+        self.slices = {}
+        for row, category in enumerate(self.category_of_row):
+            start, _ = self.slices.get(category, (row, row))
+            self.slices[category] = (start, row + 1)
+
+    def __len__(self):
+        return len(self.barcodes)
+
+    @classmethod
+    def build(cls):
+        barcodes, names, brands, nutriscores, categories, vectors = [], [], [], [], [], []
+        rows = Product.objects.values_list(
+            "barcode", "product_name", "brand", "nutriscore", "categories", "nutritional_info"
+        ).iterator(chunk_size=5000)
+
+        for barcode, name, brand, nutriscore, category_text, nutrition in rows:
+            vector = nutrient_vector(json.loads(nutrition or "{}"))
+            if np.isnan(vector).all():
+                continue
+            barcodes.append(barcode)
+            names.append(name)
+            brands.append(brand or "")
+            nutriscores.append(nutriscore or "")
+            categories.append(primary_category(category_text))
+            vectors.append(vector)
+
+        return cls(barcodes, names, brands, nutriscores, categories, vectors)
+
+    def healthier(self, nutrition, categories="", barcode=None, condition="", k=3):
+        """Return up to k products that beat ``nutrition`` for this condition."""
+        query = nutrient_vector(nutrition)
+
+        category = primary_category(categories)
+        if barcode in self.row_of:
+            category = self.category_of_row[self.row_of[barcode]]
+        if category not in self.slices:
+            # Nothing comparable in the catalog; the caller falls back to name search
+            return []
+        start, end = self.slices[category]
+        vectors = self.vectors[start:end]
+
+        # NaN compares False, so unknown nutrients never pass a constraint
+        keep = np.ones(end - start, dtype=bool)
+        strictly_better = np.zeros(end - start, dtype=bool)
+        for feature in LOWER_IS_BETTER:
+            if not np.isnan(query[feature]):
+                keep &= vectors[:, feature] <= query[feature]
+                strictly_better |= vectors[:, feature] < query[feature]
+        for feature, ceiling in condition_limits(condition).items():
+            keep &= vectors[:, feature] <= ceiling
+        keep &= strictly_better
+        if barcode in self.row_of and start <= self.row_of[barcode] < end:
+            keep[self.row_of[barcode] - start] = False
+
+        candidates = np.flatnonzero(keep)
+        if not len(candidates):
+            return []
+
+        distances = np.linalg.norm(
+            self.scaled[start:end][candidates] - np.nan_to_num(query / SCALE), axis=1
+        )
+        if len(candidates) > k:
+            nearest = np.argpartition(distances, k)[:k]
+        else:
+            nearest = np.arange(len(candidates))
+        nearest = nearest[np.argsort(distances[nearest])]
+
+        results = []
+        for i in candidates[nearest] + start:
+            results.append({
+                "barcode": self.barcodes[i],
+                "name": self.names[i],
+                "brand": self.brands[i],
+                "nutriscore": self.nutriscores[i],
+                "nutrition": {
+                    name: (None if np.isnan(v) else float(v))
+                    for name, v in zip(FEATURES, self.vectors[i])
+                },
+            })
+        return results
+
+
+_index = None
+_built_at = 0.0
+_lock = threading.Lock()
+_rebuilding = False
+
+
+def get_index():
+    """Return the current index, or None while the first one is being built.
+
+    Builds happen in a background thread. Once built, an index older than
+    SIMILARITY_INDEX_TTL keeps serving while its replacement is built.
+    """
+    if _index is None or time.time() - _built_at > settings.SIMILARITY_INDEX_TTL:
+        _rebuild_in_background()
+    return _index
+
+
+def warm_index():
+    """Start building the index now, so the first requests find it ready."""
+    _rebuild_in_background()
+
+
+def _rebuild_in_background():
+    global _rebuilding
+    with _lock:
+        if _rebuilding:
+            return
+        _rebuilding = True
+
+    def rebuild():
+        global _index, _built_at, _rebuilding
+        try:
+            _index, _built_at = NutrientIndex.build(), time.time()
+        except Exception:
+            logger.exception("Could not build the nutrient index")
+        finally:
+            _rebuilding = False
+            connection.close()
+
+    threading.Thread(target=rebuild, name="nutrient-index", daemon=True).start()
+
+
+def find_healthier_alternatives(nutrition, categories="", barcode=None, condition="", k=3):
+    """Up to k healthier products from the index; [] while it is not built yet.
+
+    Never touches the database, so async views may call it directly.
+    """
+    index = get_index()
+    if index is None:
+        return []
+    return index.healthier(nutrition, categories, barcode, condition, k)
@@ -0,0 +1,17 @@
+# home/templatetags/assets.py
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+
+from home.assets import built_name
+
+register = template.Library()
+
+
+@register.simple_tag
+def asset(name):
+    """URL of the built (minified, content-hashed) asset, or of its source before a build."""
+    built = built_name(name)
+    if built is None:
+        return static(name)
+    return static(settings.ASSET_URL_PREFIX + built)
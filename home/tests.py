@@ -1,3 +1,1096 @@
-from django.test import TestCase
-
-# Create your tests here.
+import asyncio
+import gzip
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import cv2
+import httpx
+import numpy as np
+import requests
+from asgiref.testing import ApplicationCommunicator
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from . import decoding, shell, similarity
+from .assets import minify_css, minify_js
+from .camera import CameraUnavailable, CaptureDaemon
+from .decoding import decode_images, is_valid_product_code
+from .ingest import Scan, ScanBuffer, flush_at_exit, scan_buffer, write_scans
+from .metrics import RequestStats, current_stats
+from .models import BarcodeHistory, DailyNutrition, DietPlan, HealthProfile, Product, ScannedProduct
+from .outbound import get_client
+from .products import (
+    ProductCache, aget_openfoodfacts_json, get_openfoodfacts_json, openfoodfacts_breaker,
+    product_cache, search_catalog,
+)
+from .resilience import (
+    BREAKER_CALLS, CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, call_with_retries,
+)
+from .risk import RISK_RULES, RULES, RiskRules, assess_product
+from .scan_session import scan_session
+from .similarity import NutrientIndex, nutrient_vector
+from .templatetags.assets import asset
+from .views import is_high_risk
+
+# The db-writer thread has its own connection, which cannot see the test transaction
+TEST_SETTINGS = {"SQLITE_SERIALIZED_WRITES": False}
+
+
+def post_json(client, url, data):
+    return client.post(url, json.dumps(data), content_type="application/json")
+
+
+class StubOpenFoodFacts(BaseHTTPRequestHandler):
+    """Canned OpenFoodFacts answers; counts requests and client connections."""
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; without TCP_NODELAY the
+    # body waits on the client's delayed ACK (~40 ms per request)
+    disable_nagle_algorithm = True
+    delay = 0.0
+    status = 200
+    raw_body = None  # sent instead of the canned JSON when set
+    requests = []  # (client address, path)
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.requests.append((self.client_address, self.path))
+        time.sleep(self.delay)
+        if self.path.startswith("/cgi/search.pl"):
+            body = {"products": [
+                {"code": str(7000000000000 + i), "product_name": f"Oat bar {i}",
+                 "brands": "Stub", "nutriscore_grade": "a"}
+                for i in range(5)
+            ]}
+        else:
+            body = {"status": 1, "product": {"product_name": "Stub", "nutriments": {"sugars_100g": 30}}}
+        data = json.dumps(body).encode() if self.raw_body is None else self.raw_body
+        self.send_response(self.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class StubServerMixin:
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubOpenFoodFacts)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.stub_url = f"http://127.0.0.1:{cls.server.server_port}"
+        cls.settings_override = override_settings(OPENFOODFACTS_URL=cls.stub_url)
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        StubOpenFoodFacts.requests = []
+        StubOpenFoodFacts.delay = 0.0
+        StubOpenFoodFacts.status = 200
+        StubOpenFoodFacts.raw_body = None
+        openfoodfacts_breaker.reset()
+
+
+@override_settings(**TEST_SETTINGS)
+class AuthTests(TestCase):
+    def test_signup_logs_the_new_user_in(self):
+        response = post_json(self.client, "/accounts/ajax-signup/", {
+            "username": "alice", "email": "alice@example.com", "password": "pw-12345!",
+        })
+        self.assertEqual(response.json(), {
+            "success": True, "username": "alice", "email": "alice@example.com",
+        })
+        self.assertEqual(self.client.get("/get-profile/").json()["username"], "alice")
+
+    def test_login_and_logout(self):
+        User.objects.create_user("bob", password="pw-12345!")
+        response = post_json(self.client, "/accounts/ajax-login/", {
+            "username": "bob", "password": "wrong",
+        })
+        self.assertFalse(response.json()["success"])
+
+        response = post_json(self.client, "/accounts/ajax-login/", {
+            "username": "bob", "password": "pw-12345!",
+        })
+        self.assertTrue(response.json()["success"])
+        self.assertEqual(self.client.get("/get-profile/").status_code, 200)
+
+        self.client.get("/accounts/logout/")
+        self.assertEqual(self.client.get("/get-profile/").status_code, 302)
+
+    def test_password_change_ends_cached_sessions(self):
+        user = User.objects.create_user("carol", password="pw-12345!")
+        self.client.force_login(user)
+        self.assertEqual(self.client.get("/get-profile/").status_code, 200)
+
+        user.set_password("another-pw-1")
+        user.save()
+        self.assertEqual(self.client.get("/get-profile/").status_code, 302)
+
+
+@override_settings(**TEST_SETTINGS)
+@override_settings(**TEST_SETTINGS, PAGE_SHELL_CACHE=True)
+class PageShellTests(TestCase):
+    def setUp(self):
+        shell._shells.clear()
+        patcher = mock.patch.object(shell, "render_to_string", wraps=shell.render_to_string)
+        self.render = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_header_is_filled_in_per_visitor(self):
+        anonymous = self.client.get("/")
+        self.assertContains(anonymous, 'data-testid="login-btn"')
+        self.assertNotContains(anonymous, "Hi, jack")
+        self.assertIn("csrftoken", anonymous.cookies)
+
+        self.client.force_login(User.objects.create_user("jack"))
+        page = self.client.get("/")
+        self.assertContains(page, '<span class="welcome">Hi, jack</span>', html=True)
+        self.assertNotContains(page, 'data-testid="login-btn"')
+        self.assertNotContains(page, shell.MARKER)
+
+        self.client.logout()
+        self.assertEqual(self.client.get("/").content, anonymous.content)
+        self.assertEqual(self.render.call_count, 1)
+
+    def test_shell_is_rendered_again_for_a_new_deploy(self):
+        self.client.get("/")
+        with override_settings(DEPLOY_VERSION="next"):
+            self.client.get("/")
+            self.client.get("/")
+        self.assertEqual(self.render.call_count, 2)
+        self.assertEqual(len(shell._shells), 1)
+
+    def test_template_without_the_slot_is_an_error(self):
+        with self.assertRaises(ImproperlyConfigured):
+            shell.page_shell("home/user_header.html", "user_header")
+
+
+@override_settings(**TEST_SETTINGS)
+class DietPlanTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("erin")
+        HealthProfile.objects.create(user=self.user, health_conditions="bp", dietary_restrictions="veg")
+        self.client.force_login(self.user)
+
+    def save_profile(self, condition, diet):
+        response = post_json(self.client, "/accounts/save-health-profile/", {
+            "condition": condition, "allergies": "", "diet": diet,
+        })
+        self.assertTrue(response.json()["success"])
+
+    def test_matching_etag_is_not_modified(self):
+        first = self.client.get("/accounts/diet-plan/")
+        self.assertIn("no-cache", first["Cache-Control"])
+
+        response = self.client.get("/accounts/diet-plan/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], first["ETag"])
+        self.assertEqual(response.content, b"")
+
+    def test_profile_change_retires_the_plan(self):
+        first = self.client.get("/accounts/diet-plan/")
+        old = DietPlan.objects.get(user=self.user, is_active=True)
+
+        self.save_profile("diabetes", "nonveg")
+        old.refresh_from_db()
+        self.assertFalse(old.is_active)
+
+        response = self.client.get("/accounts/diet-plan/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], first["ETag"])
+        new = DietPlan.objects.get(user=self.user, is_active=True)
+        self.assertNotEqual(new.signature, old.signature)
+
+    def test_saving_the_same_profile_keeps_the_plan(self):
+        first = self.client.get("/accounts/diet-plan/")
+        row = DietPlan.objects.get(user=self.user, is_active=True)
+
+        self.save_profile("bp", "veg")
+        response = self.client.get("/accounts/diet-plan/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(DietPlan.objects.get(user=self.user, is_active=True).pk, row.pk)
+
+    def test_batch_run_keeps_plans_already_served_today(self):
+        first = self.client.get("/accounts/diet-plan/")
+        served = DietPlan.objects.get(user=self.user, is_active=True)
+        other = User.objects.create_user("finn")
+        HealthProfile.objects.create(user=other, health_conditions="bp", dietary_restrictions="veg")
+
+        today = timezone.localdate()
+        call_command("generate_diet_plans", days=2, workers=1, stdout=io.StringIO())
+        self.assertEqual(
+            sorted(DietPlan.objects.filter(user=self.user, is_active=True).values_list("plan_date", flat=True)),
+            [today, today + timedelta(days=1), today + timedelta(days=2)],
+        )
+
+        call_command("generate_diet_plans", days=2, start=today, workers=1, stdout=io.StringIO())
+        self.assertEqual(DietPlan.objects.get(user=self.user, plan_date=today, is_active=True).pk, served.pk)
+        self.assertTrue(DietPlan.objects.filter(user=other, plan_date=today, is_active=True).exists())
+        self.assertEqual(self.client.get("/accounts/diet-plan/")["ETag"], first["ETag"])
+
+    def test_plan_replaced_by_another_process_is_served(self):
+        first = self.client.get("/accounts/diet-plan/")
+        self.assertEqual(len(first.json()["meals"]), 3)
+        self.assertEqual(self.client.get("/accounts/diet-plan/")["ETag"], first["ETag"])
+
+        # What generate_diet_plans does, without touching this process's cache
+        row = DietPlan.objects.get(user=self.user, is_active=True)
+        DietPlan.objects.filter(pk=row.pk).update(is_active=False)
+        meals = {"breakfast": ["Poha"], "lunch": ["Dal"], "dinner": ["Khichdi"]}
+        DietPlan.objects.create(user=self.user, plan_content=json.dumps(meals), plan_date=row.plan_date,
+                                signature=row.signature, is_active=True)
+
+        second = self.client.get("/accounts/diet-plan/")
+        self.assertNotEqual(second["ETag"], first["ETag"])
+        self.assertEqual([m["title"] for m in second.json()["meals"]], ["Poha", "Dal", "Khichdi"])
+
+
+@override_settings(**TEST_SETTINGS)
+class BootstrapTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("ivy", email="ivy@example.com")
+        self.client.force_login(self.user)
+
+    def test_new_user_without_a_profile(self):
+        data = self.client.get("/api/bootstrap/").json()
+        self.assertEqual(set(data), {"profile", "health", "diet_plan", "history"})
+        self.assertEqual(data["profile"], {"username": "ivy", "email": "ivy@example.com"})
+        self.assertEqual(data["health"], {"exists": False})
+        self.assertIsNone(data["diet_plan"])
+        self.assertEqual(data["history"], {"history": [], "next_cursor": None})
+
+    def test_fields_limit_the_response(self):
+        HealthProfile.objects.create(user=self.user, health_conditions="diabetes", dietary_restrictions="veg")
+        response = self.client.get("/api/bootstrap/", {"fields": "health, diet_plan"})
+        self.assertIn("no-cache", response["Cache-Control"])
+        data = response.json()
+        self.assertEqual(set(data), {"health", "diet_plan"})
+        self.assertEqual(data["health"]["condition"], "diabetes")
+        self.assertEqual(len(data["diet_plan"]["meals"]), 3)
+        # Same plan and ETag as the diet-plan endpoint
+        self.assertEqual(data["diet_plan"]["etag"], self.client.get("/accounts/diet-plan/")["ETag"])
+        self.assertFalse(DietPlan.objects.filter(user=self.user, is_active=False).exists())
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get("/api/bootstrap/", {"fields": "profile,secrets"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "Unknown fields: secrets")
+
+
+@override_settings(**TEST_SETTINGS)
+class HistoryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("hank")
+        self.client.force_login(self.user)
+        now = timezone.now()
+        # Two rows share a timestamp: the cursor must still tell them apart
+        BarcodeHistory.objects.bulk_create([
+            BarcodeHistory(user=self.user, barcode=str(i), product_name=f"product {i}",
+                           scanned_at=now - timedelta(minutes=min(i, 3)))
+            for i in range(5)
+        ])
+
+    def test_cursor_walks_every_row_once(self):
+        barcodes, cursor = [], ""
+        for _ in range(5):
+            data = self.client.get("/get-history/", {"cursor": cursor, "limit": 2}).json()
+            barcodes += [item["barcode"] for item in data["history"]]
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+        self.assertEqual(barcodes, ["0", "1", "2", "4", "3"])
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get("/get-history/", {"cursor": "not-a-cursor"}).status_code, 400)
+
+
+@override_settings(**TEST_SETTINGS)
+class MetricsTests(TestCase):
+    def test_requests_and_breakers_are_exported(self):
+        self.client.force_login(User.objects.create_user("ivy"))
+        self.client.get("/get-profile/")
+        response = self.client.get("/metrics")
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        text = response.content.decode()
+        self.assertIn('http_requests_total{view="get_profile",method="GET",status="200"}', text)
+        self.assertIn('circuit_breaker_state{name="openfoodfacts"}', text)
+        self.assertIn("# TYPE http_request_duration_seconds histogram", text)
+
+
+class RiskTests(SimpleTestCase):
+    def verdict(self, nutrition, condition, nutriscore=None):
+        return assess_product(nutrition, nutriscore, condition)
+
+    def test_sugar_limit_for_diabetes(self):
+        self.assertEqual(self.verdict({"sugar": 12}, "Diabetes"),
+                         (True, ["High sugar not suitable for diabetes"]))
+        self.assertEqual(self.verdict({"sugar": 10}, "diabetes"), (False, []))
+        self.assertEqual(self.verdict({"sugar": 40}, "thyroid"), (False, []))
+
+    def test_fat_and_salt_limits_for_blood_pressure(self):
+        self.assertEqual(self.verdict({"fat": 16}, "bp"), (True, ["High fat not suitable for BP patients"]))
+        self.assertEqual(self.verdict({"fat": 15}, "high blood pressure"), (False, []))
+        self.assertEqual(self.verdict({"salt": 1.6}, "High blood pressure"),
+                         (True, ["High salt not suitable for BP patients"]))
+        self.assertEqual(self.verdict({"salt": 1.5}, "bp"), (False, []))
+        self.assertEqual(self.verdict({"salt": 3}, "diabetes"), (False, []))
+        self.assertEqual(RULES.limits("bp"), {"fat": 15.0, "salt": 1.5})
+
+    def test_poor_nutriscore_for_everyone(self):
+        self.assertEqual(self.verdict({}, "", "d"), (True, ["Poor Nutri-Score (D or E)"]))
+        self.assertEqual(self.verdict({}, "", "C"), (False, []))
+
+    def test_unknown_values_never_break_a_rule(self):
+        self.assertEqual(self.verdict({"sugar": None, "fat": "n/a"}, "diabetes bp", ""), (False, []))
+
+    def test_is_high_risk(self):
+        product = {"nutrition": {"sugar": {"value": 25}}, "nutriScore": "B"}
+        self.assertTrue(is_high_risk(product, {"condition": "diabetes"}))
+        self.assertFalse(is_high_risk(product, {"condition": "bp"}))
+        self.assertFalse(is_high_risk(product, {}))
+
+    def test_memo_survives_concurrent_eviction(self):
+        rules = RiskRules(RISK_RULES)
+        errors = []
+
+        def lookups(offset):
+            try:
+                for i in range(3000):
+                    rules.active(f"condition {offset} {i}")
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=lookups, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertLessEqual(len(rules._active), 1024)
+
+
+class BreakerTests(SimpleTestCase):
+    def breaker(self, **kwargs):
+        options = dict(window=10, min_calls=4, error_rate=0.5, slow_call_seconds=5.0, slow_rate=0.8,
+                       open_seconds=0.05)
+        return CircuitBreaker("test", **{**options, **kwargs})
+
+    def test_opens_on_failures_then_recovers(self):
+        breaker = self.breaker()
+        for failed in (False, True, False, True):
+            breaker.before_call()
+            breaker.record(failed, 0.01)
+        self.assertEqual(breaker.state, OPEN)
+        with self.assertRaises(CircuitOpenError) as raised:
+            breaker.before_call()
+        self.assertGreater(raised.exception.retry_after, 0)
+
+        time.sleep(0.06)
+        self.assertEqual(breaker.state, HALF_OPEN)
+        breaker.before_call()
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()  # one trial call at a time
+        breaker.record(False, 0.01)
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_slow_calls_open_it(self):
+        breaker = self.breaker(slow_call_seconds=0.1)
+        for _ in range(4):
+            breaker.before_call()
+            breaker.record(False, 0.2)
+        self.assertEqual(breaker.state, OPEN)
+
+    def test_retries_failures_but_not_client_errors(self):
+        breaker = self.breaker(min_calls=100)
+        budget = dict(timeout=1, deadline=5, retries=2, backoff=0.001)
+        attempts = []
+
+        def flaky(timeout):
+            attempts.append(timeout)
+            if len(attempts) < 3:
+                raise requests.ConnectionError("reset")
+            return "ok"
+
+        self.assertEqual(
+            call_with_retries(breaker, flaky, is_failure=lambda e: True, **budget), "ok")
+        self.assertEqual(len(attempts), 3)
+
+        attempts.clear()
+
+        def bad_request(timeout):
+            attempts.append(timeout)
+            raise ValueError("our fault")
+
+        with self.assertRaises(ValueError):
+            call_with_retries(breaker, bad_request, is_failure=lambda e: False, **budget)
+        self.assertEqual(len(attempts), 1)
+
+
+@override_settings(**TEST_SETTINGS)
+class IngestTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("gail")
+
+    def tearDown(self):
+        # Anything left would be written to the real database at exit
+        scan_buffer.clear()
+        super().tearDown()
+
+    def test_buffered_scans_are_written_at_exit(self):
+        self.client.force_login(self.user)
+        response = post_json(self.client, "/accounts/ajax-save-product/", {
+            "barcode": "789", "name": "Rice cake", "nutrition": {"sugar": 1},
+        })
+        self.assertTrue(response.json()["queued"])
+
+        # At interpreter shutdown no thread can be started (Python 3.12+),
+        # so the db-writer thread must not be needed
+        with override_settings(SQLITE_SERIALIZED_WRITES=True), mock.patch.object(
+            threading.Thread, "start",
+            side_effect=RuntimeError("can't create new thread at interpreter shutdown"),
+        ):
+            flush_at_exit()
+        self.assertEqual(len(scan_buffer), 0)
+        self.assertEqual(BarcodeHistory.objects.get(user=self.user).product_name, "Rice cake")
+        self.assertEqual(DailyNutrition.objects.get(user=self.user).products, 1)
+
+    def test_rows_keep_the_time_of_the_scan(self):
+        buffer = ScanBuffer(max_rows=100, flush_interval=3600, debounce_seconds=0, writer=write_scans)
+        before = timezone.now()
+        buffer.add(self.user.id, "123", "Oat bar", {"sugar": 5})
+        after = timezone.now()
+        time.sleep(0.05)
+        self.assertEqual(buffer.flush(), 1)
+
+        for model in (BarcodeHistory, ScannedProduct):
+            scanned_at = model.objects.get(user=self.user).scanned_at
+            self.assertTrue(before <= scanned_at <= after)
+
+    def test_rollup_uses_the_day_of_the_scan(self):
+        yesterday = timezone.now() - timedelta(days=1)
+        write_scans([
+            Scan(self.user.id, "123", "Oat bar", {"sugar": 5}, yesterday),
+            Scan(self.user.id, "456", "Rice cake", {"sugar": 1}, timezone.now()),
+        ])
+        days = dict(DailyNutrition.objects.filter(user=self.user).values_list("day", "sugar"))
+        self.assertEqual(days, {timezone.localdate(yesterday): 5, timezone.localdate(): 1})
+
+
+@override_settings(**TEST_SETTINGS)
+class NutritionTrendTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("hana")
+        self.client.force_login(self.user)
+
+    def trend(self, days):
+        return self.client.get("/api/nutrition/trends/", {"days": days})
+
+    def test_days_are_clamped(self):
+        write_scans([Scan(self.user.id, "123", "Oat bar", {"sugar": 5, "calories": 120}, timezone.now())])
+        response = self.trend(0)
+        self.assertEqual(len(response.json()["days"]), 1)
+        self.assertEqual(response.json()["days"][0]["date"], timezone.localdate().isoformat())
+        self.assertEqual(response.json()["totals"]["sugar"], 5)
+
+        days = self.trend(1000).json()["days"]
+        self.assertEqual(len(days), 366)
+        self.assertEqual(days[-1]["products"], 1)
+        self.assertEqual(days[0]["products"], 0)
+
+        self.assertEqual(self.trend("week").status_code, 400)
+
+    def test_rebuild_replaces_the_rollup(self):
+        today = timezone.now()
+        for scanned_at, info in ((today, '{"sugar": 5}'), (today, '{"sugar": 2.5}'),
+                                 (today - timedelta(days=2), "not json")):
+            ScannedProduct.objects.create(user=self.user, barcode="1", product_name="x",
+                                          nutritional_info=info, scanned_at=scanned_at)
+        DailyNutrition.objects.create(user=self.user, day=timezone.localdate(), sugar=99, products=9)
+
+        out = io.StringIO()
+        call_command("rebuild_nutrition_rollups", stdout=out)
+        self.assertIn("Rolled up 3 scans into 2 user-days (replaced 1)", out.getvalue())
+        days = {day["date"]: (day["products"], day["sugar"]) for day in self.trend(3).json()["days"]}
+        self.assertEqual(list(days.values()), [(1, 0), (0, 0), (2, 7.5)])
+
+        call_command("rebuild_nutrition_rollups", since=timezone.localdate(), stdout=out)
+        self.assertEqual(DailyNutrition.objects.filter(user=self.user).count(), 2)
+
+
+class CatalogTests(TestCase):
+    def add(self, barcode, name, age_days=0, source="api"):
+        Product.objects.create(barcode=barcode, product_name=name, source=source,
+                               fetched_at=timezone.now() - timedelta(days=age_days))
+
+    def test_name_search_matches_the_start_of_words(self):
+        self.add("1", "Crème Brûlée Chocolat")
+        self.add("2", "Oat bar")
+        self.add("3", "Goat cheese")
+        self.assertEqual([p["name"] for p in search_catalog("creme choc")], ["Crème Brûlée Chocolat"])
+        self.assertEqual([p["name"] for p in search_catalog("bar oat")], ["Oat bar"])
+        self.assertEqual(search_catalog("oat", exclude_barcode="2"), [])
+
+        Product.objects.filter(barcode="3").update(product_name="Oat cookies")
+        self.assertEqual({p["name"] for p in search_catalog("oat")}, {"Oat bar", "Oat cookies"})
+
+    def test_dump_rows_have_their_own_ttl(self):
+        self.add("4", "Imported", age_days=2, source="dump")
+        self.add("5", "Fetched", age_days=2, source="api")
+
+        def upstream_down(barcode):
+            raise requests.ConnectionError("down")
+
+        day = 60 * 60 * 24
+        cache = ProductCache(maxsize=10, ttl=day, stale_ttl=7 * day, miss_ttl=60, dump_ttl=30 * day,
+                             fetcher=upstream_down)
+        self.assertEqual(cache.get("4")[1], "fresh")
+        self.assertEqual(cache.get("5")[1], "stale")
+
+
+def dump_line(code, name, modified=100, sugar=5):
+    return json.dumps({
+        "code": code, "product_name": name, "last_modified_t": modified,
+        "nutriments": {"sugars_100g": sugar},
+    })
+
+
+class ImportDumpTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+
+    def write_dump(self, name, lines):
+        path = os.path.join(self.tmp, name)
+        data = ("\n".join(lines) + "\n").encode()
+        with (gzip.open if name.endswith(".gz") else open)(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def run_import(self, path, **options):
+        out = io.StringIO()
+        call_command("import_off_dump", path, stdout=out, **options)
+        return out.getvalue()
+
+    def test_bad_lines_are_skipped(self):
+        path = self.write_dump("dump.jsonl", [
+            dump_line("1001", "Oat bar"), "[]", '"x"', "null", "{not json", "",
+            json.dumps({"code": "1002"}), dump_line("1003", "Rice cake"),
+        ])
+        out = self.run_import(path)
+        self.assertIn("Imported 2 products from 8 lines (5 skipped)", out)
+        self.assertEqual(
+            set(Product.objects.values_list("barcode", "source")), {("1001", "dump"), ("1003", "dump")})
+        self.assertFalse(os.path.exists(f"{path}.checkpoint"))
+
+    def test_resume_after_a_failed_batch(self):
+        for name in ("dump.jsonl", "dump.jsonl.gz"):
+            with self.subTest(name):
+                Product.objects.all().delete()
+                path = self.write_dump(name, [dump_line(str(2000 + i), f"Product {i}") for i in range(5)])
+                bulk_create = Product.objects.bulk_create
+                calls = []
+
+                def fail_second_batch(*args, **kwargs):
+                    calls.append(1)
+                    if len(calls) == 2:
+                        raise RuntimeError("disk full")
+                    return bulk_create(*args, **kwargs)
+
+                with mock.patch.object(Product.objects, "bulk_create", fail_second_batch):
+                    with self.assertRaises(RuntimeError):
+                        self.run_import(path, batch_size=2)
+                self.assertEqual(Product.objects.count(), 2)
+                self.assertTrue(os.path.exists(f"{path}.checkpoint"))
+
+                out = self.run_import(path, batch_size=2)
+                self.assertIn("Resuming at line 2", out)
+                self.assertIn("Imported 5 products from 5 lines", out)
+                self.assertEqual(Product.objects.count(), 5)
+
+    def test_delta_imports_only_newer_products(self):
+        self.run_import(self.write_dump("full.jsonl", [
+            dump_line("3001", "Old", modified=100), dump_line("3002", "Newer", modified=200),
+        ]))
+        out = self.run_import(self.write_dump("delta.jsonl", [
+            dump_line("3001", "Old, changed", modified=150),
+            dump_line("3002", "Newer, changed", modified=300),
+            dump_line("3003", "New", modified=250),
+        ]), delta=True)
+        self.assertIn("Imported 2 products", out)
+        self.assertEqual(dict(Product.objects.values_list("barcode", "product_name")),
+                         {"3001": "Old", "3002": "Newer, changed", "3003": "New"})
+
+        self.run_import(self.write_dump("since.jsonl", [dump_line("3001", "Old, again", modified=150)]),
+                        since=120)
+        self.assertEqual(Product.objects.get(barcode="3001").product_name, "Old, again")
+
+
+class SimilarityTests(SimpleTestCase):
+    def setUp(self):
+        rows = [
+            ("1", "Hazelnut spread", "spreads", {"sugar": 56, "fat": 31, "salt": 0.1}),
+            ("2", "Peanut butter", "spreads", {"sugar": 6, "fat": 50, "salt": 0.5}),
+            ("3", "Almond spread", "spreads", {"sugar": 4, "fat": 20, "salt": 0.05}),
+            ("4", "Plain yogurt", "yogurts", {"sugar": 4, "fat": 3, "salt": 0.1}),
+        ]
+        self.index = NutrientIndex(
+            [r[0] for r in rows], [r[1] for r in rows], ["Brand"] * len(rows), ["c"] * len(rows),
+            [r[2] for r in rows], [nutrient_vector(r[3]) for r in rows],
+        )
+
+    def test_alternatives_come_from_the_same_category(self):
+        results = self.index.healthier({"sugar": 56, "fat": 31, "salt": 0.1}, "Spreads", barcode="1")
+        self.assertEqual([r["name"] for r in results], ["Almond spread"])
+
+    def test_unknown_category_is_not_compared_to_the_whole_catalog(self):
+        self.assertEqual(self.index.healthier({"sugar": 56, "fat": 31, "salt": 0.1}, "Biscuits"), [])
+
+    def test_nothing_is_found_while_the_index_is_building(self):
+        index, rebuilding = similarity._index, similarity._rebuilding
+        # As if the first build were still running
+        similarity._index, similarity._rebuilding = None, True
+        try:
+            self.assertEqual(similarity.find_healthier_alternatives({"sugar": 56}, "spreads"), [])
+        finally:
+            similarity._index, similarity._rebuilding = index, rebuilding
+
+
+HARMFUL_SPREAD = {
+    "name": "Chocolate spread",
+    "barcode": "3017620422003",
+    "nutrition": {"sugar": {"value": 56}, "fat": {"value": 31}},
+}
+
+
+@override_settings(**TEST_SETTINGS)
+class OutboundTests(StubServerMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        user = User.objects.create_user("dana")
+        HealthProfile.objects.create(user=user, health_conditions="diabetes")
+        self.client.force_login(user)
+
+    def test_alternatives_come_from_the_stub_server(self):
+        data = post_json(self.client, "/accounts/ajax-alternatives/", HARMFUL_SPREAD).json()
+        self.assertTrue(data["harmful"])
+        self.assertFalse(data["degraded"])
+        self.assertEqual([a["name"] for a in data["alternatives"]], ["Oat bar 0", "Oat bar 1", "Oat bar 2"])
+
+    def test_requests_share_one_client_and_connection(self):
+        # Every call runs in a new event loop under the test client (as under WSGI)
+        for _ in range(5):
+            post_json(self.client, "/accounts/ajax-alternatives/", HARMFUL_SPREAD)
+        self.assertEqual(len(StubOpenFoodFacts.requests), 5)
+        self.assertEqual(len({address for address, _ in StubOpenFoodFacts.requests}), 1)
+        self.assertIs(get_client(), get_client())
+
+    def test_identical_concurrent_gets_share_one_request(self):
+        StubOpenFoodFacts.delay = 0.2
+        url = f"{self.stub_url}/api/v0/product/123.json"
+
+        async def lookups():
+            return await asyncio.gather(*(get_client().get_json(url) for _ in range(10)))
+
+        results = asyncio.run(lookups())
+        self.assertEqual(len(StubOpenFoodFacts.requests), 1)
+        self.assertTrue(all(r == results[0] for r in results))
+
+    def test_sync_lookups_share_the_pool_and_in_flight_calls(self):
+        StubOpenFoodFacts.delay = 0.2
+        url = f"{self.stub_url}/api/v0/product/321.json"
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(get_openfoodfacts_json(url)))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(results), 5)
+        self.assertEqual(len(StubOpenFoodFacts.requests), 1)
+
+        StubOpenFoodFacts.delay = 0.0
+        asyncio.run(aget_openfoodfacts_json(url))
+        self.assertEqual(len({address for address, _ in StubOpenFoodFacts.requests}), 1)
+
+    def test_sync_http_errors_are_request_exceptions(self):
+        StubOpenFoodFacts.status = 404
+        with self.assertRaises(requests.RequestException):
+            get_openfoodfacts_json(f"{self.stub_url}/api/v0/product/404.json")
+
+    def test_outbound_wait_is_counted_once(self):
+        StubOpenFoodFacts.delay = 0.2
+        url = f"{self.stub_url}/api/v0/product/654.json"
+
+        async def lookup():
+            stats = RequestStats()
+            current_stats.set(stats)
+            await aget_openfoodfacts_json(url)
+            return stats
+
+        stats = asyncio.run(lookup())
+        self.assertGreaterEqual(stats.outbound_seconds, 0.2)
+        self.assertLess(stats.outbound_seconds, 0.35)
+
+    @override_settings(OPENFOODFACTS_RETRY_BACKOFF=0.01)
+    def test_coalesced_failures_count_once_against_the_breaker(self):
+        StubOpenFoodFacts.delay = 0.1
+        StubOpenFoodFacts.status = 500
+        url = f"{self.stub_url}/api/v0/product/456.json"
+        failures = BREAKER_CALLS._values.get(("openfoodfacts", "failure"), 0)
+
+        async def lookups():
+            return await asyncio.gather(
+                *(aget_openfoodfacts_json(url) for _ in range(10)), return_exceptions=True)
+
+        results = asyncio.run(lookups())
+        self.assertTrue(all(isinstance(r, httpx.HTTPStatusError) for r in results))
+        attempts = len(StubOpenFoodFacts.requests)
+        self.assertEqual(attempts, 3)  # the first try and OPENFOODFACTS_RETRIES
+        self.assertEqual(BREAKER_CALLS._values[("openfoodfacts", "failure")] - failures, attempts)
+        self.assertEqual(openfoodfacts_breaker.state, CLOSED)
+
+    def test_garbled_upstream_body_is_a_failed_lookup(self):
+        for n, body in enumerate((b"<html>Bad gateway</html>", b"[1, 2]")):
+            with self.subTest(body=body):
+                StubOpenFoodFacts.raw_body = body
+                response = self.client.get(f"/api/product/{9000000000000 + n}/")
+                self.assertEqual(response.status_code, 502)
+                self.assertEqual(response.json(), {"error": "Product lookup failed"})
+
+                data = post_json(self.client, "/accounts/ajax-alternatives/", {
+                    **HARMFUL_SPREAD, "name": f"Garbled spread {n}",
+                }).json()
+                self.assertTrue(data["degraded"])
+
+
+# Basket lookups run on their own threads, which cannot see a test transaction
+@override_settings(**TEST_SETTINGS)
+class BasketTests(StubServerMixin, TransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user("fay")
+        HealthProfile.objects.create(user=self.user, health_conditions="diabetes")
+
+    async def basket(self, barcodes):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(
+            "/api/basket/", json.dumps({"barcodes": barcodes}), content_type="application/json")
+        self.assertTrue(response.is_async)
+        return [json.loads(line) async for line in response.streaming_content]
+
+    async def test_items_then_summary(self):
+        lines = await self.basket(["5000000000001", "5000000000001", "abc", "5000000000002"])
+        items = {line["barcode"]: line for line in lines[:-1]}
+        self.assertEqual(items["abc"]["error"], "Invalid barcode")
+        self.assertEqual(items["5000000000001"]["quantity"], 2)
+        self.assertTrue(items["5000000000002"]["harmful"])
+        self.assertEqual(lines[-1]["type"], "summary")
+        self.assertEqual((lines[-1]["items"], lines[-1]["found"], lines[-1]["failed"]), (4, 3, 1))
+
+    async def test_unexpected_lookup_error_is_an_item_error(self):
+        fetcher = product_cache.fetcher
+
+        def flaky(barcode):
+            if barcode == "5000000000004":
+                raise KeyError("nutriments")
+            return fetcher(barcode)
+
+        product_cache.fetcher = flaky
+        try:
+            with self.assertLogs("home.basket", "ERROR"):
+                lines = await self.basket(["5000000000003", "5000000000004"])
+        finally:
+            product_cache.fetcher = fetcher
+        items = {line["barcode"]: line for line in lines[:-1]}
+        self.assertTrue(items["5000000000003"]["found"])
+        self.assertEqual(items["5000000000004"]["error"], "Product lookup failed")
+        self.assertEqual(lines[-1]["failed"], 1)
+
+
+VALID_EAN = "4006381333931"
+
+
+class CameraTests(SimpleTestCase):
+    """The capture loop, fed from a short clip instead of a device."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        # Two dark frames, then a bright one that the stub decoder reads as a product code
+        self.clip = os.path.join(tmp.name, "clip.avi")
+        writer = cv2.VideoWriter(self.clip, cv2.VideoWriter_fourcc(*"MJPG"), 50, (64, 48))
+        for value in (10, 10, 200):
+            writer.write(np.full((48, 64, 3), value, np.uint8))
+        writer.release()
+        self.decoded = []
+
+    def decoder(self, frame):
+        self.decoded.append(frame)
+        time.sleep(0.01)
+        if frame.mean() > 100:
+            return [{"data": VALID_EAN, "type": "EAN13"}]
+        # Right length, wrong check digit: scan() must keep looking
+        return [{"data": VALID_EAN[:-1] + "2", "type": "EAN13"}]
+
+    def start_camera(self, source=None):
+        camera = CaptureDaemon(source or self.clip, buffer_frames=4, reconnect_seconds=0.05,
+                               decoder=self.decoder)
+        self.addCleanup(camera.stop)
+        return camera
+
+    def test_scan_returns_the_first_valid_code(self):
+        camera = self.start_camera()
+        self.assertEqual(camera.scan(timeout=5), {"data": VALID_EAN, "type": "EAN13"})
+        self.assertTrue(camera.connected)
+
+    def test_concurrent_scans_decode_each_frame_once(self):
+        camera = self.start_camera()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(camera.scan(timeout=5)))
+                   for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual([r["data"] for r in results], [VALID_EAN] * 4)
+        with camera._cond:
+            frames_seen = camera._seq
+        self.assertLessEqual(len(self.decoded), frames_seen)
+
+        seq, frame = camera.wait_for_frame(0, timeout=1)
+        before = len(self.decoded)
+        self.assertEqual(camera.decode(seq, frame), camera.decode(seq, frame))
+        self.assertLessEqual(len(self.decoded) - before, 1)
+
+    def test_missing_source_is_unavailable(self):
+        camera = self.start_camera(self.clip + ".missing")
+        with self.assertRaises(CameraUnavailable):
+            camera.scan(timeout=2)
+        self.assertFalse(camera.connected)
+
+
+def png(image):
+    return cv2.imencode(".png", image)[1].tobytes()
+
+
+class DecodingTests(SimpleTestCase):
+    def test_product_codes_need_a_valid_check_digit(self):
+        self.assertTrue(is_valid_product_code(VALID_EAN, "EAN13"))
+        self.assertFalse(is_valid_product_code(VALID_EAN[:-1] + "2", "EAN13"))
+        self.assertTrue(is_valid_product_code("96385074", "EAN8"))
+        self.assertTrue(is_valid_product_code("036000291452", "UPCA"))
+        self.assertTrue(is_valid_product_code("04252614", "UPCE"))
+        self.assertFalse(is_valid_product_code("04252615", "UPCE"))
+        self.assertFalse(is_valid_product_code("40063813", "EAN13"))  # wrong length
+        self.assertFalse(is_valid_product_code("40063813339a", "EAN13"))
+        self.assertFalse(is_valid_product_code(VALID_EAN, "QRCODE"))
+
+    def test_full_queue_and_deadline(self):
+        # Work handed to this executor never finishes
+        stuck = mock.Mock(submit=lambda *args: Future())
+        with mock.patch.object(decoding, "get_executor", return_value=stuck):
+            with mock.patch.object(decoding, "_slots", threading.BoundedSemaphore(1)) as slots:
+                slots.acquire()
+                results = decode_images([b"a", b"b"], deadline=time.monotonic() + 0.05)
+                self.assertEqual([r["status"] for r in results], ["busy", "busy"])
+
+                slots.release()
+                results = decode_images([b"a", b"b"], deadline=time.monotonic() + 0.05)
+                self.assertEqual([r["status"] for r in results], ["timeout", "busy"])
+                # The timed-out image gave its slot back when it was cancelled
+                self.assertTrue(slots.acquire(blocking=False))
+
+
+@override_settings(**TEST_SETTINGS)
+class DecodeApiTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user("dora", password="pw-12345!"))
+
+    def test_requires_login(self):
+        self.client.logout()
+        self.assertEqual(self.client.post("/api/decode/").status_code, 302)
+
+    def test_request_without_images_is_rejected(self):
+        self.assertEqual(self.client.post("/api/decode/").status_code, 400)
+        response = self.client.post("/api/decode/", b"", content_type="image/png")
+        self.assertEqual(response.status_code, 400)
+
+    def test_results_per_image(self):
+        response = self.client.post("/api/decode/?deadline_ms=10000", {"images": [
+            SimpleUploadedFile("garbage.png", b"not an image", "image/png"),
+            SimpleUploadedFile("blank.png", png(np.full((100, 100), 255, np.uint8)), "image/png"),
+        ]})
+        self.assertEqual(response.status_code, 200)
+        garbage, blank = response.json()["images"]
+        self.assertEqual((garbage["name"], garbage["status"]), ("garbage.png", "error"))
+        self.assertEqual(garbage["error"], "Not a decodable image")
+        self.assertEqual(blank, {"name": "blank.png", "status": "ok", "barcodes": []})
+
+        response = self.client.post("/api/decode/", png(np.zeros((50, 50), np.uint8)),
+                                    content_type="image/png")
+        self.assertEqual(response.json()["images"][0]["name"], "body")
+
+
+class MinifierTests(SimpleTestCase):
+    def test_js_regex_literals_are_kept(self):
+        self.assertEqual(minify_js("const re = /\\/\\/x/g;  // comment\nx = a / b / c;"),
+                         "const re = /\\/\\/x/g;\nx = a / b / c;\n")
+        self.assertEqual(minify_js("if (x) return /[/]+/.test(s)"), "if(x)return /[/]+/.test(s)\n")
+
+    def test_js_template_strings_are_kept(self):
+        self.assertEqual(
+            minify_js("const s = `a ${ {b: 1}.b } // kept ${`in  ${c}`}`;  /* gone */"),
+            "const s = `a ${{b:1}.b} // kept ${`in  ${c}`}`;\n",
+        )
+
+    def test_comment_markers_inside_strings_are_kept(self):
+        self.assertEqual(minify_js("var s = \"http://x/*y*/\"; var t = '// no';"),
+                         "var s = \"http://x/*y*/\";var t = '// no';\n")
+        self.assertEqual(minify_css('a::after { content: "/* keep */  x" ; /* drop */ }'),
+                         'a::after{content:"/* keep */  x"}')
+
+    def test_js_line_breaks_survive_for_semicolon_insertion(self):
+        for source in ("let a = b\n++c", "return\nx", "a = b\n(c)", "x = 1 /* a\nb */ y = 2"):
+            with self.subTest(source):
+                self.assertEqual(minify_js(source).count("\n"), 2)
+
+    def test_css_whitespace_and_punctuation(self):
+        self.assertEqual(minify_css("a  >  b {\n  margin : 0 ;\n}\n\n.c , .d{color:red}"),
+                         "a>b{margin :0}.c,.d{color:red}")
+
+
+APP_JS = "// app\nfunction hello ( name ) {\n    return `hi ${name}`;\n}\n" * 20
+
+
+class AssetTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        source = os.path.join(tmp.name, "static")
+        os.makedirs(os.path.join(source, "home"))
+        with open(os.path.join(source, "home", "app.js"), "w") as f:
+            f.write(APP_JS)
+        settings = override_settings(ASSET_SOURCE_DIRS=[source],
+                                     ASSET_BUILD_DIR=os.path.join(tmp.name, "build"))
+        settings.enable()
+        self.addCleanup(settings.disable)
+        call_command("build_assets", stdout=io.StringIO())
+
+    def test_built_asset_is_served_minified_with_long_cache_headers(self):
+        url = asset("home/app.js")
+        self.assertRegex(url, r"^/static/build/home/app\.[0-9a-f]{12}\.js$")
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+        minified = minify_js(APP_JS).encode()
+        self.assertEqual(response.content, minified)
+        self.assertNotIn("Content-Encoding", response)
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), minified)
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class ScanSessionTests(SimpleTestCase):
+    """The WebSocket scan session, driven directly as an ASGI application."""
+
+    def setUp(self):
+        async def decode(frame):
+            return [{"data": VALID_EAN, "type": "EAN13"}] if frame == b"code" else []
+
+        for patcher in (
+            mock.patch("home.scan_session.adecode_image_bytes", decode),
+            mock.patch.object(product_cache, "peek", return_value={"found": True, "name": "Stub"}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def connect(self, origin=b"http://testserver"):
+        scope = {"type": "websocket", "path": "/ws/scan/", "headers": [(b"origin", origin)]}
+        session = ApplicationCommunicator(scan_session, scope)
+        await session.send_input({"type": "websocket.connect"})
+        return session
+
+    async def receive(self, session):
+        message = await session.receive_output(timeout=1)
+        return json.loads(message["text"]) if "text" in message else message
+
+    async def test_other_origins_are_refused(self):
+        session = await self.connect(b"https://evil.example")
+        self.assertEqual(await self.receive(session), {"type": "websocket.close", "code": 4003})
+
+    @override_settings(SCAN_WS_MAX_SESSIONS=1)
+    async def test_sessions_are_limited(self):
+        first = await self.connect()
+        self.assertEqual(await self.receive(first), {"type": "websocket.accept"})
+        self.assertEqual(await self.receive(first), {"type": "ready"})
+
+        second = await self.connect()
+        self.assertEqual(await self.receive(second), {"type": "websocket.close", "code": 1013})
+
+        await first.send_input({"type": "websocket.disconnect", "code": 1000})
+        await first.wait(timeout=1)
+        third = await self.connect()
+        self.assertEqual(await self.receive(third), {"type": "websocket.accept"})
+        await third.send_input({"type": "websocket.disconnect", "code": 1000})
+        await third.wait(timeout=1)
+
+    @override_settings(SCAN_WS_MAX_FRAME_BYTES=8)
+    async def test_oversized_frame_closes_the_session(self):
+        session = await self.connect()
+        await self.receive(session)
+        await self.receive(session)
+        await session.send_input({"type": "websocket.receive", "bytes": b"x" * 9})
+        self.assertEqual(await self.receive(session), {"type": "websocket.close", "code": 1009})
+        await session.wait(timeout=1)
+
+    async def test_barcode_is_reported_once_until_reset(self):
+        session = await self.connect()
+        await self.receive(session)
+        self.assertEqual(await self.receive(session), {"type": "ready"})
+
+        async def frame(data):
+            await session.send_input({"type": "websocket.receive", "bytes": data})
+            messages = [await self.receive(session)]
+            while messages[-1] != {"type": "ready"}:
+                messages.append(await self.receive(session))
+            return messages
+
+        reported, _ = await frame(b"code")
+        self.assertEqual(reported, {"type": "barcode", "barcode": VALID_EAN, "symbology": "EAN13",
+                                    "product": {"found": True, "name": "Stub"}, "cache": "fresh"})
+        self.assertEqual(await frame(b"code"), [{"type": "ready"}])
+        self.assertEqual(await frame(b"none"), [{"type": "ready"}])
+        self.assertEqual(await frame(b"code"), [{"type": "ready"}])
+
+        await session.send_input({"type": "websocket.receive", "text": json.dumps({"type": "reset"})})
+        self.assertEqual([m["type"] for m in await frame(b"code")], ["barcode", "ready"])
+        await session.send_input({"type": "websocket.disconnect", "code": 1000})
+        await session.wait(timeout=1)
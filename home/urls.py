@@ -1,22 +1,29 @@
-from django.contrib import admin
-from django.urls import path, include
-
-# home/urls.py (APP level)
-from django.urls import path
-from . import views  # This is CORRECT here!
-
-urlpatterns = [
-    path('', views.home_page, name='home'),
-    path('accounts/ajax-login/', views.ajax_login, name='ajax_login'),
-    path('accounts/ajax-signup/', views.ajax_signup, name='ajax_signup'),
-    path('accounts/logout/', views.logout_view, name='logout'),
-    path('accounts/save-health-profile/', views.save_health_profile, name='save_health_profile'),
-    path('accounts/ajax-save-product/', views.ajax_save_product, name='ajax_save_product'),
-    path('accounts/diet-plan/', views.get_diet_plan, name='diet_plan'),
-    path('accounts/ajax-alternatives/', views.ajax_alternatives, name='ajax_alternatives'),
-    path('scan/', views.scan_barcode_and_get_food, name='scan_barcode'),
-    path('get-profile/', views.get_profile, name='get_profile'),
-    path("get-history/", views.get_user_history, name="get_history"),
-
-
+from django.contrib import admin
+from django.urls import path, include
+
+# home/urls.py (APP level)
+from django.urls import path
+from . import views  # This is CORRECT here!
+
+urlpatterns = [
+    path('', views.home_page, name='home'),
+    path('accounts/ajax-login/', views.ajax_login, name='ajax_login'),
+    path('accounts/ajax-signup/', views.ajax_signup, name='ajax_signup'),
+    path('accounts/logout/', views.logout_view, name='logout'),
+    path('accounts/save-health-profile/', views.save_health_profile, name='save_health_profile'),
+    path('accounts/ajax-save-product/', views.ajax_save_product, name='ajax_save_product'),
+    path('accounts/diet-plan/', views.get_diet_plan, name='diet_plan'),
+    path('accounts/health-summary/', views.get_health_summary, name='health_summary'),
+    path('accounts/ajax-alternatives/', views.ajax_alternatives, name='ajax_alternatives'),
+    path('scan/', views.scan_barcode_and_get_food, name='scan_barcode'),
+    path('get-profile/', views.get_profile, name='get_profile'),
+    path("get-history/", views.get_user_history, name="get_history"),
+    path("api/nutrition/trends/", views.get_nutrition_trends, name="nutrition_trends"),
+    path('api/bootstrap/', views.api_bootstrap, name='api_bootstrap'),
+    path('api/product/<str:barcode>/', views.api_product, name='api_product'),
+    path('api/decode/', views.api_decode, name='api_decode'),
+    path('api/basket/', views.api_basket, name='api_basket'),
+    path('metrics', views.metrics_view, name='metrics'),
+
+
 ]
\ No newline at end of file
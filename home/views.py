@@ -1,517 +1,525 @@
-# home/views.py
-from django.shortcuts import render, redirect
-from django.http import JsonResponse, HttpResponse
-from django.contrib.auth import authenticate, login, logout
-from django.contrib.auth.models import User
-from django.views.decorators.csrf import csrf_exempt
-from django.contrib.auth.decorators import login_required
-from .models import HealthProfile
-import json
-import cv2
-import requests
-from pyzbar.pyzbar import decode
-import random
-
-def normalize_list(text):
-    if not text:
-        return []
-    return [x.strip().lower() for x in text.split(",")]
-
-
-def normalize_diet(diet):
-    diet = diet.lower()
-    if diet in ["veg", "vegetarian"]:
-        return "veg"
-    if diet in ["vegan"]:
-        return "vegan"
-    if diet in ["nonveg", "non-vegetarian"]:
-        return "nonveg"
-    return "veg"
-
-CALORIE_MAP = {
-    "vegetable poha": 250,
-    "oats upma": 220,
-    "moong dal chilla": 180,
-    "sprouts chaat": 150,
-
-    "brown rice + dal": 420,
-    "chapati + mixed vegetable sabzi": 380,
-    "millet khichdi": 350,
-
-    "roti + lauki sabzi": 300,
-    "vegetable khichdi": 320,
-    "vegetable soup + salad": 200,
-
-    "egg white omelette": 170,
-    "boiled eggs + fruit": 250,
-    "grilled chicken + salad": 400,
-    "fish curry + brown rice": 450,
-    "chicken soup": 280
-}
-
-
-INDIAN_DIET_PLANS = {
-    "diabetes": {
-        "veg": {
-            "breakfast": [
-                "vegetable poha",
-                "oats upma",
-                "moong dal chilla",
-                "sprouts chaat"
-            ],
-            "lunch": [
-                "brown rice + dal",
-                "chapati + mixed vegetable sabzi",
-                "millet khichdi"
-            ],
-            "dinner": [
-                "roti + lauki sabzi",
-                "vegetable khichdi",
-                "vegetable soup + salad"
-            ]
-        },
-
-        "vegan": {
-            "breakfast": [
-                "sprouts chaat",
-                "vegetable poha (no peanuts)",
-                "fruit bowl"
-            ],
-            "lunch": [
-                "millet khichdi (no ghee)",
-                "rice + vegetable curry",
-                "chapati + bhindi"
-            ],
-            "dinner": [
-                "vegetable soup",
-                "roti + lauki sabzi"
-            ]
-        },
-
-        "nonveg": {
-            "breakfast": [
-                "egg white omelette",
-                "boiled eggs + fruit",
-                "vegetable omelette"
-            ],
-            "lunch": [
-                "grilled chicken + salad",
-                "fish curry + brown rice",
-                "chicken dalia"
-            ],
-            "dinner": [
-                "chicken soup",
-                "grilled fish + vegetables"
-            ]
-        }
-    },
-
-    "bp": {
-        "veg": {
-            "breakfast": ["idli", "vegetable upma", "fruit bowl"],
-            "lunch": ["chapati + sabzi", "rice + dal (low salt)"],
-            "dinner": ["vegetable soup", "roti + bhindi"]
-        },
-
-        "vegan": {
-            "breakfast": ["fruit bowl", "oats porridge (water)"],
-            "lunch": ["rice + vegetable curry", "chapati + lauki"],
-            "dinner": ["vegetable soup"]
-        },
-
-        "nonveg": {
-            "breakfast": ["boiled eggs", "egg white omelette"],
-            "lunch": ["grilled fish + rice", "chicken curry (low salt)"],
-            "dinner": ["chicken soup"]
-        }
-    },
-
-    "thyroid": {
-        "veg": {
-            "breakfast": ["fruit bowl", "oats porridge"],
-            "lunch": ["chapati + dal", "rice + sabzi"],
-            "dinner": ["light khichdi"]
-        },
-
-        "vegan": {
-            "breakfast": ["fruit bowl"],
-            "lunch": ["rice + vegetable curry"],
-            "dinner": ["vegetable soup"]
-        },
-
-        "nonveg": {
-            "breakfast": ["boiled eggs"],
-            "lunch": ["chicken curry + rice"],
-            "dinner": ["grilled fish"]
-        }
-    }
-}
-
-ALLERGY_FILTERS = {
-    "nuts": ["peanut", "cashew", "almond", "nut"],
-    "gluten": ["wheat", "roti", "bread", "poha"],
-    "lactose": ["milk", "curd", "paneer", "buttermilk"],
-    "soy": ["soy", "soya"],
-    "egg": ["egg", "omelette"],
-}
-
-# ==================== BASIC VIEWS ====================
-
-# home/views.py
-def home_page(request):
-    return render(request, 'home/index.html', {'user': request.user}) 
-
-# ==================== AUTHENTICATION VIEWS ====================
-
-@csrf_exempt
-def ajax_login(request):
-    """Handle AJAX login requests"""
-    if request.method == "POST":
-        try:
-            data = json.loads(request.body)
-            username = data.get('username')
-            password = data.get('password')
-            
-            user = authenticate(request, username=username, password=password)
-            
-            if user is not None:
-                login(request, user)
-                return JsonResponse({
-                    'success': True,
-                    'username': user.username,
-                    'email': user.email
-                })
-            else:
-                return JsonResponse({
-                    'success': False,
-                    'error': 'Invalid username or password'
-                })
-        except Exception as e:
-            return JsonResponse({
-                'success': False,
-                'error': str(e)
-            })
-    
-    return JsonResponse({'success': False, 'error': 'Invalid request method'})
-
-@csrf_exempt
-def ajax_signup(request):
-    """Handle AJAX signup requests"""
-    if request.method == "POST":
-        try:
-            data = json.loads(request.body)
-            username = data.get('username')
-            email = data.get('email')
-            password = data.get('password')
-            
-            # Check if user already exists
-            if User.objects.filter(username=username).exists():
-                return JsonResponse({
-                    'success': False,
-                    'error': 'Username already exists'
-                })
-            
-            if User.objects.filter(email=email).exists():
-                return JsonResponse({
-                    'success': False,
-                    'error': 'Email already registered'
-                })
-            
-            # Create new user
-            user = User.objects.create_user(
-                username=username,
-                email=email,
-                password=password
-            )
-            
-            # Auto login after signup
-            login(request, user)
-            
-            return JsonResponse({
-                'success': True,
-                'username': user.username,
-                'email': user.email
-            })
-            
-        except Exception as e:
-            return JsonResponse({
-                'success': False,
-                'error': str(e)
-            })
-    
-    return JsonResponse({'success': False, 'error': 'Invalid request method'})
-
-@login_required
-def get_profile(request):
-    return JsonResponse({
-        "username": request.user.username,
-        "email": request.user.email
-    })
-
-@login_required
-def get_health_summary(request):
-    profile = HealthProfile.objects.filter(user=request.user).first()
-
-    if not profile:
-        return JsonResponse({"exists": False})
-
-    return JsonResponse({
-        "exists": True,
-        "condition": profile.health_conditions or "None",
-        "allergies": profile.allergies or "None",
-        "diet": profile.dietary_restrictions or "Not set"
-    })
-
-@login_required
-def get_user_history(request):
-    history = BarcodeHistory.objects.filter(user=request.user).order_by('-scanned_at')
-
-    data = []
-    for item in history:
-        data.append({
-            "product": item.product_name,
-            "barcode": item.barcode,
-            "time": item.scanned_at.strftime("%d %b %Y %H:%M")
-        })
-
-    return JsonResponse({"history": data})
-
-
-def logout_view(request):
-    """Handle logout"""
-    logout(request)
-    return redirect('home')
-
-# ==================== HEALTH PROFILE VIEWS ====================
-
-@csrf_exempt
-@login_required
-def save_health_profile(request):
-    if request.method == "POST":
-        data = json.loads(request.body)
-
-        profile, created = HealthProfile.objects.get_or_create(user=request.user)
-
-        profile.health_conditions = data.get("condition", "")
-        profile.allergies = data.get("allergies", "")
-        profile.dietary_restrictions = data.get("diet", "")
-        profile.save()
-
-        return JsonResponse({"success": True})
-
-    return JsonResponse({"success": False})
-
-
-# ==================== PRODUCT VIEWS ====================
-
-@csrf_exempt
-@login_required
-def ajax_save_product(request):
-    """Save scanned product to user's history"""
-    if request.method == "POST":
-        try:
-            # For now, just acknowledge receipt
-            return JsonResponse({
-                'success': True,
-                'product_id': 1,
-                'message': 'Product saved successfully'
-            })
-        except Exception as e:
-            return JsonResponse({
-                'success': False,
-                'error': str(e)
-            })
-    
-    return JsonResponse({'success': False, 'error': 'Invalid request method'})
-
-# ==================== DIET PLAN VIEWS ====================
-
-def estimate_calories(meal_list):
-    total = 0
-    for meal in meal_list:
-        total += CALORIE_MAP.get(meal, 250)  # safe fallback
-    return total
-
-
-def generate_indian_diet(condition, allergies, diet_type):
-    condition = condition.lower()
-
-    if "diabetes" in condition:
-        condition = "diabetes"
-    elif "bp" in condition or "pressure" in condition:
-        condition = "bp"
-    elif "thyroid" in condition:
-        condition = "thyroid"
-    else:
-        condition = "diabetes"
-
-    diet_type = normalize_diet(diet_type)
-    allergies = normalize_list(allergies)
-
-    disease_plan = INDIAN_DIET_PLANS.get(condition)
-    diet_plan = disease_plan.get(diet_type) or disease_plan["veg"]
-
-    final_plan = {}
-
-    for meal, options in diet_plan.items():
-        random.shuffle(options)
-        safe_items = []
-
-        for food in options:
-            blocked = False
-            for allergy in allergies:
-                for bad in ALLERGY_FILTERS.get(allergy, []):
-                    if bad in food:
-                        blocked = True
-            if not blocked:
-                safe_items.append(food)
-
-        if not safe_items:
-            safe_items = options
-
-        final_plan[meal] = random.sample(
-            safe_items,
-            min(2, len(safe_items))
-        )
-
-    return final_plan
-
-
-
-@login_required
-def get_diet_plan(request):
-    profile = HealthProfile.objects.get(user=request.user)
-
-    diet_plan = generate_indian_diet(
-        condition=profile.health_conditions or "",
-        allergies=profile.allergies or "",
-        diet_type=profile.dietary_restrictions or ""
-    )
-
-
-    return JsonResponse({
-        "meals": [
-            {
-                "title": " / ".join(diet_plan["breakfast"]),
-                "calories": estimate_calories(diet_plan["breakfast"])
-            },
-            {
-                "title": " / ".join(diet_plan["lunch"]),
-                "calories": estimate_calories(diet_plan["lunch"])
-            },
-            {
-                "title": " / ".join(diet_plan["dinner"]),
-                "calories": estimate_calories(diet_plan["dinner"])
-            }
-        ],
-        "note": "Personalized Indian diet generated dynamically"
-    })
-
-
-# ==================== ALTERNATIVES VIEWS ====================
-
-def is_high_risk(product, health):
-    sugar = product.get("nutrition", {}).get("sugar", 0)
-    fat = product.get("nutrition", {}).get("fat", 0)
-    nutri = product.get("nutriScore", "C")
-
-    condition = health.get("condition", "").lower()
-
-    if "diabetes" in condition and sugar > 10:
-        return True
-    if "bp" in condition and fat > 15:
-        return True
-    if nutri in ["D", "E"]:
-        return True
-
-    return False
-
-@csrf_exempt
-@login_required
-def ajax_alternatives(request):
-    if request.method == "POST":
-        try:
-            data = json.loads(request.body)
-            product_name = data.get("name", "")
-            sugar = float(data.get("nutrition", {}).get("sugar", {}).get("value", 0))
-            fat = float(data.get("nutrition", {}).get("fat", {}).get("value", 0))
-
-            profile = HealthProfile.objects.get(user=request.user)
-            condition = (profile.health_conditions or "").lower()
-
-            harmful = False
-            reason = ""
-
-            # Simple rule engine (works well in hackathon)
-            if "diabetes" in condition and sugar > 10:
-                harmful = True
-                reason = "High sugar not suitable for diabetes"
-
-            if "bp" in condition and fat > 20:
-                harmful = True
-                reason = "High fat not suitable for BP patients"
-
-            alternatives = []
-
-            if harmful:
-                # Fetch healthier alternatives from OpenFoodFacts
-                url = f"https://world.openfoodfacts.org/cgi/search.pl?search_terms={product_name}&search_simple=1&json=1&page_size=5"
-                res = requests.get(url)
-                result = res.json()
-
-                for item in result.get("products", [])[:3]:
-                    alternatives.append({
-                        "name": item.get("product_name", "Unknown"),
-                        "brand": item.get("brands", "Unknown"),
-                        "nutriscore": item.get("nutriscore_grade", "N/A")
-                    })
-
-            return JsonResponse({
-                "harmful": harmful,
-                "reason": reason,
-                "alternatives": alternatives
-            })
-
-        except Exception as e:
-            return JsonResponse({"error": str(e)})
-
-# ==================== BARCODE SCAN VIEW ====================
-
-def scan_barcode_and_get_food(request):
-    """Scan barcode using camera and get product info"""
-    cap = cv2.VideoCapture(0)
-
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        barcodes = decode(frame)
-
-        for barcode in barcodes:
-            barcode_number = barcode.data.decode("utf-8")
-
-            cap.release()
-            cv2.destroyAllWindows()
-
-            url = f"https://world.openfoodfacts.org/api/v0/product/{barcode_number}.json"
-            data = requests.get(url).json()
-
-            if data.get("status") == 1:
-                product = data["product"]
-                return JsonResponse({
-                    "barcode": barcode_number,
-                    "product_name": product.get("product_name"),
-                    "brand": product.get("brands"),
-                    "nutriscore": product.get("nutriscore_grade"),
-                    "ingredients": product.get("ingredients_text"),
-                })
-
-            return JsonResponse({
-                "barcode": barcode_number,
-                "message": "Product not found" 
-            })
-
-    cap.release()
-    cv2.destroyAllWindows()
-    return HttpResponse("No barcode detected")
\ No newline at end of file
+# home/views.py
+from django.shortcuts import redirect
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
+from django.contrib.auth import authenticate, login, logout
+from django.contrib.auth.models import User
+from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
+from django.contrib.auth.decorators import login_required
+from .models import HealthProfile
+from .products import lookup_product, normalize_nutrition, search_catalog, asearch_openfoodfacts
+from .resilience import CircuitOpenError
+from .ingest import record_scan
+from .db import db_writer
+from .decoding import decode_images
+from .camera import CameraUnavailable, get_camera
+from .similarity import find_healthier_alternatives
+from .risk import assess_product
+from .basket import analyze_basket
+from . import metrics
+from .history import DEFAULT_PAGE_SIZE, history_page
+from .rollups import nutrition_trend
+from .shell import render_with_shell
+from .diet import diet_plan_meals, get_daily_plan, invalidate_daily_plans, plan_signature
+from django.conf import settings
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from asgiref.sync import sync_to_async
+import json
+import time
+import httpx
+import math
+import requests
+
+# ==================== BASIC VIEWS ====================
+
+# home/views.py
+@ensure_csrf_cookie
+def home_page(request):
+    """Cached page shell (home/shell.py) with the visitor's login header filled in"""
+    return render_with_shell(
+        'home/index.html', 'user_header', 'home/user_header.html', {'user': request.user}
+    )
+
+# ==================== HEALTH PROFILE HELPERS ====================
+
+def get_health_profile(request):
+    """The user's HealthProfile (or None), queried at most once per request"""
+    if not hasattr(request, "_health_profile"):
+        request._health_profile = HealthProfile.objects.filter(user=request.user).first()
+    return request._health_profile
+
+
+async def aget_health_profile(request):
+    if not hasattr(request, "_health_profile"):
+        user = await request.auser()
+        request._health_profile = await HealthProfile.objects.filter(user=user).afirst()
+    return request._health_profile
+
+
+def health_summary(profile):
+    if not profile:
+        return {"exists": False}
+
+    return {
+        "exists": True,
+        "condition": profile.health_conditions or "None",
+        "allergies": profile.allergies or "None",
+        "diet": profile.dietary_restrictions or "Not set"
+    }
+
+# ==================== AUTHENTICATION VIEWS ====================
+
+@csrf_exempt
+def ajax_login(request):
+    """Handle AJAX login requests"""
+    if request.method == "POST":
+        try:
+            data = json.loads(request.body)
+            username = data.get('username')
+            password = data.get('password')
+            
+            user = authenticate(request, username=username, password=password)
+            
+            if user is not None:
+                login(request, user)
+                return JsonResponse({
+                    'success': True,
+                    'username': user.username,
+                    'email': user.email
+                })
+            else:
+                return JsonResponse({
+                    'success': False,
+                    'error': 'Invalid username or password'
+                })
+        except Exception as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            })
+    
+    return JsonResponse({'success': False, 'error': 'Invalid request method'})
+
+@csrf_exempt
+def ajax_signup(request):
+    """Handle AJAX signup requests"""
+    if request.method == "POST":
+        try:
+            data = json.loads(request.body)
+            username = data.get('username')
+            email = data.get('email')
+            password = data.get('password')
+            
+            # Check if user already exists
+            if User.objects.filter(username=username).exists():
+                return JsonResponse({
+                    'success': False,
+                    'error': 'Username already exists'
+                })
+            
+            if User.objects.filter(email=email).exists():
+                return JsonResponse({
+                    'success': False,
+                    'error': 'Email already registered'
+                })
+            
+            # Create new user (on the single database writer thread)
+            user = db_writer.run(
+                User.objects.create_user,
+                username=username,
+                email=email,
+                password=password
+            )
+            
+            # Auto login after signup
+            login(request, user)
+            
+            return JsonResponse({
+                'success': True,
+                'username': user.username,
+                'email': user.email
+            })
+            
+        except Exception as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            })
+    
+    return JsonResponse({'success': False, 'error': 'Invalid request method'})
+
+@login_required
+def get_profile(request):
+    return JsonResponse({
+        "username": request.user.username,
+        "email": request.user.email
+    })
+
+@login_required
+def get_health_summary(request):
+    return JsonResponse(health_summary(get_health_profile(request)))
+
+@login_required
+def get_user_history(request):
+    """One page of scan history; pass ?cursor=<next_cursor> for the next one"""
+    try:
+        limit = int(request.GET.get("limit", DEFAULT_PAGE_SIZE))
+        items, next_cursor = history_page(request.user, request.GET.get("cursor"), limit)
+    except ValueError:  # includes InvalidCursor
+        return JsonResponse({"error": "Invalid cursor or limit"}, status=400)
+
+    return JsonResponse({"history": items, "next_cursor": next_cursor})
+
+@login_required
+def get_nutrition_trends(request):
+    """Daily nutrition totals for the last ?days=N days (default 7)"""
+    try:
+        days = int(request.GET.get("days", 7))
+    except ValueError:
+        return JsonResponse({"error": "Invalid days"}, status=400)
+
+    trend = nutrition_trend(request.user, days)
+    totals = {
+        key: round(sum(day[key] for day in trend), 2)
+        for key in ("calories", "sugar", "fat", "salt", "products")
+    }
+    return JsonResponse({"days": trend, "totals": totals})
+
+
+def logout_view(request):
+    """Handle logout"""
+    logout(request)
+    return redirect('home')
+
+# ==================== HEALTH PROFILE VIEWS ====================
+
+@csrf_exempt
+@login_required
+def save_health_profile(request):
+    if request.method == "POST":
+        data = json.loads(request.body)
+
+        def update_profile():
+            profile, created = HealthProfile.objects.get_or_create(user=request.user)
+            old_signature = plan_signature(profile)
+
+            profile.health_conditions = data.get("condition", "")
+            profile.allergies = data.get("allergies", "")
+            profile.dietary_restrictions = data.get("diet", "")
+            profile.save()
+            return profile, old_signature
+
+        profile, old_signature = db_writer.run(update_profile)
+        request._health_profile = profile
+
+        # Only a change in plan inputs invalidates the persisted diet plan
+        if plan_signature(profile) != old_signature:
+            invalidate_daily_plans(request.user)
+
+        return JsonResponse({"success": True})
+
+    return JsonResponse({"success": False})
+
+
+# ==================== PRODUCT VIEWS ====================
+
+@csrf_exempt
+@login_required
+def ajax_save_product(request):
+    """Save scanned product to user's history"""
+    if request.method == "POST":
+        try:
+            data = json.loads(request.body)
+            barcode = str(data.get('barcode') or '').strip()
+            name = (data.get('name') or '').strip()
+            if not barcode or not name:
+                return JsonResponse({
+                    'success': False,
+                    'error': 'Product barcode and name are required'
+                })
+
+            # Buffered and written in batches; repeat scans are debounced
+            queued = record_scan(
+                request.user.id, barcode[:100], name[:200],
+                normalize_nutrition(data.get('nutrition')),
+            )
+            return JsonResponse({
+                'success': True,
+                'queued': queued,
+                'message': 'Product saved successfully' if queued else 'Duplicate scan ignored'
+            })
+        except Exception as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            })
+    
+    return JsonResponse({'success': False, 'error': 'Invalid request method'})
+
+# ==================== DIET PLAN VIEWS ====================
+
+@login_required
+def get_diet_plan(request):
+    profile = get_health_profile(request)
+    if not profile:
+        return JsonResponse({"error": "Health profile not set"}, status=404)
+    daily_plan = get_daily_plan(request.user, profile)
+
+    if daily_plan["etag"] in parse_etags(request.headers.get("If-None-Match", "")):
+        response = HttpResponseNotModified()
+    else:
+        response = JsonResponse({
+            "meals": diet_plan_meals(daily_plan["plan"]),
+            "note": "Personalized Indian diet generated dynamically"
+        })
+
+    response["ETag"] = daily_plan["etag"]
+    # Browsers may keep it, but must revalidate: the plan changes with the profile
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+# ==================== ALTERNATIVES VIEWS ====================
+
+def is_high_risk(product, health):
+    harmful, _ = assess_product(
+        product.get("nutrition"), product.get("nutriScore"), health.get("condition", "")
+    )
+    return harmful
+
+@csrf_exempt
+@login_required
+async def ajax_alternatives(request):
+    if request.method == "POST":
+        try:
+            data = json.loads(request.body)
+            product_name = data.get("name", "")
+
+            profile = await aget_health_profile(request)
+            condition = ((profile and profile.health_conditions) or "").lower()
+
+            # Shared rule table (home/risk.py); reasons come heaviest first
+            harmful, reasons = assess_product(
+                data.get("nutrition"), data.get("nutriscore") or data.get("nutriScore"), condition
+            )
+
+            alternatives = []
+            degraded = False
+
+            if harmful:
+                # Nutrient-similarity index first: ranked and actually healthier.
+                # Name search (local catalog, then OpenFoodFacts) only as a fallback.
+                candidates = find_healthier_alternatives(
+                    data.get("nutrition", {}),
+                    categories=data.get("categories", ""),
+                    barcode=data.get("barcode"),
+                    condition=condition,
+                )
+                if not candidates:
+                    candidates = await sync_to_async(search_catalog)(
+                        product_name, limit=3, exclude_barcode=data.get("barcode")
+                    )
+                if not candidates:
+                    try:
+                        candidates = await asearch_openfoodfacts(product_name, limit=5)
+                    except (httpx.HTTPError, requests.RequestException, TimeoutError):
+                        # OpenFoodFacts down or over budget: answer without it
+                        degraded = True
+
+                for item in candidates[:3]:
+                    alternatives.append({
+                        "barcode": item["barcode"],
+                        "name": item["name"],
+                        "brand": item["brand"] or "Unknown",
+                        "nutriscore": item["nutriscore"].lower() or "N/A"
+                    })
+
+            return JsonResponse({
+                "harmful": harmful,
+                "reason": reasons[0] if reasons else "",
+                "reasons": reasons,
+                "degraded": degraded,
+                "alternatives": alternatives
+            })
+
+        except Exception as e:
+            return JsonResponse({"error": str(e)})
+
+    return JsonResponse({"error": "Invalid request method"})
+
+# ==================== BOOTSTRAP API ====================
+
+def _bootstrap_profile(request):
+    return {"username": request.user.username, "email": request.user.email}
+
+
+def _bootstrap_health(request):
+    return health_summary(get_health_profile(request))
+
+
+def _bootstrap_diet_plan(request):
+    profile = get_health_profile(request)
+    if not profile:
+        return None
+    daily_plan = get_daily_plan(request.user, profile)
+    return {"meals": diet_plan_meals(daily_plan["plan"]), "etag": daily_plan["etag"]}
+
+
+def _bootstrap_history(request):
+    items, next_cursor = history_page(request.user)
+    return {"history": items, "next_cursor": next_cursor}
+
+
+# Each field is only computed when requested
+BOOTSTRAP_FIELDS = {
+    "profile": _bootstrap_profile,
+    "health": _bootstrap_health,
+    "diet_plan": _bootstrap_diet_plan,
+    "history": _bootstrap_history,
+}
+
+
+@login_required
+def api_bootstrap(request):
+    """Everything the page needs on load; ?fields=profile,diet_plan limits it"""
+    fields = request.GET.get("fields")
+    names = [f.strip() for f in fields.split(",") if f.strip()] if fields else list(BOOTSTRAP_FIELDS)
+    unknown = [name for name in names if name not in BOOTSTRAP_FIELDS]
+    if unknown:
+        return JsonResponse({"error": f"Unknown fields: {', '.join(unknown)}"}, status=400)
+
+    response = JsonResponse({name: BOOTSTRAP_FIELDS[name](request) for name in names})
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+# ==================== PRODUCT LOOKUP API ====================
+
+def api_product(request, barcode):
+    """Return product info for a barcode, served from the product cache"""
+    if not barcode.isdigit():
+        return JsonResponse({"error": "Invalid barcode"}, status=400)
+
+    try:
+        product, cache_status = lookup_product(barcode)
+    except CircuitOpenError as e:
+        # Nothing cached and the upstream is known to be down: fail fast
+        response = JsonResponse(
+            {"error": "Product service temporarily unavailable", "degraded": True}, status=503
+        )
+        response["Retry-After"] = str(math.ceil(e.retry_after))
+        return response
+    except requests.RequestException:
+        return JsonResponse({"error": "Product lookup failed"}, status=502)
+
+    response = JsonResponse(product, status=200 if product["found"] else 404)
+    response["X-Cache"] = cache_status
+    return response
+
+# ==================== BASKET API ====================
+
+@csrf_exempt
+@login_required
+async def api_basket(request):
+    """Score a basket of barcodes; streams one NDJSON line per item, then a summary"""
+    if request.method != "POST":
+        return JsonResponse({"error": "Invalid request method"}, status=405)
+
+    try:
+        barcodes = json.loads(request.body).get("barcodes")
+    except (ValueError, AttributeError):
+        return JsonResponse({"error": "Invalid JSON body"}, status=400)
+    if not isinstance(barcodes, list) or not barcodes:
+        return JsonResponse({"error": "barcodes must be a non-empty list"}, status=400)
+    if len(barcodes) > settings.BASKET_MAX_ITEMS:
+        return JsonResponse(
+            {"error": f"At most {settings.BASKET_MAX_ITEMS} barcodes per basket"}, status=400
+        )
+
+    profile = await aget_health_profile(request)
+    condition = (profile and profile.health_conditions) or ""
+    results = analyze_basket([str(b).strip() for b in barcodes], condition)
+
+    async def lines():
+        async for result in results:
+            yield json.dumps(result) + "\n"
+
+    response = StreamingHttpResponse(lines(), content_type="application/x-ndjson")
+    response["X-Accel-Buffering"] = "no"  # let proxies pass lines through as they come
+    return response
+
+# ==================== BARCODE DECODE API ====================
+
+@csrf_exempt
+@login_required
+def api_decode(request):
+    """Decode barcodes in uploaded images (multipart files or a raw image body)"""
+    if request.method != "POST":
+        return JsonResponse({"error": "Invalid request method"}, status=405)
+
+    if request.FILES:
+        uploads = [f for name in request.FILES for f in request.FILES.getlist(name)]
+        names = [f.name for f in uploads]
+        images = [f.read() for f in uploads]
+    elif request.content_type.startswith("image/") and request.body:
+        names = ["body"]
+        images = [request.body]
+    else:
+        return JsonResponse({"error": "Send images as multipart files or an image/* body"}, status=400)
+
+    if len(images) > settings.BARCODE_DECODE_MAX_IMAGES:
+        return JsonResponse(
+            {"error": f"At most {settings.BARCODE_DECODE_MAX_IMAGES} images per request"},
+            status=400,
+        )
+
+    try:
+        deadline_ms = int(request.GET.get("deadline_ms", settings.BARCODE_DECODE_DEADLINE_MS))
+    except ValueError:
+        return JsonResponse({"error": "Invalid deadline_ms"}, status=400)
+    deadline_ms = min(max(deadline_ms, 1), settings.BARCODE_DECODE_MAX_DEADLINE_MS)
+
+    results = decode_images(images, deadline=time.monotonic() + deadline_ms / 1000)
+    for name, result in zip(names, results):
+        result["name"] = name
+
+    return JsonResponse({"images": results})
+
+# ==================== BARCODE SCAN VIEW ====================
+
+def scan_barcode_and_get_food(request):
+    """Wait for a barcode on the shared camera (home/camera.py) and get product info"""
+    try:
+        barcode = get_camera().scan(timeout=settings.CAMERA_SCAN_TIMEOUT)
+    except CameraUnavailable as e:
+        return JsonResponse({"error": str(e)}, status=503)
+
+    if barcode is None:
+        return JsonResponse({"message": "No barcode detected"})
+
+    barcode_number = barcode["data"]
+    try:
+        product, _ = lookup_product(barcode_number)
+    except requests.RequestException:
+        product = {"found": False}
+
+    if product["found"]:
+        return JsonResponse({
+            "barcode": barcode_number,
+            "product_name": product["name"],
+            "brand": product["brand"],
+            "nutriscore": product["nutriscore"].lower(),
+            "ingredients": product["ingredients"],
+        })
+
+    return JsonResponse({
+        "barcode": barcode_number,
+        "message": "Product not found"
+    })
+
+
+# ==================== METRICS ====================
+
+def metrics_view(request):
+    """Prometheus text exposition of this process's metrics"""
+    return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
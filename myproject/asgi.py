@@ -1,16 +1,41 @@
-"""
-ASGI config for myproject project.
-
-It exposes the ASGI callable as a module-level variable named ``application``.
-
-For more information on this file, see
-https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
-"""
-
-import os
-
-from django.core.asgi import get_asgi_application
-
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myproject.settings')
-
-application = get_asgi_application()
+"""
+ASGI config for myproject project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+
+Serve it with an ASGI server (e.g. ``uvicorn myproject.asgi:application``) so
+async views share one event loop and with it the pooled, request-coalescing
+outbound client in home/outbound.py.
+
+HTTP goes to Django. WebSocket connections to SCAN_WS_PATH are live scan
+sessions (home/scan_session.py); other WebSocket paths are refused.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myproject.settings')
+
+django_application = get_asgi_application()
+
+# Imported after Django is set up: these use models and settings
+from django.conf import settings  # noqa: E402
+
+from home.scan_session import scan_session  # noqa: E402
+from home.similarity import warm_index  # noqa: E402
+
+warm_index()
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        if scope['path'] == settings.SCAN_WS_PATH:
+            return await scan_session(scope, receive, send)
+        await receive()  # websocket.connect
+        await send({'type': 'websocket.close', 'code': 4404})
+        return
+    return await django_application(scope, receive, send)
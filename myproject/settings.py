@@ -1,118 +1,236 @@
-"""
-Django settings for myproject project.
-
-Generated by 'django-admin startproject' using Django 6.0.1.
-
-For more information on this file, see
-https://docs.djangoproject.com/en/6.0/topics/settings/
-
-For the full list of settings and their values, see
-https://docs.djangoproject.com/en/6.0/ref/settings/
-"""
-
-from pathlib import Path
-
-# Build paths inside the project like this: BASE_DIR / 'subdir'.
-BASE_DIR = Path(__file__).resolve().parent.parent
-
-
-# Quick-start development settings - unsuitable for production
-# See https://docs.djangoproject.com/en/6.0/howto/deployment/checklist/
-
-# SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-)+trg7m&(y)cmrvu+$i&@g=usf*u--nl534$c#ect&96$-t*x0'
-
-# SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
-
-ALLOWED_HOSTS = []
-
-
-# Application definition
-
-INSTALLED_APPS = [
-    'django.contrib.admin',
-    'django.contrib.auth',
-    'django.contrib.contenttypes',
-    'django.contrib.sessions',
-    'django.contrib.messages',
-    'django.contrib.staticfiles',
-    'home',
-]
-
-MIDDLEWARE = [
-    'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
-    'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
-]
-
-ROOT_URLCONF = 'myproject.urls'
-
-TEMPLATES = [
-    {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [],
-        'APP_DIRS': True,
-        'OPTIONS': {
-            'context_processors': [
-                'django.template.context_processors.request',
-                'django.contrib.auth.context_processors.auth',
-                'django.contrib.messages.context_processors.messages',
-            ],
-        },
-    },
-]
-
-WSGI_APPLICATION = 'myproject.wsgi.application'
-
-
-# Database
-# https://docs.djangoproject.com/en/6.0/ref/settings/#databases
-
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
-
-
-# Password validation
-# https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
-
-AUTH_PASSWORD_VALIDATORS = [
-    {
-        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
-    },
-]
-
-
-# Internationalization
-# https://docs.djangoproject.com/en/6.0/topics/i18n/
-
-LANGUAGE_CODE = 'en-us'
-
-TIME_ZONE = 'UTC'
-
-USE_I18N = True
-
-USE_TZ = True
-
-
-# Static files (CSS, JavaScript, Images)
-# https://docs.djangoproject.com/en/6.0/howto/static-files/
-
-STATIC_URL = 'static/'
+"""
+Django settings for myproject project.
+
+Generated by 'django-admin startproject' using Django 6.0.1.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/6.0/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/6.0/ref/settings/
+"""
+
+import os
+from pathlib import Path
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/6.0/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = 'django-insecure-)+trg7m&(y)cmrvu+$i&@g=usf*u--nl534$c#ect&96$-t*x0'
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = True
+
+ALLOWED_HOSTS = []
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'home',
+]
+
+MIDDLEWARE = [
+    'home.middleware.metrics_middleware',
+    'django.middleware.security.SecurityMiddleware',
+    'home.middleware.static_assets_middleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'home.sessions.SessionCacheAuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'myproject.urls'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'myproject.wsgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/6.0/ref/settings/#databases
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 600,  # keep connections (and their pragmas) between requests
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': 20,
+            # Take the write lock up front instead of failing to upgrade a read lock
+            'transaction_mode': 'IMMEDIATE',
+        },
+    }
+}
+
+# Applied to every new SQLite connection (home/db.py)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 20000,  # ms
+    'temp_store': 'MEMORY',
+}
+
+# Route writes through the single db-writer thread (home/db.py).
+# Turn off in tests: the writer thread has its own connection.
+SQLITE_SERIALIZED_WRITES = True
+
+
+# Password validation
+# https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/6.0/topics/i18n/
+
+LANGUAGE_CODE = 'en-us'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/6.0/howto/static-files/
+
+STATIC_URL = 'static/'
+
+# Built assets (home/assets.py): run `python manage.py build_assets` on every deploy
+
+ASSET_SOURCE_DIRS = [BASE_DIR / 'home' / 'static']
+ASSET_BUILD_DIR = BASE_DIR / 'build' / 'assets'
+ASSET_URL_PREFIX = 'build/'  # built files are served at STATIC_URL + this
+ASSET_MAX_AGE = 60 * 60 * 24 * 365  # seconds; safe because names change with content
+
+# Sessions (home/sessions.py): stored in the database, hot ones cached in process
+
+SESSION_ENGINE = 'home.sessions'
+SESSION_CACHE_SIZE = 10000  # sessions (and as many users) kept in process memory
+SESSION_CACHE_TTL = 60  # seconds; bounds how long changes made by other processes go unseen
+
+# Cached page shells (home/shell.py)
+
+DEPLOY_VERSION = os.environ.get('DEPLOY_VERSION', '')  # set per deploy, e.g. to the git commit
+PAGE_SHELL_CACHE = not DEBUG  # off in development so template edits show up
+
+
+# Product lookups (home/products.py)
+
+OPENFOODFACTS_URL = 'https://world.openfoodfacts.org'
+OPENFOODFACTS_TIMEOUT = 3  # seconds, per attempt
+OPENFOODFACTS_DEADLINE = 6  # seconds, per call including retries
+OPENFOODFACTS_RETRIES = 2
+OPENFOODFACTS_RETRY_BACKOFF = 0.2  # seconds; retry n sleeps up to this * 2**n
+
+# Circuit breaker for OpenFoodFacts (home/resilience.py)
+BREAKER_WINDOW = 20  # recent calls considered
+BREAKER_MIN_CALLS = 10  # no verdict on fewer calls than this
+BREAKER_ERROR_RATE = 0.5  # open when this share of the window failed ...
+BREAKER_SLOW_CALL_SECONDS = 2.0
+BREAKER_SLOW_RATE = 0.8  # ... or this share was slower than BREAKER_SLOW_CALL_SECONDS
+BREAKER_OPEN_SECONDS = 30  # fail fast this long before trying again
+
+PRODUCT_CACHE_SIZE = 2048  # products kept in process memory
+PRODUCT_CACHE_TTL = 60 * 60 * 24  # served without revalidation
+PRODUCT_CACHE_STALE_TTL = 60 * 60 * 24 * 7  # served while revalidating
+PRODUCT_CACHE_MISS_TTL = 60 * 60  # "not found" answers
+PRODUCT_CACHE_DUMP_TTL = 60 * 60 * 24 * 30  # rows from import_off_dump, served without revalidation
+
+# Async outbound client (home/outbound.py), one pool per process
+OUTBOUND_MAX_CONNECTIONS = 100
+OUTBOUND_MAX_KEEPALIVE = 20
+OUTBOUND_PER_HOST_LIMIT = 10  # concurrent requests per upstream host
+
+# Healthier-alternative index (home/similarity.py)
+SIMILARITY_INDEX_TTL = 60 * 60  # rebuilt in the background after this
+
+
+# Barcode decoding for uploads and scan sessions (home/decoding.py)
+
+BARCODE_DECODE_WORKERS = 4  # decoder processes
+BARCODE_DECODE_QUEUE_FACTOR = 4  # queued images allowed per worker
+BARCODE_DECODE_MAX_IMAGES = 16  # per request
+BARCODE_DECODE_DEADLINE_MS = 2000  # default per-request deadline
+BARCODE_DECODE_MAX_DEADLINE_MS = 10000
+
+# Live scan sessions over WebSocket (home/scan_session.py, routed in myproject/asgi.py)
+
+SCAN_WS_PATH = '/ws/scan/'
+SCAN_WS_MAX_SESSIONS = 500  # per process
+SCAN_WS_MAX_FRAME_BYTES = 512 * 1024
+SCAN_WS_BUSY_RETRY = 0.02  # seconds to wait for a decoder slot before trying again
+
+# Shared kiosk camera behind /scan/ (home/camera.py)
+
+CAMERA_SOURCE = 0  # device index, or a video file / stream URL standing in for the camera
+CAMERA_BUFFER_FRAMES = 8  # recent frames kept in the ring buffer
+CAMERA_SCAN_TIMEOUT = 10  # seconds a /scan/ request waits for a barcode
+CAMERA_RECONNECT_SECONDS = 2.0
+
+
+# Diet plans (home/diet.py)
+
+MEAL_CATALOG_PATH = BASE_DIR / 'home' / 'data' / 'meals.json'
+
+
+# Scan ingestion (home/ingest.py)
+
+SCAN_BUFFER_MAX_ROWS = 500  # flush when this many scans are buffered
+SCAN_BUFFER_FLUSH_INTERVAL = 2.0  # ... or after this many seconds
+SCAN_DEBOUNCE_SECONDS = 10  # same user + barcode within this window is one scan
+
+# Basket analysis (home/basket.py)
+
+BASKET_MAX_ITEMS = 500  # barcodes per request
+BASKET_LOOKUP_WORKERS = 16  # concurrent product lookups, shared by all requests
+BASKET_DEADLINE = 30  # seconds; lookups still running after this are reported as timed out
+
+# Metrics (home/metrics.py, served at /metrics)
+
+METRICS_SLOW_REQUEST_MS = None  # e.g. 500 to log slow requests with their SQL
+METRICS_SLOW_REQUEST_SAMPLE_RATE = 0.1  # share of requests that collect their SQL